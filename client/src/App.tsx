@@ -3,13 +3,16 @@ import { useEffect, useState } from "react";
 import {
   usePatents,
   useLatestDocumentByPatent,
-  useAllDocumentsByPatent,
+  useDocumentVersionsByPatent,
   useSaveDocument,
   useCreateNewDocumentVersion,
+  useVersionEvents,
 } from "./hooks";
 import {
+  fetchDocument,
   fetchLatestDocumentByPatent,
   type Document as ApiDocument,
+  type DocumentSummary,
 } from "./lib";
 import { useQueryClient } from "@tanstack/react-query";
 import DocumentEditor from "./Document";
@@ -24,8 +27,16 @@ function App() {
   // ===== STATE HOOKS =====
   const [selectedPatentId, setSelectedPatentId] = useState<number>(1);
   const [draft, setDraft] = useState<ApiDocument | null>(null);
+  // The draft as the server last had it, which saves are sent as edits against
+  const [savedDraft, setSavedDraft] = useState<ApiDocument | null>(null);
   const [showNewVersionAlert, setShowNewVersionAlert] = useState(false);
 
+  // Show a document as the server has it: both the draft and its saved copy
+  const loadDraft = (document: ApiDocument | null) => {
+    setDraft(document);
+    setSavedDraft(document);
+  };
+
   // ===== TANSTACK QUERY HOOKS =====
   const queryClient = useQueryClient();
 
@@ -45,13 +56,18 @@ function App() {
     error: docError,
   } = useLatestDocumentByPatent(selectedPatentId);
 
-  // 3) Load all documents for the selected patent
+  // 3) Load the versions of the selected patent (without content), a page at a time
   const {
-    data: allDocuments,
+    data: versionPages,
     isLoading: isAllDocumentsLoading,
     isError: isAllDocumentsError,
     error: allDocumentsError,
-  } = useAllDocumentsByPatent(selectedPatentId);
+    hasNextPage,
+    fetchNextPage,
+    isFetchingNextPage,
+  } = useDocumentVersionsByPatent(selectedPatentId);
+  const allDocuments = versionPages?.pages.flatMap((page) => page.items);
+  const totalDocuments = versionPages?.pages[0]?.total;
 
   // 4) Save mutation
   const save = useSaveDocument();
@@ -59,6 +75,9 @@ function App() {
   // 5) Create new document version mutation
   const createNewVersion = useCreateNewDocumentVersion();
 
+  // 6) Refresh the queries above when versions change elsewhere
+  useVersionEvents();
+
   // ===== EFFECTS =====
   // Auto-select the first patent once they load (if none selected yet)
   useEffect(() => {
@@ -69,25 +88,34 @@ function App() {
 
   // Sync draft when a new document arrives
   useEffect(() => {
-    if (doc) setDraft(doc);
-    else setDraft(null); // no document for this patent
+    if (doc) loadDraft(doc);
+    else loadDraft(null); // no document for this patent
   }, [doc]);
 
   // ===== FUNCTIONS =====
   // Get the latest document number for the current draft
   const getCurrentDocumentNumber = () => {
     if (!draft || !allDocuments) return 0;
-    return getChronologicalNumber(draft.id, allDocuments);
+    return getChronologicalNumber(draft.id, allDocuments, totalDocuments);
+  };
+
+  // Versions are listed without content; fetch the body when one is opened
+  const onDocumentSelect = async (version: DocumentSummary) => {
+    const document = await queryClient.fetchQuery({
+      queryKey: ["document", version.id],
+      queryFn: () => fetchDocument(version.id),
+    });
+    loadDraft(document);
   };
 
   const onSave = () => {
     if (!draft) return;
-    save.mutate(draft, {
+    save.mutate({ draft, base: savedDraft }, {
       onSuccess: async () => {
         const updated = await fetchLatestDocumentByPatent(
           draft.patent_entity_id
         );
-        setDraft(updated); // ✅ update the local state manually
+        loadDraft(updated); // ✅ update the local state manually
       },
     });
   };
@@ -112,7 +140,7 @@ function App() {
       {
         onSuccess: (newDocument) => {
           // Set the new document as the current draft
-          setDraft(newDocument);
+          loadDraft(newDocument);
           // Close the alert
           setShowNewVersionAlert(false);
         },
@@ -191,11 +219,15 @@ function App() {
 
           <DocumentVersionsList
             documents={allDocuments}
+            total={totalDocuments}
             isLoading={isAllDocumentsLoading}
             isError={isAllDocumentsError}
             error={allDocumentsError}
             selectedDocumentId={draft?.id || null}
-            onDocumentSelect={setDraft}
+            onDocumentSelect={onDocumentSelect}
+            hasMore={!!hasNextPage}
+            isLoadingMore={isFetchingNextPage}
+            onLoadMore={() => fetchNextPage()}
           />
         </aside>
       </div>
@@ -1,24 +1,32 @@
 // components/DocumentVersionsList.tsx - Document Versions List
 import { Card, CardContent, CardHeader } from "./ui/card";
-import { extractTitleAndBody, getChronologicalNumber } from "../utils";
-import type { Document } from "../lib/types";
+import { getChronologicalNumber } from "../utils";
+import type { DocumentSummary } from "../lib/types";
 
 interface DocumentVersionsListProps {
-  documents: Document[] | undefined;
+  documents: DocumentSummary[] | undefined;
+  total: number | undefined;
   isLoading: boolean;
   isError: boolean;
   error: Error | null;
   selectedDocumentId: number | null;
-  onDocumentSelect: (document: Document) => void;
+  onDocumentSelect: (document: DocumentSummary) => void;
+  hasMore: boolean;
+  isLoadingMore: boolean;
+  onLoadMore: () => void;
 }
 
 export function DocumentVersionsList({
   documents,
+  total,
   isLoading,
   isError,
   error,
   selectedDocumentId,
   onDocumentSelect,
+  hasMore,
+  isLoadingMore,
+  onLoadMore,
 }: DocumentVersionsListProps) {
   return (
     <div className="flex flex-col gap-2">
@@ -47,8 +55,9 @@ export function DocumentVersionsList({
               onClick={() => onDocumentSelect(document)}
               title={`Document #${getChronologicalNumber(
                 document.id,
-                documents
-              )} - ${extractTitleAndBody(document.content).title}`}
+                documents,
+                total
+              )}`}
             >
               <CardHeader className="pb-2">
                 <div
@@ -59,64 +68,44 @@ export function DocumentVersionsList({
                   }`}
                 >
                   Document #
-                  {getChronologicalNumber(document.id, documents)}
+                  {getChronologicalNumber(document.id, documents, total)}
                 </div>
               </CardHeader>
               <CardContent className="pt-0">
-                {(() => {
-                  const { title, body } = extractTitleAndBody(
-                    document.content
-                  );
-                  return (
-                    <div className="space-y-2">
-                      {title && (
-                        <div
-                          className={`text-xs font-medium line-clamp-1 ${
-                            selectedDocumentId === document.id
-                              ? "text-slate-200"
-                              : "text-muted-foreground"
-                          }`}
-                        >
-                          {title}
-                        </div>
-                      )}
-                      <div
-                        className={`text-xs line-clamp-2 ${
-                          selectedDocumentId === document.id
-                            ? "text-slate-200/80"
-                            : "text-muted-foreground"
-                        }`}
-                      >
-                        {body}
-                      </div>
-                      <div className="flex flex-col gap-1 pt-2 border-t border-border/50">
-                        <div
-                          className={`text-xs ${
-                            selectedDocumentId === document.id
-                              ? "text-slate-200/70"
-                              : "text-muted-foreground"
-                          }`}
-                        >
-                          Created:{" "}
-                          {new Date(document.created_at).toLocaleString()}
-                        </div>
-                        <div
-                          className={`text-xs ${
-                            selectedDocumentId === document.id
-                              ? "text-slate-200/70"
-                              : "text-muted-foreground"
-                          }`}
-                        >
-                          Updated:{" "}
-                          {new Date(document.updated_at).toLocaleString()}
-                        </div>
-                      </div>
-                    </div>
-                  );
-                })()}
+                <div className="flex flex-col gap-1">
+                  <div
+                    className={`text-xs ${
+                      selectedDocumentId === document.id
+                        ? "text-slate-200/70"
+                        : "text-muted-foreground"
+                    }`}
+                  >
+                    Created:{" "}
+                    {new Date(document.created_at).toLocaleString()}
+                  </div>
+                  <div
+                    className={`text-xs ${
+                      selectedDocumentId === document.id
+                        ? "text-slate-200/70"
+                        : "text-muted-foreground"
+                    }`}
+                  >
+                    Updated:{" "}
+                    {new Date(document.updated_at).toLocaleString()}
+                  </div>
+                </div>
               </CardContent>
             </Card>
           ))}
+          {hasMore && (
+            <button
+              className="text-xs text-slate-400 hover:text-slate-200 py-2 disabled:opacity-50"
+              onClick={onLoadMore}
+              disabled={isLoadingMore}
+            >
+              {isLoadingMore ? "Loading..." : "Load older versions"}
+            </button>
+          )}
         </div>
       ) : (
         <p className="text-slate-400 text-sm">No documents found</p>
@@ -1,4 +1,5 @@
 // hooks/index.ts - Export all hooks
 export * from './usePatents';
 export * from './useDocuments';
-export * from './useAIAnalysis'; 
\ No newline at end of file
+export * from './useAIAnalysis';
+export * from './useVersionEvents'; 
\ No newline at end of file
@@ -2,7 +2,7 @@
 import { useCallback, useEffect, useMemo, useRef, useState } from "react";
 import useWebSocket from "react-use-websocket";
 import { debounce } from "lodash";
-import type { Suggestions, SuggestionsResponse, AIAnalysisState } from "../lib/types";
+import type { Suggestions, SuggestionsResponse, QueueStatusResponse, AIAnalysisState } from "../lib/types";
 
 const SOCKET_URL = "ws://localhost:8000/ws";
 
@@ -16,6 +16,7 @@ export function useAIAnalysis() {
 
   // Refs to avoid stale closures
   const latestRequestIdRef = useRef(0);
+  const partialRequestIdRef = useRef(0);
   const analysisTimerRef = useRef<number | null>(null);
 
   const clearAnalysisTimer = useCallback(() => {
@@ -46,10 +47,25 @@ export function useAIAnalysis() {
   useEffect(() => {
     if (lastMessage !== null) {
       try {
-        const response: SuggestionsResponse = JSON.parse(lastMessage.data);
+        const frame: SuggestionsResponse | QueueStatusResponse = JSON.parse(lastMessage.data);
+        if (frame.status === "queued") {
+          // Server is at capacity; the analysis is still pending
+          console.debug("AI request", frame.request_id, "queued at position", frame.position);
+          return;
+        }
+        const response = frame;
 
         // Only accept if this response corresponds to the latest pending request
-        if (response.request_id === latestRequestIdRef.current) {
+        if (response.request_id === latestRequestIdRef.current && response.status === "partial") {
+          // Show issues as they stream in; keep analyzing until the complete frame
+          setSuggestions((prev) => ({
+            issues: [
+              ...(partialRequestIdRef.current === response.request_id ? prev?.issues ?? [] : []),
+              ...response.suggestions.issues,
+            ],
+          }));
+          partialRequestIdRef.current = response.request_id;
+        } else if (response.request_id === latestRequestIdRef.current) {
           clearAnalysisTimer();
           setIsAnalyzing(false);
           setTimeoutError(null);
@@ -1,12 +1,15 @@
 // hooks/useDocuments.ts - Document-related React Query hooks
-import { useQuery, useQueryClient, useMutation } from "@tanstack/react-query";
+import { useInfiniteQuery, useQuery, useQueryClient, useMutation } from "@tanstack/react-query";
 import {
   fetchLatestDocumentByPatent,
-  fetchAllDocumentsByPatent,
+  fetchDocumentVersionsByPatent,
   fetchDocument,
   saveDocument,
+  patchDocument,
   createNewDocumentVersion,
 } from "../lib/api";
+import type { Document } from "../lib/types";
+import { getTextEdits } from "../utils";
 
 // Query hooks
 export const useLatestDocumentByPatent = (patentId: number) =>
@@ -16,10 +19,13 @@ export const useLatestDocumentByPatent = (patentId: number) =>
     enabled: !!patentId,
   });
 
-export const useAllDocumentsByPatent = (patentId: number) =>
-  useQuery({
+// Versions without their content, a page at a time; bodies are fetched when a version is opened
+export const useDocumentVersionsByPatent = (patentId: number) =>
+  useInfiniteQuery({
     queryKey: ["allDocumentsByPatent", patentId],
-    queryFn: () => fetchAllDocumentsByPatent(patentId),
+    queryFn: ({ pageParam }) => fetchDocumentVersionsByPatent(patentId, pageParam),
+    initialPageParam: null as number | null,
+    getNextPageParam: (lastPage) => lastPage.next_cursor,
     enabled: !!patentId,
   });
 
@@ -34,7 +40,14 @@ export const useDocument = (documentNumber?: number) =>
 export const useSaveDocument = () => {
   const qc = useQueryClient();
   return useMutation({
-    mutationFn: saveDocument,
+    // Patch when the draft's saved copy is known, so only the edit is sent; otherwise save the whole body
+    mutationFn: async ({ draft, base }: { draft: Document; base: Document | null }): Promise<Document> => {
+      if (!base || base.id !== draft.id || base.patent_entity_id !== draft.patent_entity_id) {
+        return saveDocument(draft);
+      }
+      const saved = await patchDocument(draft.id, base.revision, getTextEdits(base.content, draft.content));
+      return { ...draft, ...saved };
+    },
     onSuccess: (updated) => {
       // 1) Put updated doc straight into the cache bucket you read from
       qc.setQueryData(["latestDocumentByPatent", updated.patent_entity_id], updated);
@@ -0,0 +1,29 @@
+// hooks/useVersionEvents.ts - Server-pushed version changes, instead of refetching to find them
+import { useEffect } from "react";
+import useWebSocket from "react-use-websocket";
+import { useQueryClient } from "@tanstack/react-query";
+import type { Document, VersionEvents } from "../lib/types";
+
+const SOCKET_URL = "ws://localhost:8000/ws/versions";
+
+export function useVersionEvents() {
+  const qc = useQueryClient();
+  const { lastJsonMessage } = useWebSocket<VersionEvents | null>(SOCKET_URL, {
+    shouldReconnect: (_closeEvent) => true,
+  });
+
+  useEffect(() => {
+    if (!lastJsonMessage) return;
+    for (const event of lastJsonMessage.events) {
+      if (event.kind === "patent_created") {
+        qc.invalidateQueries({ queryKey: ["patents"] });
+      }
+      // Our own saves are already in the cache
+      const latest = qc.getQueryData<Document | null>(["latestDocumentByPatent", event.patent_id]);
+      if (latest && latest.id === event.document_id && latest.revision >= event.revision) continue;
+
+      qc.invalidateQueries({ queryKey: ["latestDocumentByPatent", event.patent_id] });
+      qc.invalidateQueries({ queryKey: ["allDocumentsByPatent", event.patent_id] });
+    }
+  }, [lastJsonMessage, qc]);
+}
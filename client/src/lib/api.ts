@@ -1,8 +1,9 @@
 // api.ts - Pure API functions
 import axios from "axios";
-import type { PatentEntity, Document } from "./types";
+import type { PatentEntity, Document, DocumentPage, DocumentRevision, TextEdit } from "./types";
 
 const BACKEND_URL = "http://localhost:8000";
+const STALE_SAVE_MESSAGE = "This document was saved elsewhere since you opened it. Reload it before saving again.";
 
 // API functions
 export const fetchPatents = async (): Promise<PatentEntity[]> => {
@@ -18,11 +19,16 @@ export const fetchLatestDocumentByPatent = async (patentId: number): Promise<Doc
   return data;
 };
 
-export const fetchAllDocumentsByPatent = async (patentId: number): Promise<Document[]> => {
+export const fetchDocumentVersionsByPatent = async (
+  patentId: number,
+  cursor?: number | null
+): Promise<DocumentPage> => {
   if (!patentId) {
     throw new Error('patentId is required');
   }
-  const { data } = await axios.get<Document[]>(`${BACKEND_URL}/patent_entity/${patentId}/documents`);
+  const { data } = await axios.get<DocumentPage>(`${BACKEND_URL}/patent_entity/${patentId}/documents/versions`, {
+    params: cursor ? { cursor } : {},
+  });
   return data;
 };
 
@@ -32,8 +38,32 @@ export const fetchDocument = async (documentNumber: number): Promise<Document> =
 };
 
 export const saveDocument = async (payload: Document): Promise<Document> => {
-  const { data } = await axios.post<Document>(`${BACKEND_URL}/document/${payload.id}/save`, payload);
-  return data; 
+  try {
+    const { data } = await axios.post<Document>(`${BACKEND_URL}/document/${payload.id}/save`, payload);
+    return data;
+  } catch (error) {
+    if (axios.isAxiosError(error) && error.response?.status === 409) {
+      throw new Error(STALE_SAVE_MESSAGE);
+    }
+    throw error;
+  }
+};
+
+// Sends only what changed since `revision`; rejected with 409 like a full save if the base is stale
+export const patchDocument = async (
+  documentId: number,
+  revision: number,
+  edits: TextEdit[]
+): Promise<DocumentRevision> => {
+  try {
+    const { data } = await axios.patch<DocumentRevision>(`${BACKEND_URL}/document/${documentId}`, { revision, edits });
+    return data;
+  } catch (error) {
+    if (axios.isAxiosError(error) && error.response?.status === 409) {
+      throw new Error(STALE_SAVE_MESSAGE);
+    }
+    throw error;
+  }
 };
 
 export const createNewDocumentVersion = async (patentId: number, content: string): Promise<Document> => {
@@ -15,6 +15,15 @@ export interface Suggestions {
 export interface SuggestionsResponse {
   suggestions: Suggestions;
   request_id: number;
+  // "partial" frames carry only newly found issues; "complete" carries all of them
+  status: "partial" | "complete";
+}
+
+// Sent while the request waits for a free AI slot on the server
+export interface QueueStatusResponse {
+  request_id: number;
+  status: "queued";
+  position: number;
 }
 
 export interface AIAnalysisState {
@@ -10,10 +10,47 @@ export interface Document {
   id: number;
   patent_entity_id: number;
   content: string;
+  revision: number; // Sent back on save; the server rejects it with 409 if someone saved since
   created_at: string; // ISO date string from backend
   updated_at: string; // ISO date string from backend
 }
 
+// Replaces content[start:end] of the base revision; offsets count code points, not UTF-16 units
+export interface TextEdit {
+  start: number;
+  end: number;
+  text: string;
+}
+
+// The result of a patch, without the body
+export interface DocumentRevision {
+  id: number;
+  revision: number;
+  content_hash: string;
+  updated_at: string;
+}
+
+// Pushed on /ws/versions when a patent's documents change; at most one per patent per frame
+export interface VersionEvent {
+  kind: "version_created" | "version_saved" | "patent_created";
+  patent_id: number;
+  document_id: number;
+  revision: number;
+}
+
+export interface VersionEvents {
+  events: VersionEvent[];
+}
+
+// A version without its content, as listed in the sidebar
+export type DocumentSummary = Omit<Document, "content" | "revision">;
+
+export interface DocumentPage {
+  items: DocumentSummary[]; // Newest first
+  total: number;
+  next_cursor: number | null; // Pass back as `cursor` for the next (older) page
+}
+
 // AI-related types
 export interface SuggestionIssue {
   type: string;
@@ -30,6 +67,15 @@ export interface Suggestions {
 export interface SuggestionsResponse {
   suggestions: Suggestions;
   request_id: number;
+  // "partial" frames carry only newly found issues; "complete" carries all of them
+  status: "partial" | "complete";
+}
+
+// Sent while the request waits for a free AI slot on the server
+export interface QueueStatusResponse {
+  request_id: number;
+  status: "queued";
+  position: number;
 }
 
 export interface AIAnalysisState {
@@ -1,5 +1,5 @@
 // utils/helper.ts - Utility helper functions
-import type { Document } from "../lib/types";
+import type { DocumentSummary, TextEdit } from "../lib/types";
 
 /**
  * Extracts title and body content from HTML string
@@ -39,19 +39,47 @@ export const extractTitleAndBody = (html: string): { title: string; body: string
 };
 
 /**
- * Gets the chronological number (1-based) for a document within a list of documents
+ * Gets the chronological number (1-based) for a document within a list of versions
  * @param documentId - The ID of the document to find
- * @param allDocuments - Array of all documents for the patent
+ * @param versions - Versions of the patent, newest first (possibly only the first pages)
+ * @param total - Number of versions the patent has, when the list is only partly loaded
  * @returns The chronological number (1, 2, 3...) or 0 if not found
  */
-export const getChronologicalNumber = (documentId: number, allDocuments: Document[] | null): number => {
-  if (!allDocuments) return 0;
-  
-  // Sort documents by created_at to get chronological order
-  const sortedDocuments = [...allDocuments].sort((a, b) => 
-    new Date(a.created_at).getTime() - new Date(b.created_at).getTime()
-  );
-  
-  const index = sortedDocuments.findIndex(doc => doc.id === documentId);
-  return index + 1; // 1-based numbering
-}; 
\ No newline at end of file
+export const getChronologicalNumber = (
+  documentId: number,
+  versions: DocumentSummary[] | null,
+  total?: number
+): number => {
+  if (!versions) return 0;
+
+  // Versions are newest first, so count back from the total
+  const index = versions.findIndex(doc => doc.id === documentId);
+  if (index === -1) return 0;
+  return (total ?? versions.length) - index;
+};
+
+
+/**
+ * Describes `content` as edits against `base`: the span between their common
+ * prefix and suffix, replaced. Offsets count code points, as the server does.
+ * @param base - The content as last saved
+ * @param content - The edited content
+ * @returns No edits if they're the same, otherwise a single edit
+ */
+export const getTextEdits = (base: string, content: string): TextEdit[] => {
+  if (base === content) return [];
+  const from = Array.from(base);
+  const to = Array.from(content);
+
+  let prefix = 0;
+  const limit = Math.min(from.length, to.length);
+  while (prefix < limit && from[prefix] === to[prefix]) prefix++;
+  let suffix = 0;
+  while (suffix < limit - prefix && from[from.length - 1 - suffix] === to[to.length - 1 - suffix]) suffix++;
+
+  return [{
+    start: prefix,
+    end: from.length - suffix,
+    text: to.slice(prefix, to.length - suffix).join(""),
+  }];
+};
@@ -1,27 +1,62 @@
+import asyncio
+import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import insert
+from sqlalchemy import insert, select
 from datetime import datetime, timezone
 
+from app.internal.ai_client import AI_WARMUP_CONNECTIONS, shared_ai
+from app.internal.autosave import autosave
 from app.internal.data import DOCUMENT_1, DOCUMENT_2
-from app.internal.db import Base, SessionLocal, engine
+from app.internal.db import DB_ASYNC, AsyncSessionLocal, Base, SessionLocal, async_engine, engine
 
 import app.models as models
 
-from app.controllers import patent_entity_controller, document_controller, websocket_controller
+from app.controllers import patent_entity_controller, document_controller, events_controller, websocket_controller
+
+if DB_ASYNC:
+    from app.controllers import async_document_controller as document_controller
+    from app.controllers import async_patent_entity_controller as patent_entity_controller
+
+
+def seed(db):
+    if db.scalar(select(models.PatentEntity.id).limit(1)) is not None:
+        return  # A persistent DATABASE_URL that was seeded on an earlier run
+    db.execute(insert(models.PatentEntity).values(id=1, name="Wireless optogenetic device for remotely controlling neural activitiies"))
+    db.execute(insert(models.PatentEntity).values(id=2, name="Microfluidic Device for Blood Oxygenation"))
+    # Documents go through the ORM so their content is stored as snapshots/deltas
+    db.add(models.Document(id=1, patent_entity_id=1, content=DOCUMENT_1, created_at=datetime.now(timezone.utc), updated_at=datetime.now(timezone.utc)))
+    db.add(models.Document(id=2, patent_entity_id=2, content=DOCUMENT_2, created_at=datetime.now(timezone.utc), updated_at=datetime.now(timezone.utc)))
+    db.commit()
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
-    Base.metadata.create_all(bind=engine)
-    with SessionLocal() as db:
-        db.execute(insert(models.PatentEntity).values(id=1, name="Wireless optogenetic device for remotely controlling neural activitiies"))
-        db.execute(insert(models.PatentEntity).values(id=2, name="Microfluidic Device for Blood Oxygenation"))
-        db.execute(insert(models.Document).values(id=1, patent_entity_id=1, content=DOCUMENT_1, created_at=datetime.now(timezone.utc), updated_at=datetime.now(timezone.utc)))
-        db.execute(insert(models.Document).values(id=2, patent_entity_id=2, content=DOCUMENT_2, created_at=datetime.now(timezone.utc), updated_at=datetime.now(timezone.utc)))
-        db.commit()
+    if DB_ASYNC:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(models.build_search_index)
+            await db.run_sync(seed)
+    else:
+        Base.metadata.create_all(bind=engine)
+        with SessionLocal() as db:
+            models.build_search_index(db)
+            seed(db)
+
+    if AI_WARMUP_CONNECTIONS:
+        await shared_ai.warm()
+
+    # Buffered saves are flushed periodically, and once more on shutdown
+    flusher = asyncio.create_task(autosave.run()) if autosave is not None else None
     yield
+    if flusher is not None:
+        flusher.cancel()
+        await asyncio.gather(flusher, return_exceptions=True)
+    await shared_ai.aclose()
+    if DB_ASYNC:
+        await async_engine.dispose()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -36,3 +71,10 @@ app.add_middleware(
 app.include_router(patent_entity_controller.router)
 app.include_router(document_controller.router)
 app.include_router(websocket_controller.router)
+app.include_router(events_controller.router)
+
+# Local, network-free AI backend for development and load testing
+if os.getenv("AI_BACKEND") == "fake":
+    from app.internal.fake_ai import get_fake_ai
+
+    app.dependency_overrides[websocket_controller.get_ai_lazily] = get_fake_ai
@@ -0,0 +1,250 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+from datetime import datetime, timezone
+
+from app.controllers.document_controller import buffered, stale_revision
+from app.internal.autosave import StaleRevision, autosave
+from app.internal.blobs import blob_store, content_hash
+from app.internal.db import get_async_db, to_schema, to_schemas
+from app.internal.etags import document_etag, etag_matches, not_modified, set_etag
+from app.internal.search import COUNT_SQL, SEARCH_SQL, has_search_index, search_page, search_params
+from app.internal.events import version_events
+from app.internal.streaming import astream_json_array
+from app.internal.text_edits import apply_edits
+import app.models as models
+import app.schemas as schemas
+
+# Same routes as document_controller, served on the event loop instead of the threadpool
+router = APIRouter(prefix="/document", tags=["document"])
+
+
+@router.get("/", response_model=List[schemas.DocumentRead])
+async def get_all_documents(
+    stream: bool = Query(False, description="Stream the array in batches instead of building it in memory"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get all documents"""
+    stmt = select(models.Document).order_by(models.Document.id.desc())
+    if stream:
+        return astream_json_array(db, stmt, schemas.DocumentRead, models.load_contents)
+    docs = (await db.scalars(stmt)).all()
+    await db.run_sync(models.load_contents, docs)
+    return await to_schemas(db, schemas.DocumentRead, docs)
+
+
+@router.get("/search", response_model=schemas.SearchPage)
+async def search_documents(
+    q: str = Query(..., pattern=r"\S", description="Words every matching version contains"),
+    patent_id: Optional[int] = Query(None, description="Only search this patent's versions"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Search the text of every version, best matches first"""
+    if not await db.run_sync(lambda session: has_search_index(session.connection())):
+        raise HTTPException(status_code=501, detail="Full-text search needs an SQLite database")
+    params = search_params(q, patent_id, limit + 1, offset)  # One extra row tells us whether there's another page
+    rows = (await db.execute(SEARCH_SQL, params)).all()
+    total = await db.scalar(COUNT_SQL, params)
+    return search_page(rows, total, limit, offset)
+
+
+@router.get("/{document_id}", response_model=schemas.DocumentRead)
+async def get_document(document_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """Get a specific document by ID"""
+    # Check the ETag from the version's columns before touching its content
+    version = (await db.execute(
+        select(
+            models.Document.id,
+            models.Document.patent_entity_id,
+            models.Document.updated_at,
+            models.Document.content_hash,
+        ).where(models.Document.id == document_id)
+    )).first()
+    if version is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    pending = buffered(document_id)
+    etag = document_etag(pending or version)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return not_modified(etag)
+
+    doc = pending or await db.get(models.Document, document_id)
+    set_etag(response, etag)
+    return await to_schema(db, schemas.DocumentRead, doc)
+
+
+@router.get("/{document_id}/content", response_class=Response)
+async def get_document_content(document_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get the raw body of a document, memory-mapped from the blob store when it is a snapshot"""
+    doc = await db.get(models.Document, document_id)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    pending = buffered(document_id)
+    if pending is not None:
+        return Response(pending.content, media_type="text/html; charset=utf-8")
+    if doc.snapshot_hash is not None and blob_store is not None:
+        return StreamingResponse(blob_store.iter_bytes(doc.snapshot_hash), media_type="text/html; charset=utf-8")
+    content = await db.run_sync(lambda _: doc.content)
+    return Response(content, media_type="text/html; charset=utf-8")
+
+
+@router.post("/", response_model=schemas.DocumentRead)
+async def create_document(
+    document: schemas.DocumentBase,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create a new document"""
+    # Verify the patent entity exists
+    entity = await db.get(models.PatentEntity, document.patent_entity_id)
+    if entity is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"PatentEntity with id {document.patent_entity_id} does not exist"
+        )
+
+    new_document = models.Document(
+        content=document.content,
+        patent_entity_id=document.patent_entity_id
+    )
+    db.add(new_document)
+    await db.commit()
+    await db.refresh(new_document)
+    version_events.publish("version_created", new_document.patent_entity_id, new_document.id, new_document.revision)
+    return await to_schema(db, schemas.DocumentRead, new_document)
+
+
+@router.post("/patent/{patent_id}/new-version", response_model=schemas.DocumentRead)
+async def create_new_document_version(
+    patent_id: int,
+    document: schemas.DocumentBase,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create a new document version for a specific patent"""
+    # Verify the patent entity exists
+    entity = await db.get(models.PatentEntity, patent_id)
+    if entity is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"PatentEntity with id {patent_id} does not exist"
+        )
+
+    # Create new document with the provided content
+    new_document = models.Document(
+        content=document.content,
+        patent_entity_id=patent_id
+    )
+    db.add(new_document)
+    await db.commit()
+    await db.refresh(new_document)
+    version_events.publish("version_created", patent_id, new_document.id, new_document.revision)
+    return await to_schema(db, schemas.DocumentRead, new_document)
+
+
+@router.post("/{document_id}/save", response_model=schemas.DocumentRead)
+async def save_document(
+    document_id: int,
+    document: schemas.DocumentSave,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Save/update a document. Saving over a newer revision than the one sent is a 409."""
+    existing_doc = await db.get(models.Document, document_id)
+    if existing_doc is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    current = buffered(document_id) or existing_doc
+    if document.revision is not None and document.revision != current.revision:
+        raise stale_revision(document.revision, current.revision)
+
+    # The patent only needs checking when the save moves the document to another one
+    if document.patent_entity_id != current.patent_entity_id:
+        entity = await db.get(models.PatentEntity, document.patent_entity_id)
+        if entity is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"PatentEntity with id {document.patent_entity_id} does not exist"
+            )
+    elif current.content_hash == content_hash(document.content):
+        return await to_schema(db, schemas.DocumentRead, current)  # Unchanged re-save; skip the write
+
+    return await save_revision(
+        db, existing_doc, document.content, document.patent_entity_id, schemas.DocumentRead, document.revision
+    )
+
+
+@router.patch("/{document_id}", response_model=schemas.DocumentRevision)
+async def patch_document(
+    document_id: int,
+    patch: schemas.DocumentPatch,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Apply text edits made against a revision of a document. A stale revision is a 409."""
+    existing_doc = await db.get(models.Document, document_id)
+    if existing_doc is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    current = buffered(document_id) or existing_doc
+    if patch.revision != current.revision:
+        raise stale_revision(patch.revision, current.revision)
+    try:
+        content = apply_edits(await db.run_sync(lambda _: current.content), patch.edits)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if current.content_hash == content_hash(content):
+        return schemas.DocumentRevision.model_validate(current, from_attributes=True)
+    return await save_revision(db, existing_doc, content, current.patent_entity_id, schemas.DocumentRevision, patch.revision)
+
+
+async def save_revision(
+    db: AsyncSession,
+    doc: models.Document,
+    content: str,
+    patent_entity_id: int,
+    schema: type[BaseModel],
+    revision: int | None = None,
+):
+    """
+    Write `content` as the next revision of `doc`, or raise a 409 if another
+    save got there first. `revision`, when given, is the one the save was
+    based on.
+    """
+    if autosave is not None:
+        try:
+            pending = autosave.put(doc, content, patent_entity_id, revision)
+        except StaleRevision as e:  # Checked again under the buffer's lock, where saves are ordered
+            raise stale_revision(e.revision, e.current)
+        saved = schema.model_validate(pending, from_attributes=True)
+        version_events.publish("version_saved", patent_entity_id, saved.id, saved.revision)
+        return saved
+
+    # Set through the ORM so the content is re-encoded as a delta against the previous version
+    revision = doc.revision
+    doc.content = content
+    doc.patent_entity_id = patent_entity_id
+    doc.updated_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    doc.revision = revision + 1
+    try:
+        await db.flush()  # UPDATE ... WHERE id = :id AND revision = :revision
+    except StaleDataError:
+        await db.rollback()
+        raise stale_revision(revision, None)
+    saved = await to_schema(db, schema, doc)
+    await db.commit()
+    version_events.publish("version_saved", patent_entity_id, saved.id, saved.revision)
+    return saved
+
+
+@router.delete("/{document_id}")
+async def delete_document(document_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Delete a document"""
+    doc = await db.scalar(select(models.Document).where(models.Document.id == document_id))
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    if autosave is not None:
+        autosave.discard(document_id)
+    await db.delete(doc)
+    await db.commit()
+    return {"message": "Document deleted successfully"}
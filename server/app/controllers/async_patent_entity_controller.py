@@ -0,0 +1,186 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.controllers.document_controller import buffered
+from app.internal.bulk import aimport_ndjson, astream_ndjson
+from app.internal.db import get_async_db, to_schema, to_schemas
+from app.internal.etags import document_etag, etag_matches, make_etag, not_modified, set_etag
+from app.internal.events import version_events
+from app.internal.streaming import astream_json_array
+import app.models as models
+import app.schemas as schemas
+
+# Same routes as patent_entity_controller, served on the event loop instead of the threadpool
+router = APIRouter(prefix="/patent_entity", tags=["patent_entity"])
+
+
+@router.get("/list", response_model=List[schemas.PatentEntityRead])
+async def get_patent_entity_list(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """Get all patent entities"""
+    stmt = select(models.PatentEntity)
+    result = await db.execute(stmt)
+    items = result.scalars().all()
+    etag = make_etag(*((item.id, item.name) for item in items))
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return items
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_patent_entities(db: AsyncSession = Depends(get_async_db)):
+    """Stream every patent and all of its versions as NDJSON, in the format /import reads"""
+    return astream_ndjson(db)
+
+
+@router.post("/import", response_model=schemas.ImportResult)
+async def import_patent_entities(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Import NDJSON patent and version lines, as written by /export, in chunked transactions"""
+    try:
+        importer = await aimport_ndjson(db, request.stream())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IntegrityError:
+        # Chunks committed before the conflicting one stay imported
+        raise HTTPException(status_code=409, detail="Import conflicted with a concurrent change, retry it")
+    for kind, patent_id, document_id, revision in importer.events():
+        version_events.publish(kind, patent_id, document_id, revision)
+    return {"patents": importer.patents, "documents": importer.documents}
+
+
+@router.get("/{patent_id}", response_model=schemas.PatentEntityRead)
+async def get_patent_entity(patent_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get a specific patent entity by ID"""
+    patent = await db.scalar(select(models.PatentEntity).where(models.PatentEntity.id == patent_id))
+    if patent is None:
+        raise HTTPException(status_code=404, detail="Patent entity not found")
+    return patent
+
+
+@router.get("/{patent_id}/documents/first", response_model=Optional[schemas.DocumentRead])
+async def get_first_document_for_patent(
+    patent_id: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the first document for a given patent entity"""
+    stmt = (
+        select(models.Document)
+        .where(models.Document.patent_entity_id == patent_id)
+        .order_by(models.Document.id.asc())
+        .limit(1)
+    )
+    doc = (await db.scalars(stmt)).first()
+    if doc is None:
+        return None
+    return await to_schema(db, schemas.DocumentRead, doc)
+
+
+@router.get("/{patent_id}/documents/latest", response_model=Optional[schemas.DocumentRead])
+async def get_latest_document_for_patent(
+    patent_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the latest document for a given patent entity"""
+    # Check the ETag from the version's columns before touching its content
+    stmt = (
+        select(
+            models.Document.id,
+            models.Document.patent_entity_id,
+            models.Document.updated_at,
+            models.Document.content_hash,
+        )
+        .where(models.Document.patent_entity_id == patent_id)
+        .order_by(models.Document.id.desc())
+        .limit(1)
+    )
+    version = (await db.execute(stmt)).first()
+    if version is None:
+        return None
+    pending = buffered(version.id)
+    etag = document_etag(pending or version)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return not_modified(etag)
+
+    doc = pending or await db.get(models.Document, version.id)
+    set_etag(response, etag)
+    return await to_schema(db, schemas.DocumentRead, doc)
+
+
+@router.get("/{patent_id}/documents", response_model=List[schemas.DocumentRead])
+async def get_all_documents_for_patent(
+    patent_id: int,
+    stream: bool = Query(False, description="Stream the array in batches instead of building it in memory"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get all documents for a given patent entity"""
+    stmt = (
+        select(models.Document)
+        .where(models.Document.patent_entity_id == patent_id)
+        .order_by(models.Document.id.desc())
+    )
+    if stream:
+        return astream_json_array(db, stmt, schemas.DocumentRead, models.load_contents)
+    docs = (await db.scalars(stmt)).all()
+    await db.run_sync(models.load_contents, docs)
+    return await to_schemas(db, schemas.DocumentRead, docs)
+
+
+@router.get("/{patent_id}/documents/versions", response_model=schemas.DocumentPage)
+async def get_document_versions_for_patent(
+    patent_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[int] = Query(None, description="Return versions older than this document id"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a page of a patent's versions, newest first, without their content"""
+    stmt = (
+        select(
+            models.Document.id,
+            models.Document.patent_entity_id,
+            models.Document.created_at,
+            models.Document.updated_at,
+        )
+        .where(models.Document.patent_entity_id == patent_id)
+        .order_by(models.Document.id.desc())
+        .limit(limit + 1)  # One extra row tells us whether there's another page
+    )
+    if cursor is not None:
+        stmt = stmt.where(models.Document.id < cursor)
+    rows = (await db.execute(stmt)).all()
+    items = rows[:limit]
+    total = await db.scalar(select(func.count()).where(models.Document.patent_entity_id == patent_id))
+    return {
+        "items": items,
+        "total": total,
+        "next_cursor": items[-1].id if len(rows) > limit else None,
+    }
+
+
+@router.post("/", response_model=schemas.EntityWithDocument)
+async def create_patent_entity(
+    patent_entity: schemas.PatentEntityBase,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create a new PatentEntity in the database"""
+    new_entity = models.PatentEntity(name=patent_entity.name)
+
+    db.add(new_entity)
+    await db.flush()
+    # Create blank document associated with the new patent entity
+    new_document = models.Document(patent_entity_id=new_entity.id, content="Placeholder content")
+    db.add(new_document)
+    await db.commit()
+    await db.refresh(new_entity)
+    await db.refresh(new_document)
+    version_events.publish("patent_created", new_entity.id, new_document.id, new_document.revision)
+
+    return {
+        "entity": new_entity,
+        "document": await to_schema(db, schemas.DocumentRead, new_document),
+    }
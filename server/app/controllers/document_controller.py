@@ -1,10 +1,20 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 from sqlalchemy import select, update, insert
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 from datetime import datetime, timezone
 
+from app.internal.autosave import PendingSave, StaleRevision, autosave
+from app.internal.blobs import blob_store, content_hash
 from app.internal.db import get_db
+from app.internal.etags import document_etag, etag_matches, not_modified, set_etag
+from app.internal.search import COUNT_SQL, SEARCH_SQL, has_search_index, search_page, search_params
+from app.internal.events import version_events
+from app.internal.streaming import stream_json_array
+from app.internal.text_edits import apply_edits
 import app.models as models
 import app.schemas as schemas
 
@@ -12,22 +22,74 @@ router = APIRouter(prefix="/document", tags=["document"])
 
 
 @router.get("/", response_model=List[schemas.DocumentRead])
-def get_all_documents(db: Session = Depends(get_db)):
+def get_all_documents(
+    stream: bool = Query(False, description="Stream the array in batches instead of building it in memory"),
+    db: Session = Depends(get_db)
+):
     """Get all documents"""
     stmt = select(models.Document).order_by(models.Document.id.desc())
+    if stream:
+        return stream_json_array(db, stmt, schemas.DocumentRead, models.load_contents)
     docs = db.scalars(stmt).all()
+    models.load_contents(db, docs)
     return docs
 
 
+@router.get("/search", response_model=schemas.SearchPage)
+def search_documents(
+    q: str = Query(..., pattern=r"\S", description="Words every matching version contains"),
+    patent_id: Optional[int] = Query(None, description="Only search this patent's versions"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """Search the text of every version, best matches first"""
+    if not has_search_index(db.connection()):
+        raise HTTPException(status_code=501, detail="Full-text search needs an SQLite database")
+    params = search_params(q, patent_id, limit + 1, offset)  # One extra row tells us whether there's another page
+    rows = db.execute(SEARCH_SQL, params).all()
+    total = db.scalar(COUNT_SQL, params)
+    return search_page(rows, total, limit, offset)
+
+
 @router.get("/{document_id}", response_model=schemas.DocumentRead)
-def get_document(document_id: int, db: Session = Depends(get_db)):
+def get_document(document_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     """Get a specific document by ID"""
-    doc = db.scalar(select(models.Document).where(models.Document.id == document_id))
-    if doc is None:
+    # Check the ETag from the version's columns before touching its content
+    version = db.execute(
+        select(
+            models.Document.id,
+            models.Document.patent_entity_id,
+            models.Document.updated_at,
+            models.Document.content_hash,
+        ).where(models.Document.id == document_id)
+    ).first()
+    if version is None:
         raise HTTPException(status_code=404, detail="Document not found")
+    pending = buffered(document_id)
+    etag = document_etag(pending or version)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return not_modified(etag)
+
+    doc = pending or db.get(models.Document, document_id)
+    set_etag(response, etag)
     return doc
 
 
+@router.get("/{document_id}/content", response_class=Response)
+def get_document_content(document_id: int, db: Session = Depends(get_db)):
+    """Get the raw body of a document, memory-mapped from the blob store when it is a snapshot"""
+    doc = db.get(models.Document, document_id)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    pending = buffered(document_id)
+    if pending is not None:
+        return Response(pending.content, media_type="text/html; charset=utf-8")
+    if doc.snapshot_hash is not None and blob_store is not None:
+        return StreamingResponse(blob_store.iter_bytes(doc.snapshot_hash), media_type="text/html; charset=utf-8")
+    return Response(doc.content, media_type="text/html; charset=utf-8")
+
+
 @router.post("/", response_model=schemas.DocumentRead)
 def create_document(
     document: schemas.DocumentBase,
@@ -49,6 +111,7 @@ def create_document(
     db.add(new_document)
     db.commit()
     db.refresh(new_document)
+    version_events.publish("version_created", new_document.patent_entity_id, new_document.id, new_document.revision)
     return new_document
 
 
@@ -75,40 +138,113 @@ def create_new_document_version(
     db.add(new_document)
     db.commit()
     db.refresh(new_document)
+    version_events.publish("version_created", patent_id, new_document.id, new_document.revision)
     return new_document
 
 
-@router.post("/{document_id}/save")
+@router.post("/{document_id}/save", response_model=schemas.DocumentRead)
 def save_document(
     document_id: int, 
-    document: schemas.DocumentBase,
+    document: schemas.DocumentSave,
     db: Session = Depends(get_db)
 ):
-    """Save/update a document"""
-    # Check if document exists
-    existing_doc = db.scalar(select(models.Document).where(models.Document.id == document_id))
+    """Save/update a document. Saving over a newer revision than the one sent is a 409."""
+    existing_doc = db.get(models.Document, document_id)
     if existing_doc is None:
         raise HTTPException(status_code=404, detail="Document not found")
-    
-    entity = db.get(models.PatentEntity, document.patent_entity_id)
-    if entity is None:
-        raise HTTPException(
-            status_code=400,
-            detail=f"PatentEntity with id {document.patent_entity_id} does not exist"
-        )
+    current = buffered(document_id) or existing_doc
+    if document.revision is not None and document.revision != current.revision:
+        raise stale_revision(document.revision, current.revision)
 
-    db.execute(
-        update(models.Document)
-        .where(models.Document.id == document_id)
-        .values(
-            content=document.content, 
-            patent_entity_id=document.patent_entity_id,
-            updated_at=datetime.now(timezone.utc)
-        )
+    # The patent only needs checking when the save moves the document to another one
+    if document.patent_entity_id != current.patent_entity_id:
+        entity = db.get(models.PatentEntity, document.patent_entity_id)
+        if entity is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"PatentEntity with id {document.patent_entity_id} does not exist"
+            )
+    elif current.content_hash == content_hash(document.content):
+        return current  # Unchanged re-save; skip the write
+
+    return save_revision(
+        db, existing_doc, document.content, document.patent_entity_id, schemas.DocumentRead, document.revision
     )
+
+
+@router.patch("/{document_id}", response_model=schemas.DocumentRevision)
+def patch_document(
+    document_id: int,
+    patch: schemas.DocumentPatch,
+    db: Session = Depends(get_db)
+):
+    """Apply text edits made against a revision of a document. A stale revision is a 409."""
+    existing_doc = db.get(models.Document, document_id)
+    if existing_doc is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    current = buffered(document_id) or existing_doc
+    if patch.revision != current.revision:
+        raise stale_revision(patch.revision, current.revision)
+    try:
+        content = apply_edits(current.content, patch.edits)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if current.content_hash == content_hash(content):
+        return current
+    return save_revision(db, existing_doc, content, current.patent_entity_id, schemas.DocumentRevision, patch.revision)
+
+
+def save_revision(
+    db: Session,
+    doc: models.Document,
+    content: str,
+    patent_entity_id: int,
+    schema: type[BaseModel],
+    revision: int | None = None,
+):
+    """
+    Write `content` as the next revision of `doc`, or raise a 409 if another
+    save got there first. `revision`, when given, is the one the save was
+    based on.
+    """
+    if autosave is not None:
+        try:
+            pending = autosave.put(doc, content, patent_entity_id, revision)
+        except StaleRevision as e:  # Checked again under the buffer's lock, where saves are ordered
+            raise stale_revision(e.revision, e.current)
+        saved = schema.model_validate(pending, from_attributes=True)
+        version_events.publish("version_saved", patent_entity_id, saved.id, saved.revision)
+        return saved
+
+    # Set through the ORM so the content is re-encoded as a delta against the previous version
+    revision = doc.revision
+    doc.content = content
+    doc.patent_entity_id = patent_entity_id
+    # Naive, as the DateTime column reads back, so this response matches later reads (and their ETags)
+    doc.updated_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    doc.revision = revision + 1
+    try:
+        db.flush()  # UPDATE ... WHERE id = :id AND revision = :revision
+    except StaleDataError:
+        db.rollback()  # Another save committed since we read the document
+        raise stale_revision(revision, None)
+    # Serialized before the commit expires it, which would cost a reselect
+    saved = schema.model_validate(doc)
     db.commit()
-    updated = db.scalar(select(models.Document).where(models.Document.id == document_id))
-    return updated
+    version_events.publish("version_saved", patent_entity_id, saved.id, saved.revision)
+    return saved
+
+
+def buffered(document_id: int) -> PendingSave | None:
+    """The document's latest save if it hasn't been written yet, so reads see it."""
+    return autosave.get(document_id) if autosave is not None else None
+
+
+def stale_revision(revision: int, current: int | None) -> HTTPException:
+    detail = f"Document has changed since revision {revision}"
+    if current is not None:
+        detail += f"; it is now at revision {current}"
+    return HTTPException(status_code=409, detail=detail)
 
 
 @router.delete("/{document_id}")
@@ -118,6 +254,8 @@ def delete_document(document_id: int, db: Session = Depends(get_db)):
     if doc is None:
         raise HTTPException(status_code=404, detail="Document not found")
     
+    if autosave is not None:
+        autosave.discard(document_id)
     db.delete(doc)
     db.commit()
     return {"message": "Document deleted successfully"} 
\ No newline at end of file
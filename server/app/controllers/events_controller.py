@@ -0,0 +1,50 @@
+import asyncio
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+
+from app.internal.events import version_events
+import app.schemas as schemas
+
+router = APIRouter(tags=["events"])
+
+
+@router.websocket("/ws/versions")
+async def version_events_socket(websocket: WebSocket):
+    """
+    Push document version changes, so clients don't poll for the latest version.
+
+    Follows the patents given as `patent_id` query parameters (every patent
+    if there are none); a value that isn't an id closes the socket with 1008.
+    Sending a VersionSubscription replaces them. Each frame is a VersionEvents
+    batch with the latest change per patent.
+    """
+    try:
+        patent_ids = schemas.VersionSubscription.model_validate(
+            {"patent_ids": websocket.query_params.getlist("patent_id") or None}
+        ).patent_ids
+    except ValueError:
+        await websocket.accept()  # Close codes can only be sent once accepted
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="patent_id must be an integer")
+        return
+    subscription = version_events.subscribe(patent_ids)  # Before accepting, so no event is missed
+
+    async def push():
+        async for events in subscription.batches():
+            await websocket.send_json(schemas.VersionEvents(events=events).model_dump())
+
+    pusher = None
+    try:
+        await websocket.accept()
+        pusher = asyncio.create_task(push())
+        while True:
+            try:
+                message = await websocket.receive_text()
+                subscription.follow(schemas.VersionSubscription.model_validate_json(message).patent_ids)
+            except WebSocketDisconnect:
+                break
+            except ValueError as e:
+                print(f"Error occurred: {e}")
+    finally:
+        subscription.close()
+        if pusher is not None:
+            pusher.cancel()
+            await asyncio.gather(pusher, return_exceptions=True)
@@ -1,9 +1,16 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import insert, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.controllers.document_controller import buffered
+from app.internal.bulk import import_ndjson, stream_ndjson
 from app.internal.db import get_db
+from app.internal.etags import document_etag, etag_matches, make_etag, not_modified, set_etag
+from app.internal.events import version_events
+from app.internal.streaming import stream_json_array
 import app.models as models
 import app.schemas as schemas
 
@@ -11,14 +18,39 @@ router = APIRouter(prefix="/patent_entity", tags=["patent_entity"])
 
 
 @router.get("/list", response_model=List[schemas.PatentEntityRead])
-def get_patent_entity_list(db: Session = Depends(get_db)):
+def get_patent_entity_list(request: Request, response: Response, db: Session = Depends(get_db)):
     """Get all patent entities"""
     stmt = select(models.PatentEntity)
     result = db.execute(stmt)
     items = result.scalars().all()
+    etag = make_etag(*((item.id, item.name) for item in items))
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return items
 
 
+@router.get("/export", response_class=StreamingResponse)
+def export_patent_entities(db: Session = Depends(get_db)):
+    """Stream every patent and all of its versions as NDJSON, in the format /import reads"""
+    return stream_ndjson(db)
+
+
+@router.post("/import", response_model=schemas.ImportResult)
+async def import_patent_entities(request: Request, db: Session = Depends(get_db)):
+    """Import NDJSON patent and version lines, as written by /export, in chunked transactions"""
+    try:
+        importer = await import_ndjson(db, request.stream())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IntegrityError:
+        # Chunks committed before the conflicting one stay imported
+        raise HTTPException(status_code=409, detail="Import conflicted with a concurrent change, retry it")
+    for kind, patent_id, document_id, revision in importer.events():
+        version_events.publish(kind, patent_id, document_id, revision)
+    return {"patents": importer.patents, "documents": importer.documents}
+
+
 @router.get("/{patent_id}", response_model=schemas.PatentEntityRead)
 def get_patent_entity(patent_id: int, db: Session = Depends(get_db)):
     """Get a specific patent entity by ID"""
@@ -47,22 +79,40 @@ def get_first_document_for_patent(
 @router.get("/{patent_id}/documents/latest", response_model=Optional[schemas.DocumentRead])
 def get_latest_document_for_patent(
     patent_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """Get the latest document for a given patent entity"""
+    # Check the ETag from the version's columns before touching its content
     stmt = (
-        select(models.Document)
+        select(
+            models.Document.id,
+            models.Document.patent_entity_id,
+            models.Document.updated_at,
+            models.Document.content_hash,
+        )
         .where(models.Document.patent_entity_id == patent_id)
         .order_by(models.Document.id.desc())
         .limit(1)
     )
-    doc = db.scalars(stmt).first()
+    version = db.execute(stmt).first()
+    if version is None:
+        return None
+    pending = buffered(version.id)
+    etag = document_etag(pending or version)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return not_modified(etag)
+
+    doc = pending or db.get(models.Document, version.id)
+    set_etag(response, etag)
     return doc
 
 
 @router.get("/{patent_id}/documents", response_model=List[schemas.DocumentRead])
 def get_all_documents_for_patent(
     patent_id: int,
+    stream: bool = Query(False, description="Stream the array in batches instead of building it in memory"),
     db: Session = Depends(get_db)
 ):
     """Get all documents for a given patent entity"""
@@ -71,10 +121,44 @@ def get_all_documents_for_patent(
         .where(models.Document.patent_entity_id == patent_id)
         .order_by(models.Document.id.desc())
     )
+    if stream:
+        return stream_json_array(db, stmt, schemas.DocumentRead, models.load_contents)
     docs = db.scalars(stmt).all()
+    models.load_contents(db, docs)
     return docs
 
 
+@router.get("/{patent_id}/documents/versions", response_model=schemas.DocumentPage)
+def get_document_versions_for_patent(
+    patent_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[int] = Query(None, description="Return versions older than this document id"),
+    db: Session = Depends(get_db)
+):
+    """Get a page of a patent's versions, newest first, without their content"""
+    stmt = (
+        select(
+            models.Document.id,
+            models.Document.patent_entity_id,
+            models.Document.created_at,
+            models.Document.updated_at,
+        )
+        .where(models.Document.patent_entity_id == patent_id)
+        .order_by(models.Document.id.desc())
+        .limit(limit + 1)  # One extra row tells us whether there's another page
+    )
+    if cursor is not None:
+        stmt = stmt.where(models.Document.id < cursor)
+    rows = db.execute(stmt).all()
+    items = rows[:limit]
+    total = db.scalar(select(func.count()).where(models.Document.patent_entity_id == patent_id))
+    return {
+        "items": items,
+        "total": total,
+        "next_cursor": items[-1].id if len(rows) > limit else None,
+    }
+
+
 @router.post("/", response_model=schemas.EntityWithDocument)
 def create_patent_entity(
     patent_entity: schemas.PatentEntityBase,
@@ -91,6 +175,7 @@ def create_patent_entity(
     db.commit()
     db.refresh(new_entity)
     db.refresh(new_document)
+    version_events.publish("patent_created", new_entity.id, new_document.id, new_document.revision)
 
     return {
         "entity": new_entity,
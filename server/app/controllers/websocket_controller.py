@@ -43,84 +43,211 @@
 #             continue 
 
 
-import re
+from __future__ import annotations
+
 import asyncio
-from contextlib import suppress
+from typing import TYPE_CHECKING, Awaitable, Callable, Hashable
 from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
 
 from sqlalchemy.orm import Session  # (unused here, but kept if you need it)
-from app.internal.ai import AI, get_ai
+from app.internal.ai_client import shared_ai
+from app.internal.cache import review_cache, review_key
+from app.internal.paragraphs import plan_review, split_paragraphs
+from app.internal.scheduler import PositionCallback, ai_scheduler
+from app.internal.singleflight import ai_flights
 from app.internal.db import get_db  # (unused here)
+from app.internal.stream_parser import IssueStreamParser
 import app.schemas as schemas
 
+if TYPE_CHECKING:
+    from app.internal.ai import AI
+
 router = APIRouter(tags=["websocket"])
 
 TIMEOUT_SECONDS = 10.0  # server-side cap per request
 
-async def collect_ai_review(document: str, ai: AI) -> str:
-    """Collect streaming AI review into a single JSON string."""
+IssuesCallback = Callable[[list[schemas.SuggestionIssue]], Awaitable[None]]
+
+
+def get_ai_lazily(websocket: WebSocket) -> AI:
+    """
+    The app's shared AI, created on first use: the OpenAI client is the
+    slowest import in the app and only /ws needs it. As a sync dependency,
+    that first import runs in the threadpool instead of blocking the event
+    loop. An override of `get_ai` in `app.dependency_overrides` is still used
+    in its place.
+    """
+    from app.internal.ai import get_ai
+
+    override = websocket.app.dependency_overrides.get(get_ai)
+    return override() if override is not None else shared_ai.get()
+
+
+async def collect_ai_review(
+    document: str,
+    ai: AI,
+    on_issues: IssuesCallback | None = None,
+    owner: Hashable = None,
+    on_position: PositionCallback | None = None,
+) -> str:
+    """
+    Collect streaming AI review into a single JSON string.
+
+    If `on_issues` is given, each issue is validated and passed to it as soon as
+    its object is closed in the stream, ahead of the rest of the review.
+    Concurrent requests for the same document, from any connection, share a
+    single model call, which waits for a slot from the AI scheduler under the
+    `owner` that started it; `on_position` is told the queue position while it
+    waits. A failing `on_position` only ends this request, not the shared call.
+    """
     chunks = []
-    async for chunk in ai.review_document(document):
-        if chunk is None:
-            break
+    parser = IssueStreamParser()
+    stream = ai_flights.stream(
+        review_key(document, ai.model),
+        lambda report: ai_scheduler.stream(lambda: ai.review_document(document), owner, report),
+        on_position,
+    )
+    async for chunk in stream:
         chunks.append(chunk)
+        if on_issues is None:
+            continue
+        for raw_issue in parser.feed(chunk):
+            try:
+                issue = schemas.SuggestionIssue.model_validate_json(raw_issue)
+            except ValueError:
+                continue  # Validation of the full review below reports it
+            await on_issues([issue])
     return "".join(chunks)
 
+async def review_content(
+    content: str,
+    ai: AI,
+    on_issues: IssuesCallback | None = None,
+    owner: Hashable = None,
+    on_position: PositionCallback | None = None,
+) -> schemas.Suggestions:
+    """
+    Review editor content paragraph by paragraph.
+
+    Only paragraphs whose fingerprint isn't cached (plus the claim preambles
+    they need as context) go to the model; everything else is merged back in
+    from the cache with its paragraph number remapped. When `on_issues` is
+    given, cached issues and then each newly generated one are reported
+    through it before the merged result is returned.
+    """
+    paragraphs = split_paragraphs(content)
+    # Identical content (debounced re-sends, undo/redo, reloads) is served from cache
+    cache_key = review_key("\n\n".join(p.text for p in paragraphs), ai.model)
+    suggestions = review_cache.get(cache_key)
+    if suggestions is not None:
+        return suggestions
+
+    plan = plan_review(paragraphs, ai.model, review_cache)
+    if plan.pending:
+        forward = None
+        if on_issues is not None:
+            if plan.cached_issues:
+                await on_issues(plan.cached_issues)
+
+            async def forward(issues: list[schemas.SuggestionIssue]):
+                remapped = [issue for issue in map(plan.remap, issues) if issue is not None]
+                if remapped:
+                    await on_issues(remapped)
+
+        ai_response = await collect_ai_review(plan.prompt, ai, forward, owner, on_position)
+        suggestions = plan.merge(schemas.Suggestions.model_validate_json(ai_response), review_cache)
+    else:
+        suggestions = schemas.Suggestions(issues=plan.cached_issues)
+    review_cache.put(cache_key, suggestions)
+    return suggestions
+
 @router.websocket("/ws")
-async def websocket(websocket: WebSocket, ai: AI = Depends(get_ai)):
-    """WebSocket endpoint for AI suggestions with server-side timeout & cancellation."""
+async def websocket(websocket: WebSocket, ai: AI = Depends(get_ai_lazily)):
+    """
+    WebSocket endpoint for AI suggestions with server-side timeout & cancellation.
+
+    The socket is read by one loop while each request runs in its own worker
+    task. Requests are multiplexed by `document_id`: a newer request for a
+    document cancels the in-flight review of that document, while reviews of
+    different documents run in parallel.
+    """
     await websocket.accept()
+    send_lock = asyncio.Lock()
+    in_flight: dict[int | None, tuple[int, asyncio.Task]] = {}
+
+    async def send(response: schemas.SuggestionsResponse | schemas.QueueStatusResponse):
+        async with send_lock:
+            await websocket.send_json(response.model_dump())
+
+    async def run(parsed_request: schemas.SuggestionsRequest):
+        async def send_partial(issues: list[schemas.SuggestionIssue]):
+            await send(schemas.SuggestionsResponse(
+                suggestions=schemas.Suggestions(issues=issues),
+                request_id=parsed_request.request_id,
+                status="partial",
+            ))
+
+        async def send_position(position: int):
+            # Backpressure: all AI slots are busy, let the client know where it stands
+            await send(schemas.QueueStatusResponse(
+                request_id=parsed_request.request_id,
+                position=position,
+            ))
+
+        # Start AI work as a cancellable task
+        ai_task = asyncio.create_task(
+            review_content(parsed_request.content, ai, send_partial, websocket, send_position)
+        )
+        try:
+            # Enforce the cap; cancelling this worker cancels ai_task too
+            suggestions = await asyncio.wait_for(ai_task, timeout=TIMEOUT_SECONDS)
+            await send(schemas.SuggestionsResponse(
+                suggestions=suggestions,
+                request_id=parsed_request.request_id,
+            ))
+
+        except asyncio.TimeoutError:
+            # Send a structured "timeout" suggestion (adjust to your schema/UX)
+            timeout_issue = schemas.SuggestionIssue(
+                type="Timeout",
+                severity="high",
+                paragraph=0,
+                description=f"Analysis exceeded {int(TIMEOUT_SECONDS)} seconds.",
+                suggestion="Try again, shorten the text, or make another edit.",
+            )
+            await send(schemas.SuggestionsResponse(
+                suggestions=schemas.Suggestions(issues=[timeout_issue]),
+                request_id=parsed_request.request_id,
+            ))
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            print(f"Error occurred: {e}")
+        finally:
+            if in_flight.get(parsed_request.document_id, (None, None))[1] is asyncio.current_task():
+                del in_flight[parsed_request.document_id]
+
     try:
         while True:
             try:
                 request_text = await websocket.receive_text()
                 parsed_request = schemas.SuggestionsRequest.parse_raw(request_text)
-
-                # Optional: strip any HTML tags from the editor (as you had)
-                html_text = re.sub(r"<[^>]*>", "", parsed_request.content)
-
-                # Start AI work as a cancellable task
-                ai_task = asyncio.create_task(collect_ai_review(html_text, ai))
-
-                try:
-                    # Enforce 5s cap
-                    ai_response = await asyncio.wait_for(ai_task, timeout=TIMEOUT_SECONDS)
-                    suggestions = schemas.Suggestions.model_validate_json(ai_response)
-
-                    await websocket.send_json(
-                        schemas.SuggestionsResponse(
-                            suggestions=suggestions,
-                            request_id=parsed_request.request_id,
-                        ).model_dump()
-                    )
-
-                except asyncio.TimeoutError:
-                    # Stop the work; avoid leaks
-                    ai_task.cancel()
-                    with suppress(asyncio.CancelledError):
-                        await ai_task
-
-                    # Send a structured "timeout" suggestion (adjust to your schema/UX)
-                    timeout_issue = schemas.SuggestionIssue(
-                        type="Timeout",
-                        severity="high",
-                        paragraph=0,
-                        description=f"Analysis exceeded {int(TIMEOUT_SECONDS)} seconds.",
-                        suggestion="Try again, shorten the text, or make another edit.",
-                    )
-                    await websocket.send_json(
-                        schemas.SuggestionsResponse(
-                            suggestions=schemas.Suggestions(issues=[timeout_issue]),
-                            request_id=parsed_request.request_id,
-                        ).model_dump()
-                    )
-
             except WebSocketDisconnect:
                 break
             except Exception as e:
                 # Log and continue loop; optionally send an error-shaped suggestion
                 print(f"Error occurred: {e}")
                 continue
+
+            channel = parsed_request.document_id
+            if channel in in_flight:
+                running_id, running = in_flight[channel]
+                if running_id >= parsed_request.request_id:
+                    continue  # Out-of-order resend of something older than what's running
+                running.cancel()
+            in_flight[channel] = (parsed_request.request_id, asyncio.create_task(run(parsed_request)))
     finally:
-        # Nothing special here; FastAPI will close the socket context
-        pass
+        workers = [task for _, task in in_flight.values()]
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from typing import TYPE_CHECKING
+
+from app.internal.scheduler import AI_MAX_CONCURRENCY
+
+if TYPE_CHECKING:
+    import httpx
+
+    from app.internal.ai import AI
+
+# The scheduler allows AI_MAX_CONCURRENCY model calls at once; the rest is headroom for retries
+AI_HTTP_MAX_CONNECTIONS = int(os.getenv("AI_HTTP_MAX_CONNECTIONS") or 2 * AI_MAX_CONCURRENCY)
+AI_HTTP_MAX_KEEPALIVE = int(os.getenv("AI_HTTP_MAX_KEEPALIVE") or AI_MAX_CONCURRENCY)
+AI_HTTP_KEEPALIVE_SECONDS = float(os.getenv("AI_HTTP_KEEPALIVE_SECONDS") or 120)
+AI_HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("AI_HTTP_CONNECT_TIMEOUT_SECONDS") or 5)
+# Connections opened to the API at startup, so the first reviews skip the TCP/TLS handshakes. 0 to
+# leave the client (and the OpenAI import) until the first /ws connection
+AI_WARMUP_CONNECTIONS = int(os.getenv("AI_WARMUP_CONNECTIONS") or 0)
+
+
+def create_http_client() -> httpx.AsyncClient:
+    import httpx  # Like the OpenAI client, kept off the startup path
+
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=AI_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=AI_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=AI_HTTP_KEEPALIVE_SECONDS,
+        ),
+        # Reads are bounded by the /ws request timeout, connecting shouldn't take long
+        timeout=httpx.Timeout(60.0, connect=AI_HTTP_CONNECT_TIMEOUT_SECONDS),
+    )
+
+
+class SharedAI:
+    """
+    One `AI` for the whole app instead of one per /ws connection.
+
+    Every connection then shares a single OpenAI client and its pool of
+    kept-alive HTTP connections, rather than building a client (and an SSL
+    context) and doing fresh TCP and TLS handshakes for each websocket. The
+    client is created on first use, so the OpenAI import stays off the startup
+    path unless warm-up is configured, and is closed by `aclose` on shutdown.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()  # First use is from the threadpool
+        self._ai: AI | None = None
+        self._http_client: httpx.AsyncClient | None = None
+
+    def get(self) -> AI:
+        with self._lock:
+            if self._ai is None:
+                from app.internal.ai import get_ai
+
+                ai = get_ai()
+                http_client = create_http_client()
+                ai._client = ai._client.with_options(http_client=http_client)
+                self._ai, self._http_client = ai, http_client
+            return self._ai
+
+    async def warm(self, connections: int = AI_WARMUP_CONNECTIONS):
+        """Open `connections` connections to the API; they're kept alive for the first reviews."""
+        import httpx
+
+        ai = await asyncio.to_thread(self.get)
+        url = ai._client.base_url.copy_with(raw_path=b"/")
+
+        async def connect():
+            try:
+                await self._http_client.head(url)
+            except httpx.HTTPError as e:
+                print(f"AI warm-up failed: {e}")
+
+        await asyncio.gather(*(connect() for _ in range(connections)))
+
+    async def aclose(self):
+        with self._lock:
+            http_client, self._ai, self._http_client = self._http_client, None, None
+        if http_client is not None:
+            await http_client.aclose()
+
+
+shared_ai = SharedAI()
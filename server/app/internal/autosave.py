@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+import app.models as models
+from app.internal.blobs import content_hash
+from app.internal.db import DB_ASYNC, AsyncSessionLocal, SessionLocal
+
+# How often buffered saves are written; 0 writes every save straight through
+AUTOSAVE_INTERVAL_SECONDS = float(os.getenv("AUTOSAVE_INTERVAL_SECONDS") or 0)
+
+logger = logging.getLogger(__name__)
+
+
+class StaleRevision(Exception):
+    """A save was based on an older revision than the document's latest."""
+
+    def __init__(self, revision: int, current: int):
+        super().__init__(f"Document has changed since revision {revision}; it is now at revision {current}")
+        self.revision = revision
+        self.current = current
+
+
+@dataclass
+class PendingSave:
+    """The latest unwritten save of a document, shaped like the row it will become."""
+    id: int
+    patent_entity_id: int
+    content: str
+    content_hash: str
+    revision: int  # The document's revision once written
+    base_revision: int  # Its revision in the DB, which the write is conditional on
+    created_at: datetime
+    updated_at: datetime
+
+
+class AutosaveBuffer:
+    """
+    Write-behind buffer for document saves.
+
+    Only the latest save of each document is kept, and they are all written
+    in one transaction per flush, so a burst of autosaves costs one commit.
+    Saves being flushed stay readable until their commit is done, so reads
+    through `get` always see the latest save. Revisions are checked and
+    assigned under the buffer's lock, against the latest save it knows of,
+    so two saves based on the same revision can't both be accepted.
+    """
+
+    def __init__(self):
+        self._pending: dict[int, PendingSave] = {}
+        self._flushing: dict[int, PendingSave] = {}
+        # Revision of each document as last written here, for saves whose row was read before that write
+        self._written: dict[int, int] = {}
+        self._lock = threading.Lock()  # Saves come from threadpool workers
+
+    def get(self, document_id: int) -> PendingSave | None:
+        with self._lock:
+            return self._pending.get(document_id) or self._flushing.get(document_id)
+
+    def put(
+        self,
+        document: models.Document,
+        content: str,
+        patent_entity_id: int,
+        revision: int | None = None,
+    ) -> PendingSave:
+        """
+        Buffer `content` as the next revision of `document`, as loaded from the
+        DB. Raises StaleRevision if `revision` is given and isn't the latest.
+        """
+        with self._lock:
+            pending = self._pending.get(document.id)
+            flushing = self._flushing.get(document.id)
+            if pending is not None:
+                base_revision, latest = pending.base_revision, pending.revision
+            elif flushing is not None:
+                base_revision = latest = flushing.revision  # What the DB will have once that flush commits
+            else:
+                base_revision = latest = max(document.revision, self._written.get(document.id, 0))
+            if revision is not None and revision != latest:
+                raise StaleRevision(revision, latest)
+            save = PendingSave(
+                id=document.id,
+                patent_entity_id=patent_entity_id,
+                content=content,
+                content_hash=content_hash(content),
+                revision=latest + 1,
+                base_revision=base_revision,
+                created_at=document.created_at,
+                # Naive, as the DateTime column reads back, so ETags match once it's written
+                updated_at=datetime.now(timezone.utc).replace(tzinfo=None),
+            )
+            self._pending[document.id] = save
+            return save
+
+    def discard(self, document_id: int):
+        with self._lock:
+            self._pending.pop(document_id, None)
+            self._written.pop(document_id, None)
+
+    def write(self, db: Session) -> int:
+        """Write the pending saves in one transaction. Returns how many were written."""
+        with self._lock:
+            self._flushing, self._pending = self._pending, {}
+            saves = list(self._flushing.values())
+        written = []
+        try:
+            for save in sorted(saves, key=lambda save: save.id):
+                document = db.get(models.Document, save.id)
+                if document is None:
+                    continue  # Deleted since
+                if document.revision != save.base_revision:
+                    # Only another process writing the same DB can get here
+                    logger.error(
+                        "Dropped autosave of document %s at revision %s: the DB is at revision %s, not %s",
+                        save.id, save.revision, document.revision, save.base_revision,
+                    )
+                    continue
+                document.content = save.content
+                document.patent_entity_id = save.patent_entity_id
+                document.updated_at = save.updated_at
+                document.revision = save.revision
+                written.append(save)
+            db.commit()
+            with self._lock:
+                for save in written:
+                    self._written[save.id] = save.revision
+        except Exception:
+            db.rollback()
+            with self._lock:
+                for save in saves:
+                    newer = self._pending.setdefault(save.id, save)
+                    newer.base_revision = save.base_revision  # A newer save still builds on what the DB has
+            raise
+        finally:
+            with self._lock:
+                self._flushing = {}
+        return len(written)
+
+    async def flush(self) -> int:
+        if DB_ASYNC:
+            async with AsyncSessionLocal() as db:
+                return await db.run_sync(self.write)
+
+        def write() -> int:
+            with SessionLocal() as db:
+                return self.write(db)
+
+        return await asyncio.to_thread(write)
+
+    async def run(self, interval: float = AUTOSAVE_INTERVAL_SECONDS):
+        """Flush every `interval` seconds until cancelled, then once more."""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.flush()
+                except Exception as e:
+                    print(f"Error occurred: {e}")
+        finally:
+            await self.flush()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+autosave = AutosaveBuffer() if AUTOSAVE_INTERVAL_SECONDS > 0 else None
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import tempfile
+from contextlib import suppress
+from typing import BinaryIO, Iterator
+
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR")
+# Bodies at least this large are read through mmap instead of being loaded whole
+BLOB_MMAP_THRESHOLD = int(os.getenv("BLOB_MMAP_THRESHOLD") or 64 * 1024)
+BLOB_CHUNK_SIZE = 64 * 1024
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class FileBlobStore:
+    """
+    Content-addressed store of document bodies: one file per sha256, written
+    once. Files are immutable, so a body is never rewritten no matter how many
+    versions share it.
+
+    A body whose row is deleted is discarded (moved aside) in the deleting
+    transaction, then purged once it commits or restored if it doesn't.
+    Readers that still see the row meanwhile read the discarded file.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def write(self, digest: str, content: str):
+        path = self.path(digest)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(content.encode("utf-8"))
+        os.replace(tmp, path)  # Atomic, so readers never see a partial blob
+
+    def discard(self, digest: str):
+        with suppress(FileNotFoundError):
+            os.replace(self.path(digest), self._discarded_path(digest))
+
+    def purge(self, digest: str):
+        with suppress(FileNotFoundError):
+            os.remove(self._discarded_path(digest))
+
+    def restore(self, digest: str):
+        with suppress(FileNotFoundError):
+            os.replace(self._discarded_path(digest), self.path(digest))
+
+    def remove(self, digest: str):
+        """Delete a body written by a transaction that didn't commit."""
+        with suppress(FileNotFoundError):
+            os.remove(self.path(digest))
+
+    def read(self, digest: str) -> str:
+        with self._open(digest) as f:
+            return f.read().decode("utf-8")
+
+    def iter_bytes(self, digest: str, chunk_size: int = BLOB_CHUNK_SIZE) -> Iterator[bytes]:
+        """Stream a body's bytes, memory-mapping it when it's large."""
+        with self._open(digest) as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < BLOB_MMAP_THRESHOLD:
+                yield f.read()
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for start in range(0, size, chunk_size):
+                    yield mapped[start:start + chunk_size]
+
+    def _discarded_path(self, digest: str) -> str:
+        return self.path(digest) + ".discarded"
+
+    def _open(self, digest: str) -> BinaryIO:
+        try:
+            return open(self.path(digest), "rb")
+        except FileNotFoundError:  # Being deleted by a transaction that hasn't committed yet
+            return open(self._discarded_path(digest), "rb")
+
+
+blob_store: FileBlobStore | None = FileBlobStore(BLOB_STORE_DIR) if BLOB_STORE_DIR else None
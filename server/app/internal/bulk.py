@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+import json
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterator
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+
+from app.internal.blobs import blob_store, content_hash
+from app.internal.search import has_search_index, index_contents
+from app.internal.versioning import MAX_DELTA_RATIO, SNAPSHOT_INTERVAL, apply_delta, encode_token_delta, tokenize
+import app.models as models
+import app.schemas as schemas
+
+# NDJSON lines imported per transaction
+IMPORT_CHUNK_LINES = int(os.getenv("IMPORT_CHUNK_LINES") or 5000)
+# Rows fetched, serialized and released at a time when exporting
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE") or 500)
+# Rebuilt versions kept while exporting, as bases for the deltas that follow them
+EXPORT_CONTENT_CACHE = 64
+
+NDJSON = "application/x-ndjson"
+
+_record = TypeAdapter(schemas.BulkRecord)
+
+
+def _utc(value: datetime | None, default: datetime) -> datetime:
+    """Naive UTC, as the DateTime columns store it."""
+    if value is None:
+        return default
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _line(record: dict) -> str:
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n"
+
+
+@dataclass
+class _Tail:
+    """The latest version of a patent so far: what the next imported version is encoded against."""
+    id: int
+    chain_depth: int
+    tokens: list[str]  # Its content, tokenized once for the next version's delta
+    revision: int
+
+
+class Importer:
+    """
+    Import NDJSON lines of schemas.PatentRecord and schemas.DocumentRecord,
+    one transaction per chunk of lines.
+
+    Rows are encoded the way models._store_content would encode them (a delta
+    against the patent's previous version, a snapshot every SNAPSHOT_INTERVAL
+    versions) but written with one executemany INSERT per table per chunk,
+    skipping the ORM. Patents get new ids; document lines refer to a patent
+    line earlier in the file by its id there, or else to an existing patent,
+    whose versions the imported ones are appended to.
+
+    Chunks committed before a bad line stay imported. On SQLite each chunk
+    holds the write lock from the start, so the document ids it picks can't
+    be taken by a concurrent save before it commits.
+    """
+
+    def __init__(self):
+        self.patent_ids: dict[int, int] = {}  # Patent line id -> imported patent id
+        self.tails: dict[int, _Tail | None] = {}  # Patent id -> its latest version, None if it has none
+        self.line_number = 0
+        self.patents = 0
+        self.documents = 0
+
+    def import_lines(self, db: Session, lines: list[bytes | str]):
+        records = self._parse(lines)
+        self._lock_for_writes(db)
+        patents = [record for _, record in records if isinstance(record, schemas.PatentRecord)]
+        new_ids = iter(db.scalars(
+            insert(models.PatentEntity).returning(models.PatentEntity.id, sort_by_parameter_order=True),
+            [{"name": patent.name} for patent in patents],
+        ).all() if patents else [])
+
+        next_id = (db.scalar(select(func.max(models.Document.id))) or 0) + 1
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        tails = dict(self.tails)  # Only kept if the chunk commits
+        patent_ids = dict(self.patent_ids)
+        documents, snapshots, contents = [], {}, {}
+        for line_number, record in records:
+            if isinstance(record, schemas.PatentRecord):
+                if record.id in patent_ids:
+                    raise ValueError(f"Line {line_number}: patent {record.id} appears twice")
+                patent_ids[record.id] = next(new_ids)
+                tails[patent_ids[record.id]] = None
+                continue
+
+            patent_id = patent_ids.get(record.patent_entity_id, record.patent_entity_id)
+            if patent_id not in tails:
+                if db.get(models.PatentEntity, patent_id) is None:
+                    raise ValueError(f"Line {line_number}: unknown patent {record.patent_entity_id}")
+                tails[patent_id] = self._latest(db, patent_id)
+            tail = tails[patent_id]
+
+            created_at = _utc(record.created_at, now)
+            row = {
+                "id": next_id,
+                "patent_entity_id": patent_id,
+                "content_hash": content_hash(record.content),
+                "snapshot_hash": None,
+                "base_id": None,
+                "delta": None,
+                "chain_depth": 0,
+                "revision": record.revision,
+                "created_at": created_at,
+                "updated_at": _utc(record.updated_at, created_at),
+            }
+            tokens = tokenize(record.content)
+            if tail is not None and tail.chain_depth + 1 < SNAPSHOT_INTERVAL:
+                delta = encode_token_delta(tail.tokens, tokens)
+                if len(delta) <= len(record.content) * MAX_DELTA_RATIO:
+                    row.update(base_id=tail.id, delta=delta, chain_depth=tail.chain_depth + 1)
+            if row["base_id"] is None:
+                row["snapshot_hash"] = row["content_hash"]
+                snapshots.setdefault(row["content_hash"], record.content)
+            documents.append(row)
+            contents[next_id] = record.content
+            tails[patent_id] = _Tail(next_id, row["chain_depth"], tokens, record.revision)
+            next_id += 1
+
+        self._insert_blobs(db, snapshots)
+        if documents:
+            db.execute(insert(models.Document), documents)
+        if has_search_index(db.connection()):
+            index_contents(db.connection(), contents)
+        db.commit()
+        self.tails, self.patent_ids = tails, patent_ids
+        self.patents += len(patents)
+        self.documents += len(documents)
+
+    def events(self) -> Iterator[tuple[schemas.VersionEventKind, int, int, int]]:
+        """(kind, patent id, document id, revision) of each patent's latest imported version."""
+        created = set(self.patent_ids.values())
+        for patent_id, tail in self.tails.items():
+            if tail is not None:
+                kind = "patent_created" if patent_id in created else "version_created"
+                yield kind, patent_id, tail.id, tail.revision
+
+    def _parse(self, lines: list[bytes | str]) -> list[tuple[int, schemas.PatentRecord | schemas.DocumentRecord]]:
+        records = []
+        for line in lines:
+            self.line_number += 1
+            if not line.strip():
+                continue
+            try:
+                records.append((self.line_number, _record.validate_json(line)))
+            except ValidationError as e:
+                error = e.errors()[0]
+                where = ".".join(str(part) for part in error["loc"])
+                raise ValueError(f"Line {self.line_number}: {where + ': ' if where else ''}{error['msg']}") from None
+        return records
+
+    @staticmethod
+    def _lock_for_writes(db: Session):
+        """Begin the chunk's transaction with BEGIN IMMEDIATE, rather than on its first INSERT."""
+        conn = db.connection()
+        if conn.dialect.name == "sqlite" and not conn.connection.driver_connection.in_transaction:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    @staticmethod
+    def _latest(db: Session, patent_id: int) -> _Tail | None:
+        latest = db.scalars(
+            select(models.Document)
+            .where(models.Document.patent_entity_id == patent_id)
+            .order_by(models.Document.id.desc())
+            .limit(1)
+        ).first()
+        if latest is None:
+            return None
+        return _Tail(latest.id, latest.chain_depth, tokenize(latest.content), latest.revision)
+
+    @staticmethod
+    def _insert_blobs(db: Session, snapshots: dict[str, str]):
+        if not snapshots:
+            return
+        existing = set(db.scalars(select(models.Blob.sha256).where(models.Blob.sha256.in_(list(snapshots)))))
+        rows = []
+        for digest, content in snapshots.items():
+            if digest in existing:
+                continue
+            if blob_store is not None:
+                blob_store.write(digest, content)
+            rows.append({"sha256": digest, "size": len(content), "content": None if blob_store else content})
+        if rows:
+            db.execute(insert(models.Blob), rows)
+
+
+async def aiter_line_chunks(stream: AsyncIterator[bytes], size: int) -> AsyncIterator[list[bytes]]:
+    """Split a request body into lists of `size` lines as it arrives."""
+    partial, lines = b"", []
+    async for data in stream:
+        *complete, partial = (partial + data).split(b"\n")
+        lines.extend(complete)
+        while len(lines) >= size:
+            yield lines[:size]
+            lines = lines[size:]
+    if partial:
+        lines.append(partial)
+    if lines:
+        yield lines
+
+
+async def import_ndjson(db: Session, stream: AsyncIterator[bytes]) -> Importer:
+    """Import a request body chunk by chunk, each in the threadpool, while the rest is still arriving."""
+    importer = Importer()
+    async for lines in aiter_line_chunks(stream, IMPORT_CHUNK_LINES):
+        await run_in_threadpool(importer.import_lines, db, lines)
+    return importer
+
+
+async def aimport_ndjson(db: AsyncSession, stream: AsyncIterator[bytes]) -> Importer:
+    """import_ndjson for an AsyncSession."""
+    importer = Importer()
+    async for lines in aiter_line_chunks(stream, IMPORT_CHUNK_LINES):
+        await db.run_sync(importer.import_lines, lines)
+    return importer
+
+
+PATENTS = select(models.PatentEntity).order_by(models.PatentEntity.id)
+# Each patent's versions in order, so a delta's base has usually just been rebuilt
+DOCUMENTS = (
+    select(models.Document)
+    .options(selectinload(models.Document.snapshot).undefer(models.Blob.content))
+    .order_by(models.Document.patent_entity_id, models.Document.id)
+)
+
+
+class Exporter:
+    """Serialize patents and their versions as the NDJSON lines Importer reads."""
+
+    def __init__(self):
+        self.contents: OrderedDict[int, str] = OrderedDict()  # Recently rebuilt versions by id
+
+    def patents(self, patents: list[models.PatentEntity]) -> str:
+        return "".join(_line({"type": "patent", "id": patent.id, "name": patent.name}) for patent in patents)
+
+    def documents(self, documents: list[models.Document]) -> str:
+        return "".join(
+            _line({
+                "type": "document",
+                "id": document.id,
+                "patent_entity_id": document.patent_entity_id,
+                "content": self._content(document),
+                "revision": document.revision,
+                "created_at": document.created_at.isoformat(),
+                "updated_at": document.updated_at.isoformat(),
+            })
+            for document in documents
+        )
+
+    def _content(self, document: models.Document) -> str:
+        if document.snapshot_hash is not None:
+            content = document.snapshot.text
+        elif document.base_id in self.contents:
+            content = apply_delta(self.contents[document.base_id], document.delta)
+        else:
+            content = document.content  # Walks the chain from its snapshot
+        self.contents[document.id] = content
+        if len(self.contents) > EXPORT_CONTENT_CACHE:
+            self.contents.popitem(last=False)
+        return content
+
+
+def _release(db: Session | AsyncSession):
+    for instance in list(db.identity_map.values()):
+        db.expunge(instance)  # expunge_all() would invalidate the open result
+
+
+def iter_ndjson(db: Session, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """
+    Export every patent, then every version, one chunk of lines per batch of
+    rows fetched from an open cursor. Versions are written with their full
+    content. The session is closed when the export is done.
+    """
+    try:
+        exporter = Exporter()
+        for batch in db.scalars(PATENTS.execution_options(yield_per=batch_size)).partitions():
+            chunk = exporter.patents(batch)
+            _release(db)
+            yield chunk
+        for batch in db.scalars(DOCUMENTS.execution_options(yield_per=batch_size)).partitions():
+            chunk = exporter.documents(batch)
+            _release(db)
+            yield chunk
+    finally:
+        db.close()
+
+
+def stream_ndjson(db: Session) -> StreamingResponse:
+    return StreamingResponse(iter_ndjson(db), media_type=NDJSON)
+
+
+async def aiter_ndjson(db: AsyncSession, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[str]:
+    """iter_ndjson for an AsyncSession, with each batch's content rebuilt in run_sync."""
+    try:
+        exporter = Exporter()
+        result = await db.stream_scalars(PATENTS.execution_options(yield_per=batch_size))
+        async for batch in result.partitions():
+            chunk = exporter.patents(batch)
+            _release(db)
+            yield chunk
+        result = await db.stream_scalars(DOCUMENTS.execution_options(yield_per=batch_size))
+        async for batch in result.partitions():
+            chunk = await db.run_sync(lambda _, batch=batch: exporter.documents(batch))
+            _release(db)
+            yield chunk
+    finally:
+        await db.close()
+
+
+def astream_ndjson(db: AsyncSession) -> StreamingResponse:
+    return StreamingResponse(aiter_ndjson(db), media_type=NDJSON)
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Generic, TypeVar
+
+from pydantic import BaseModel
+
+from app.internal.prompt import PROMPT
+
+REVIEW_CACHE_MAX_BYTES = int(os.getenv("REVIEW_CACHE_MAX_BYTES") or 32 * 1024 * 1024)
+REVIEW_CACHE_TTL_SECONDS = float(os.getenv("REVIEW_CACHE_TTL_SECONDS") or 3600)
+
+PROMPT_HASH = hashlib.sha256(PROMPT.encode("utf-8")).hexdigest()
+
+V = TypeVar("V", bound=BaseModel)
+
+
+def normalize_text(text: str) -> str:
+    """Collapse all whitespace runs so formatting-only edits share a cache key."""
+    return " ".join(text.split())
+
+
+def review_key(text: str, model: str) -> str:
+    """Cache key for a review of `text` by `model` under the current PROMPT."""
+    digest = hashlib.sha256()
+    for part in (model, PROMPT_HASH, normalize_text(text)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+
+@dataclass
+class _Entry(Generic[V]):
+    value: V
+    size: int
+    expires_at: float
+
+
+class ReviewCache(Generic[V]):
+    """
+    LRU cache of AI reviews with a TTL and a memory ceiling in bytes.
+
+    The size of an entry is the length of its JSON encoding plus the key, which
+    tracks what the entry actually costs far better than an entry count does
+    when documents range from one claim to a full specification.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = REVIEW_CACHE_MAX_BYTES,
+        ttl_seconds: float = REVIEW_CACHE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[str, _Entry[V]] = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: str) -> V | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+        if entry.expires_at <= self._clock():
+            self._remove(key)
+            self._expirations += 1
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return entry.value
+
+    def put(self, key: str, value: V) -> None:
+        size = sys.getsizeof(key) + len(value.model_dump_json())
+        if key in self._entries:
+            self._remove(key)
+        if size > self.max_bytes:
+            # Would evict everything else and still not fit.
+            return
+        self._entries[key] = _Entry(value, size, self._clock() + self.ttl_seconds)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            expirations=self._expirations,
+            entries=len(self._entries),
+            bytes=self._bytes,
+        )
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+
+review_cache: ReviewCache = ReviewCache()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import html
+import re
+from dataclasses import dataclass, field
+
+HEADING_RE = re.compile(r"<h([1-6])\b[^>]*>(.*?)</h\1\s*>", re.IGNORECASE | re.DOTALL)
+PARAGRAPH_RE = re.compile(r"<p\b[^>]*>(.*?)</p\s*>", re.IGNORECASE | re.DOTALL)
+TAG_RE = re.compile(r"<[^>]*>")
+BODY_RE = re.compile(r"<body\b[^>]*>", re.IGNORECASE)
+CLAIMS_HEADING = "claims"
+
+
+@dataclass
+class ClaimsText:
+    paragraphs: list[str] = field(default_factory=list)  # Normalized plain text, in order
+    offsets: dict[int, int] = field(default_factory=dict)  # Paragraph number -> offset of its <p> in the source
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join(self.paragraphs)
+
+
+def _plain(fragment: str) -> str:
+    if "<" in fragment:
+        fragment = TAG_RE.sub("", fragment)
+    if "&" in fragment:
+        fragment = html.unescape(fragment)
+    return " ".join(fragment.split())
+
+
+def claims_section(source: str) -> tuple[int, int]:
+    """
+    Source span of the Claims section: from the "Claims" heading to the next
+    heading. Documents without one are taken whole, minus any <head>.
+    """
+    start, end = None, len(source)
+    for match in HEADING_RE.finditer(source):
+        if start is not None:
+            end = match.start()
+            break
+        if _plain(match.group(2)).lower() == CLAIMS_HEADING:
+            start = match.end()
+    if start is None:
+        body = BODY_RE.search(source)
+        start = body.end() if body else 0
+    return start, end
+
+
+def extract_claims(source: str) -> ClaimsText:
+    """
+    Extract the Claims section of a patent HTML document as plain text.
+
+    Headings are located first so everything outside the section (the
+    <head>, the description, ...) is skipped without being stripped. Each <p>
+    in the section is a numbered paragraph whose source offset is recorded,
+    so issues can be located without scanning the document again. Content
+    without any <p> is a single paragraph.
+    """
+    start, end = claims_section(source)
+    claims = ClaimsText()
+    for number, match in enumerate(PARAGRAPH_RE.finditer(source, start, end), start=1):
+        claims.paragraphs.append(_plain(match.group(1)))
+        claims.offsets[number] = match.start()
+    if not claims.paragraphs:
+        claims.paragraphs.append(_plain(source[start:end]))
+        claims.offsets[1] = start
+    return claims
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import os
+import struct
+import zlib
+from collections import Counter
+from typing import Iterable
+
+from sqlalchemy import LargeBinary, Text
+from sqlalchemy.types import TypeDecorator
+
+from app.internal.versioning import tokenize
+
+# Bodies shorter than this many characters are stored as plain text
+COMPRESSION_THRESHOLD = int(os.getenv("COMPRESSION_THRESHOLD") or 512)
+COMPRESSION_LEVEL = 6
+# zlib can only reference the last 32 KiB, so a bigger dictionary is wasted
+MAX_DICTIONARY_SIZE = 32 * 1024
+DICTIONARY_PATH = os.path.join(os.path.dirname(__file__), "content.zdict")
+
+
+def train_dictionary(samples: Iterable[str], size: int = MAX_DICTIONARY_SIZE, max_ngram: int = 4) -> bytes:
+    """
+    Build a zlib preset dictionary from sample documents.
+
+    Runs of up to `max_ngram` word/tag tokens that occur more than once are
+    scored by how many bytes they'd save (occurrences x length) and the best
+    are kept until the dictionary is full. The best go last, since zlib
+    encodes closer matches more cheaply.
+    """
+    counts: Counter[str] = Counter()
+    for sample in samples:
+        tokens = tokenize(sample)
+        for n in range(1, max_ngram + 1):
+            for i in range(len(tokens) - n + 1):
+                counts["".join(tokens[i:i + n])] += 1
+
+    chosen, used = [], 0
+    for ngram, count in sorted(counts.items(), key=lambda item: (-item[1] * len(item[0]), item[0])):
+        encoded = ngram.encode("utf-8")
+        if count < 2 or used + len(encoded) > size:
+            continue
+        chosen.append(encoded)
+        used += len(encoded)
+    return b"".join(reversed(chosen))
+
+
+def _load_dictionaries() -> dict[int, bytes]:
+    if not os.path.exists(DICTIONARY_PATH):
+        return {}  # Not trained yet; compress without one
+    with open(DICTIONARY_PATH, "rb") as f:
+        dictionary = f.read()
+    return {zlib.adler32(dictionary): dictionary}
+
+
+# Keyed by adler32, which zlib records in the header of every stream compressed with one.
+# Retired dictionaries must stay here for as long as rows compressed with them exist.
+DICTIONARIES = _load_dictionaries()
+DEFAULT_DICTIONARY = next(iter(DICTIONARIES.values()), None)
+
+
+def compress(text: str, dictionary: bytes | None = DEFAULT_DICTIONARY) -> bytes:
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=dictionary) if dictionary else zlib.compressobj(COMPRESSION_LEVEL)
+    return compressor.compress(text.encode("utf-8")) + compressor.flush()
+
+
+def decompress(data: bytes) -> str:
+    flags = data[1]
+    if flags & 0x20:  # FDICT: the stream was compressed against a preset dictionary
+        (dictionary_id,) = struct.unpack(">I", data[2:6])
+        if dictionary_id not in DICTIONARIES:
+            raise ValueError(f"Unknown compression dictionary {dictionary_id:#010x}")
+        decompressor = zlib.decompressobj(zdict=DICTIONARIES[dictionary_id])
+    else:
+        decompressor = zlib.decompressobj()
+    return (decompressor.decompress(data) + decompressor.flush()).decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text column stored zlib-compressed (with the trained dictionary) once it's
+    COMPRESSION_THRESHOLD characters or longer. On SQLite compressed values are
+    written as BLOBs and plain ones as TEXT, which it keeps side by side in one
+    column, so rows written before compression was enabled still read back
+    unchanged. Other databases can't mix the two, so there the column is binary
+    and every value is compressed.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "sqlite":
+            return dialect.type_descriptor(Text())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        if value is None or (dialect.name == "sqlite" and len(value) < COMPRESSION_THRESHOLD):
+            return value
+        return compress(value)
+
+    def process_result_value(self, value, dialect):
+        if isinstance(value, bytes):
+            return decompress(value)
+        return value
@@ -1,16 +1,104 @@
-from sqlalchemy import StaticPool, create_engine
+import os
+from typing import Any, Sequence, TypeVar
+
+from pydantic import BaseModel
+from sqlalchemy import URL, AsyncAdaptedQueuePool, Engine, QueuePool, StaticPool, create_engine, event, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-DATABASE_URL = "sqlite:///:memory:"
+# e.g. sqlite:///./patents.db for a persistent database
+DATABASE_URL = os.getenv("DATABASE_URL") or "sqlite:///:memory:"
+# Serve the document and patent routes from async handlers on an async engine instead of the threadpool
+DB_ASYNC = os.getenv("DB_ASYNC") == "1"
+# One connection per request worker thread (anyio's default threadpool has 40)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE") or 40)
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS") or "NORMAL"  # Safe with WAL: a crash can't corrupt the DB
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE") or 256 * 1024 * 1024)
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE") or -64 * 1024)  # Negative means KiB, so 64 MiB
+SQLITE_BUSY_TIMEOUT_SECONDS = 30
+
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")  # Readers don't block the writer, or each other
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def create_db_engine(url: str = DATABASE_URL) -> Engine:
+    """
+    Engine for `url`. An in-memory SQLite DB only exists inside its one
+    connection, so it is shared by every thread. A file-backed one runs in
+    WAL mode with a pool of connections, so requests don't queue on a single
+    connection.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return create_engine(url, echo=False, pool_pre_ping=True)
+    if parsed.database in (None, "", ":memory:"):
+        return create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            echo=False,
+            poolclass=StaticPool,
+        )
+
+    engine = create_engine(
+        url,
+        # Connections move between threads: FastAPI may close a request's session on another worker
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_SECONDS},
+        echo=False,
+        poolclass=QueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=0,
+    )
+    event.listen(engine, "connect", _configure_sqlite)
+    return engine
+
+
+def async_database_url(url: str) -> URL:
+    """`url` with the async driver for its backend, unless it already names one."""
+    parsed = make_url(url)
+    drivers = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+    if parsed.drivername in drivers:
+        parsed = parsed.set(drivername=f"{parsed.drivername}+{drivers[parsed.drivername]}")
+    return parsed
+
+
+def create_async_db_engine(url: str = DATABASE_URL) -> AsyncEngine:
+    """Async counterpart of create_db_engine, with the same pooling and SQLite pragmas."""
+    parsed = async_database_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return create_async_engine(parsed, echo=False, pool_pre_ping=True)
+    if parsed.database in (None, "", ":memory:"):
+        return create_async_engine(parsed, echo=False, poolclass=StaticPool)
+
+    engine = create_async_engine(
+        parsed,
+        connect_args={"timeout": SQLITE_BUSY_TIMEOUT_SECONDS},
+        echo=False,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=0,
+    )
+    event.listen(engine.sync_engine, "connect", _configure_sqlite)
+    return engine
+
+
+def async_session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    # Nothing is expired on commit: reloading it would be lazy IO outside run_sync
+    return async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    echo=False,
-    poolclass=StaticPool,
-)
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Only built when enabled, so the sync path doesn't need the async driver installed
+async_engine = create_async_db_engine() if DB_ASYNC else None
+AsyncSessionLocal = async_session_factory(async_engine) if DB_ASYNC else None
 
 Base = declarative_base()
 
@@ -21,3 +109,30 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def _attributes(schema: type[BaseModel], instance: Any) -> dict[str, Any]:
+    return {name: getattr(instance, name) for name in schema.model_fields}
+
+
+async def to_schemas(db: AsyncSession, schema: type[M], instances: Sequence[Any]) -> list[M]:
+    """
+    Validate ORM objects into `schema` on an AsyncSession. Document.content
+    lazy-loads its delta chain and snapshot, which needs run_sync; the
+    attributes are read there and validated afterwards, since pydantic's
+    validator mustn't be suspended mid-call by a greenlet switch.
+    """
+    rows = await db.run_sync(lambda _: [_attributes(schema, instance) for instance in instances])
+    return [schema.model_validate(row) for row in rows]
+
+
+async def to_schema(db: AsyncSession, schema: type[M], instance: Any) -> M:
+    return (await to_schemas(db, schema, [instance]))[0]
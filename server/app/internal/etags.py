@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any
+
+from fastapi import Response
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag over the parts that determine a representation."""
+    digest = hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def document_etag(version: Any) -> str:
+    """
+    ETag of a document's JSON, from columns alone so it can be checked
+    without loading (or rebuilding) the content.
+    """
+    return make_etag(version.id, version.patent_entity_id, version.updated_at.isoformat(), version.content_hash)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match uses weak comparison, so a W/ prefix on either side is ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    # Let clients keep the body but revalidate it on every use
+    response.headers["Cache-Control"] = "no-cache"
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from typing import AsyncIterator, Iterable
+
+import app.schemas as schemas
+
+# Events for the same patent within this window reach a subscriber as one
+EVENT_COALESCE_SECONDS = float(os.getenv("EVENT_COALESCE_SECONDS") or 0.25)
+
+
+class Subscription:
+    """
+    One subscriber's view of the hub: the latest pending event per patent.
+
+    A newer event for a patent replaces the pending one, so a burst of
+    saves is delivered as the last of them. Lives on the event loop it was
+    created on; the hub hands events over with call_soon_threadsafe.
+    """
+
+    def __init__(self, hub: VersionEventHub, patent_ids: Iterable[int] | None):
+        self.follow(patent_ids)
+        self._hub = hub
+        self._loop = asyncio.get_running_loop()
+        self._pending: dict[int, schemas.VersionEvent] = {}
+        self._ready = asyncio.Event()
+
+    def follow(self, patent_ids: Iterable[int] | None):
+        self.patent_ids = None if patent_ids is None else set(patent_ids)  # None means every patent
+
+    def wants(self, patent_id: int) -> bool:
+        return self.patent_ids is None or patent_id in self.patent_ids
+
+    def _offer(self, event: schemas.VersionEvent):
+        if self.wants(event.patent_id):  # Re-checked: the filter may have changed in between
+            self._pending[event.patent_id] = event
+            self._ready.set()
+
+    async def batches(self, window: float = EVENT_COALESCE_SECONDS) -> AsyncIterator[list[schemas.VersionEvent]]:
+        """Pending events, at most once per `window`, for as long as the subscription is open."""
+        while True:
+            await self._ready.wait()
+            await asyncio.sleep(window)  # Let the rest of a burst arrive
+            events = list(self._pending.values())
+            self._pending.clear()
+            self._ready.clear()
+            if events:
+                yield events
+
+    def close(self):
+        self._hub._unsubscribe(self)
+
+
+class VersionEventHub:
+    """
+    In-process pub/sub of document version changes, keyed by patent id.
+
+    Controllers publish after committing, from the event loop or from
+    threadpool workers; each subscription receives the events for the
+    patents it follows.
+    """
+
+    def __init__(self):
+        self._subscriptions: set[Subscription] = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, patent_ids: Iterable[int] | None = None) -> Subscription:
+        subscription = Subscription(self, patent_ids)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def publish(self, kind: schemas.VersionEventKind, patent_id: int, document_id: int, revision: int):
+        event = schemas.VersionEvent(kind=kind, patent_id=patent_id, document_id=document_id, revision=revision)
+        with self._lock:
+            subscriptions = [s for s in self._subscriptions if s.wants(patent_id)]
+        for subscription in subscriptions:
+            try:
+                subscription._loop.call_soon_threadsafe(subscription._offer, event)
+            except RuntimeError:
+                subscription.close()  # Its loop has shut down
+
+    def _unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+
+version_events = VersionEventHub()
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+from typing import AsyncGenerator
+
+FAKE_AI_FIRST_TOKEN_SECONDS = float(os.getenv("FAKE_AI_FIRST_TOKEN_SECONDS") or 0.5)
+FAKE_AI_CHUNK_SECONDS = float(os.getenv("FAKE_AI_CHUNK_SECONDS") or 0.02)
+FAKE_AI_CHUNK_CHARS = int(os.getenv("FAKE_AI_CHUNK_CHARS") or 16)
+FAKE_AI_RESPONSE_CHARS = int(os.getenv("FAKE_AI_RESPONSE_CHARS") or 1200)
+FAKE_AI_ERROR_PROBABILITY = float(os.getenv("FAKE_AI_ERROR_PROBABILITY") or 0.0)
+
+ISSUE_TEMPLATES = [
+    ("Antecedent Basis", "medium", "An element is referred to with \"the\" before being introduced.", "Introduce the element with \"a\" or \"an\" first."),
+    ("Punctuation", "low", "The element is not separated from the next one by a semicolon.", "End the element with a semicolon."),
+    ("Ambiguity and Indefinite Issues", "high", "The claim uses a subjective term.", "Replace the term with a measurable limitation."),
+    ("Structure", "medium", "The claim does not end with a period.", "End the claim with a single period."),
+]
+
+
+class FakeAIError(RuntimeError):
+    pass
+
+
+class FakeAI:
+    """
+    Local stand-in for `AI` that streams a schema-valid review without network access.
+
+    Latency before the first chunk and between chunks, chunk size, total
+    response length and error rate are all configurable, so the /ws pipeline
+    can be load-tested without spending OpenAI credits. Reviews are
+    deterministic for a given document.
+    """
+
+    def __init__(
+        self,
+        model: str = "fake-model",
+        first_token_seconds: float = FAKE_AI_FIRST_TOKEN_SECONDS,
+        chunk_seconds: float = FAKE_AI_CHUNK_SECONDS,
+        chunk_chars: int = FAKE_AI_CHUNK_CHARS,
+        response_chars: int = FAKE_AI_RESPONSE_CHARS,
+        error_probability: float = FAKE_AI_ERROR_PROBABILITY,
+    ):
+        self.model = model
+        self.first_token_seconds = first_token_seconds
+        self.chunk_seconds = chunk_seconds
+        self.chunk_chars = max(1, chunk_chars)
+        self.response_chars = response_chars
+        self._random_error_probability = error_probability
+
+    def build_review(self, document: str) -> str:
+        """Suggestions JSON for `document`, grown to roughly `response_chars` characters."""
+        paragraphs = max(1, len([p for p in document.split("\n\n") if p.strip()]))
+        rng = random.Random(document)
+        issues = []
+        while True:
+            kind, severity, description, suggestion = ISSUE_TEMPLATES[len(issues) % len(ISSUE_TEMPLATES)]
+            issue = {
+                "type": kind,
+                "severity": severity,
+                "paragraph": rng.randint(1, paragraphs),
+                "description": description,
+                "suggestion": suggestion,
+            }
+            if issues and len(json.dumps({"issues": issues + [issue]})) > self.response_chars:
+                break
+            issues.append(issue)
+        return json.dumps({"issues": issues})
+
+    async def review_document(self, document: str) -> AsyncGenerator[str | None, None]:
+        review = self.build_review(document)
+        fails = random.random() < self._random_error_probability
+        await asyncio.sleep(self.first_token_seconds)
+        for start in range(0, len(review), self.chunk_chars):
+            if fails and start >= len(review) // 2:
+                raise FakeAIError("Simulated AI failure")
+            if start:
+                await asyncio.sleep(self.chunk_seconds)
+            yield review[start:start + self.chunk_chars]
+        yield None
+
+
+def get_fake_ai() -> FakeAI:
+    """Drop-in replacement for `get_ai`, e.g. via `app.dependency_overrides`."""
+    return FakeAI()
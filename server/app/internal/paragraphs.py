@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+
+from app.internal.cache import ReviewCache, review_key
+from app.internal.claims import extract_claims
+from app.schemas import SuggestionIssue, Suggestions
+
+CLAIM_START_RE = re.compile(r"^\d+\s*\.")
+
+
+@dataclass(frozen=True)
+class Paragraph:
+    number: int  # 1-based position of the <p> in the Claims section
+    text: str  # Normalized plain text
+    context: str = ""  # Preamble of the claim this paragraph belongs to, if any
+    context_number: int = 0  # Paragraph number of that preamble
+    offset: int = 0  # Offset of the paragraph in the source HTML
+
+
+def split_paragraphs(content: str) -> list[Paragraph]:
+    """
+    Split the Claims section of editor HTML into numbered plain-text paragraphs.
+
+    Each claim body paragraph carries the opening paragraph of its claim as
+    context, since antecedent basis and structure can't be judged without it.
+    """
+    claims = extract_claims(content)
+    paragraphs = []
+    preamble: Paragraph | None = None
+    for number, text in enumerate(claims.paragraphs, start=1):
+        offset = claims.offsets[number]
+        if CLAIM_START_RE.match(text) or preamble is None:
+            paragraph = Paragraph(number, text, offset=offset)
+            if CLAIM_START_RE.match(text):
+                preamble = paragraph
+        else:
+            paragraph = Paragraph(number, text, preamble.text, preamble.number, offset)
+        paragraphs.append(paragraph)
+    return paragraphs
+
+
+def paragraph_key(paragraph: Paragraph, model: str) -> str:
+    return "p:" + review_key(f"{paragraph.context}\n\n{paragraph.text}", model)
+
+
+@dataclass
+class ReviewPlan:
+    """
+    Which paragraphs of a document still need the model, and how to put the
+    answer back together with the cached issues of the unchanged ones.
+    """
+
+    model: str
+    cached_issues: list[SuggestionIssue] = field(default_factory=list)
+    pending: list[Paragraph] = field(default_factory=list)
+    # Paragraphs sent to the model, in order; position i is paragraph i + 1 of the prompt
+    prompt_paragraphs: list[Paragraph] = field(default_factory=list)
+
+    @property
+    def prompt(self) -> str:
+        return "\n\n".join(p.text for p in self.prompt_paragraphs)
+
+    def remap(self, issue: SuggestionIssue) -> SuggestionIssue | None:
+        """Translate a prompt-relative issue to document numbering.
+
+        Issues on context-only paragraphs are dropped; their own cached review
+        already covers them. Issues the model couldn't pin to a paragraph are
+        attributed to the first changed paragraph.
+        """
+        pending_numbers = {p.number for p in self.pending}
+        if 1 <= issue.paragraph <= len(self.prompt_paragraphs):
+            number = self.prompt_paragraphs[issue.paragraph - 1].number
+            if number not in pending_numbers:
+                return None
+        else:
+            number = self.pending[0].number
+        return issue.model_copy(update={"paragraph": number})
+
+    def merge(self, reviewed: Suggestions, cache: ReviewCache) -> Suggestions:
+        """Combine a review of `prompt` with the cached issues, caching the new ones per paragraph."""
+        by_paragraph: dict[int, list[SuggestionIssue]] = {p.number: [] for p in self.pending}
+        for issue in reviewed.issues:
+            remapped = self.remap(issue)
+            if remapped is not None:
+                by_paragraph[remapped.paragraph].append(remapped)
+        for paragraph in self.pending:
+            cache.put(paragraph_key(paragraph, self.model), Suggestions(issues=by_paragraph[paragraph.number]))
+        issues = self.cached_issues + [issue for issues in by_paragraph.values() for issue in issues]
+        return Suggestions(issues=sorted(issues, key=lambda issue: issue.paragraph))
+
+
+def plan_review(paragraphs: list[Paragraph], model: str, cache: ReviewCache) -> ReviewPlan:
+    """Look up every paragraph's fingerprint and collect the ones that changed."""
+    plan = ReviewPlan(model=model)
+    for paragraph in paragraphs:
+        if not paragraph.text:
+            continue
+        cached = cache.get(paragraph_key(paragraph, model))
+        if cached is None:
+            plan.pending.append(paragraph)
+        else:
+            plan.cached_issues.extend(
+                issue.model_copy(update={"paragraph": paragraph.number}) for issue in cached.issues
+            )
+
+    # Body paragraphs are sent after the claim preamble they need as context
+    included = set()
+    by_number = {p.number: p for p in paragraphs}
+    for paragraph in plan.pending:
+        preamble = by_number.get(paragraph.context_number)
+        for needed in (preamble, paragraph):
+            if needed is not None and needed.number not in included:
+                included.add(needed.number)
+                plan.prompt_paragraphs.append(needed)
+    plan.prompt_paragraphs.sort(key=lambda p: p.number)
+    return plan
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Hashable
+
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY") or 4)
+
+PositionCallback = Callable[[int], Awaitable[None]]
+
+
+@dataclass(eq=False)
+class _Ticket:
+    owner: Hashable
+    granted: asyncio.Future
+    wakeup: asyncio.Future | None = field(default=None)
+
+
+class AIScheduler:
+    """
+    Caps the number of concurrent model calls and queues the rest.
+
+    Waiting calls are queued per owner (a websocket connection) and slots are
+    handed out round-robin across owners, so one client firing many requests
+    can't starve the others. Superseded work is dropped as soon as its waiter
+    is cancelled, before it ever takes a slot. While queued, a waiter is told
+    its position each time it changes.
+    """
+
+    def __init__(self, max_concurrency: int = AI_MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self._queues: OrderedDict[Hashable, deque[_Ticket]] = OrderedDict()
+
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    @asynccontextmanager
+    async def slot(self, owner: Hashable, on_position: PositionCallback | None = None):
+        if self.active < self.max_concurrency and not self._queues:
+            self.active += 1
+        else:
+            await self._wait(owner, on_position)
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._grant_next()
+
+    async def stream(
+        self,
+        start: Callable[[], AsyncIterator[str | None]],
+        owner: Hashable,
+        on_position: PositionCallback | None = None,
+    ) -> AsyncIterator[str | None]:
+        """Run the stream returned by `start` once a slot is free."""
+        async with self.slot(owner, on_position):
+            async for chunk in start():
+                yield chunk
+
+    async def _wait(self, owner: Hashable, on_position: PositionCallback | None):
+        loop = asyncio.get_running_loop()
+        ticket = _Ticket(owner, loop.create_future())
+        self._queues.setdefault(owner, deque()).append(ticket)
+        self._notify()
+        reported = None
+        try:
+            while not ticket.granted.done():
+                ticket.wakeup = loop.create_future()
+                position = self._position(ticket)
+                if on_position is not None and position != reported:
+                    reported = position
+                    await on_position(position)
+                    if ticket.granted.done():
+                        break
+                await asyncio.wait([ticket.granted, ticket.wakeup], return_when=asyncio.FIRST_COMPLETED)
+        except BaseException:
+            if ticket.granted.done() and not ticket.granted.cancelled():
+                # Granted while being cancelled; hand the slot on
+                self.active -= 1
+                self._grant_next()
+            else:
+                ticket.granted.cancel()
+                self._discard(ticket)
+            raise
+
+    def _grant_next(self):
+        while self.active < self.max_concurrency and self._queues:
+            owner, queue = next(iter(self._queues.items()))
+            ticket = queue.popleft()
+            if queue:
+                self._queues.move_to_end(owner)
+            else:
+                del self._queues[owner]
+            if ticket.granted.done():
+                continue
+            ticket.granted.set_result(None)
+            self.active += 1
+        self._notify()
+
+    def _discard(self, ticket: _Ticket):
+        queue = self._queues.get(ticket.owner)
+        if queue is not None and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del self._queues[ticket.owner]
+            self._notify()
+
+    def _position(self, ticket: _Ticket) -> int:
+        """1-based place of `ticket` in round-robin grant order."""
+        queues = list(self._queues.values())
+        position = 0
+        for round_ in range(max(map(len, queues), default=0)):
+            for queue in queues:
+                if round_ < len(queue):
+                    position += 1
+                    if queue[round_] is ticket:
+                        return position
+        return position
+
+    def _notify(self):
+        for queue in self._queues.values():
+            for ticket in queue:
+                if ticket.wakeup is not None and not ticket.wakeup.done():
+                    ticket.wakeup.set_result(None)
+
+
+ai_scheduler = AIScheduler()
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import html
+import re
+from typing import Mapping
+
+from sqlalchemy import Connection, DateTime, Row, text
+
+SEARCH_TABLE = "document_fts"
+# rowid is the document id. Words are stemmed, so "detecting" finds "detects"
+CREATE_SEARCH_INDEX = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+    "USING fts5(text, tokenize = 'porter unicode61 remove_diacritics 2')"
+)
+DROP_SEARCH_INDEX = f"DROP TABLE IF EXISTS {SEARCH_TABLE}"
+
+SNIPPET_TOKENS = 16
+# Match markers in snippets. Control characters can't come from the indexed text, so
+# they survive escaping the snippet and are then swapped for <mark> tags
+MATCH_START, MATCH_END = "\x02", "\x03"
+
+HIDDEN_RE = re.compile(r"<(head|style|script)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+# Tags that separate words; other (inline) tags are removed without a gap
+BLOCK_TAG_RE = re.compile(r"</?(?:p|div|h[1-6]|li|ul|ol|br|tr|td|th|table|blockquote|section|pre)\b[^>]*>", re.IGNORECASE)
+TAG_RE = re.compile(r"<[^>]*>")
+CONTROL_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+SEARCH_SQL = text(f"""
+    SELECT document.id AS document_id, document.patent_entity_id, patent_entity.name AS patent_name,
+           document.revision, document.updated_at,
+           snippet({SEARCH_TABLE}, 0, :match_start, :match_end, '…', :snippet_tokens) AS snippet,
+           {SEARCH_TABLE}.rank AS rank
+    FROM {SEARCH_TABLE}
+    JOIN document ON document.id = {SEARCH_TABLE}.rowid
+    JOIN patent_entity ON patent_entity.id = document.patent_entity_id
+    WHERE {SEARCH_TABLE} MATCH :query AND (:patent_id IS NULL OR document.patent_entity_id = :patent_id)
+    ORDER BY {SEARCH_TABLE}.rank
+    LIMIT :limit OFFSET :offset
+""").columns(updated_at=DateTime)
+COUNT_SQL = text(f"""
+    SELECT count(*)
+    FROM {SEARCH_TABLE}
+    JOIN document ON document.id = {SEARCH_TABLE}.rowid
+    WHERE {SEARCH_TABLE} MATCH :query AND (:patent_id IS NULL OR document.patent_entity_id = :patent_id)
+""")
+
+
+def plain_text(source: str) -> str:
+    """The words of editor HTML, without markup, for indexing."""
+    source = HIDDEN_RE.sub(" ", source)
+    source = BLOCK_TAG_RE.sub(" ", source)
+    source = TAG_RE.sub("", source)
+    source = CONTROL_RE.sub(" ", html.unescape(source))
+    return " ".join(source.split())
+
+
+def match_query(terms: str) -> str:
+    """
+    An FTS5 query matching documents with every word of `terms`. Each word is
+    quoted, so user input can't use (or break on) the query syntax.
+    """
+    return " ".join('"' + word.replace('"', '""') + '"' for word in terms.split())
+
+
+def highlight(snippet: str) -> str:
+    """Escape a snippet for HTML, wrapping its matches in <mark>."""
+    return html.escape(snippet).replace(MATCH_START, "<mark>").replace(MATCH_END, "</mark>")
+
+
+def search_params(terms: str, patent_id: int | None, limit: int, offset: int) -> dict:
+    return {
+        "query": match_query(terms),
+        "patent_id": patent_id,
+        "limit": limit,
+        "offset": offset,
+        "match_start": MATCH_START,
+        "match_end": MATCH_END,
+        "snippet_tokens": SNIPPET_TOKENS,
+    }
+
+
+def search_page(rows: list[Row], total: int, limit: int, offset: int) -> dict:
+    """A SearchPage from the rows of SEARCH_SQL, run with one more than `limit` to find the next page."""
+    return {
+        "items": [{**row._mapping, "snippet": highlight(row.snippet)} for row in rows[:limit]],
+        "total": total,
+        "next_offset": offset + limit if len(rows) > limit else None,
+    }
+
+
+def has_search_index(conn: Connection) -> bool:
+    """Whether the DB has the index. Only SQLite does, and only once it's been created."""
+    if conn.dialect.name != "sqlite":
+        return False
+    if not conn.info.get(SEARCH_TABLE):  # Remembered per DBAPI connection once found
+        conn.info[SEARCH_TABLE] = conn.dialect.has_table(conn, SEARCH_TABLE)
+    return conn.info[SEARCH_TABLE]
+
+
+def index_contents(conn: Connection, contents: Mapping[int, str | None]):
+    """Index the content of each document id, or drop it from the index when None."""
+    if not contents:
+        return
+    removed = [(document_id,) for document_id, content in contents.items() if content is None]
+    if removed:
+        conn.exec_driver_sql(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = ?", removed)
+    rows = [(document_id, plain_text(content)) for document_id, content in contents.items() if content is not None]
+    if rows:  # REPLACE drops a document's old entry, so a save is one statement
+        conn.exec_driver_sql(f"INSERT OR REPLACE INTO {SEARCH_TABLE} (rowid, text) VALUES (?, ?)", rows)
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator, Callable
+
+from app.internal.scheduler import PositionCallback
+
+
+class Flight:
+    """
+    One in-flight AI stream that any number of waiters can follow.
+
+    Chunks are kept so that a waiter attaching late still sees the whole
+    stream. The underlying stream is cancelled only once every waiter has
+    gone away. The stream's queue position is kept too and passed on by each
+    waiter to its own callback, so a waiter whose client has gone can't fail
+    the stream for the others.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        start: Callable[[PositionCallback], AsyncIterator[str | None]],
+        on_done: Callable[[Flight], None],
+    ):
+        self.key = key
+        self.chunks: list[str] = []
+        self.position: int | None = None
+        self.done = False
+        self.abandoned = False
+        self.error: BaseException | None = None
+        self.waiters = 0
+        self._updated = asyncio.Event()
+        self._on_done = on_done
+        self._task = asyncio.create_task(self._pump(start(self._set_position)))
+
+    async def _pump(self, source: AsyncIterator[str | None]):
+        try:
+            async for chunk in source:
+                if chunk is None:
+                    break
+                self.chunks.append(chunk)
+                self._notify()
+        except asyncio.CancelledError:
+            self.error = asyncio.CancelledError()
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+            self._on_done(self)
+
+    async def _set_position(self, position: int):
+        self.position = position
+        self._notify()
+
+    def _notify(self):
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    async def follow(self, on_position: PositionCallback | None = None) -> AsyncIterator[str]:
+        self.waiters += 1
+        index = 0
+        reported = None
+        try:
+            while True:
+                while index < len(self.chunks):
+                    yield self.chunks[index]
+                    index += 1
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                if on_position is not None and not self.chunks and self.position not in (None, reported):
+                    # Raising here ends only this waiter
+                    reported = self.position
+                    await on_position(reported)
+                    continue
+                await self._updated.wait()
+        finally:
+            self.waiters -= 1
+            if self.waiters == 0 and not self.done:
+                self.abandoned = True
+                self._task.cancel()
+
+
+class SingleFlight:
+    """Process-wide registry that coalesces identical concurrent AI requests by key."""
+
+    def __init__(self):
+        self._flights: dict[str, Flight] = {}
+
+    def stream(
+        self,
+        key: str,
+        start: Callable[[PositionCallback], AsyncIterator[str | None]],
+        on_position: PositionCallback | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Follow the in-flight stream for `key`, calling `start` to begin one if
+        there is none. Like `AI.review_document`, minus the trailing None.
+
+        `start` is given the flight's own position callback to queue with;
+        `on_position` is told the position of the stream while it's queued.
+        """
+        flight = self._flights.get(key)
+        if flight is None or flight.abandoned:
+            flight = Flight(key, start, self._finished)
+            self._flights[key] = flight
+        return flight.follow(on_position)
+
+    def _finished(self, flight: Flight):
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+
+ai_flights = SingleFlight()
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+
+class IssueStreamParser:
+    """
+    Incremental scanner for a streamed `{"issues": [...]}` review.
+
+    Chunks are fed in as they arrive from the model; every time an object in
+    the top-level "issues" array is closed, its raw JSON text is returned so it
+    can be validated and forwarded before the rest of the review is generated.
+    Only the characters of the issue currently being read are retained.
+    """
+
+    def __init__(self, key: str = "issues"):
+        self.key = key
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string: list[str] | None = None  # Text of a string at depth 1 (a key, possibly)
+        self._last_string = ""
+        self._in_issues = False
+        self._current: list[str] | None = None
+
+    def feed(self, chunk: str) -> list[str]:
+        completed = []
+        for char in chunk:
+            if self._current is not None:
+                self._current.append(char)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._string is not None:
+                        self._last_string = "".join(self._string)
+                        self._string = None
+                    continue
+                if self._string is not None:
+                    self._string.append(char)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if len(self._stack) == 1:
+                    self._string = []
+            elif char in "{[":
+                if char == "[" and self._stack == ["{"] and self._last_string == self.key:
+                    self._in_issues = True
+                elif char == "{" and self._in_issues and len(self._stack) == 2:
+                    self._current = [char]
+                self._stack.append(char)
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if self._in_issues and len(self._stack) == 2 and char == "}" and self._current is not None:
+                    completed.append("".join(self._current))
+                    self._current = None
+                elif self._in_issues and len(self._stack) == 1:
+                    self._in_issues = False
+        return completed
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import os
+from typing import Any, AsyncIterator, Callable, Iterator
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.internal.db import to_schemas
+
+# Rows fetched, serialized and released at a time
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE") or 100)
+
+# Called with the session and each batch of rows before they're serialized
+Prepare = Callable[[Session, list[Any]], None]
+
+
+def iter_json_array(
+    db: Session,
+    stmt: Select,
+    schema: type[BaseModel],
+    prepare: Prepare | None = None,
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> Iterator[str]:
+    """
+    Serialize the ORM rows of `stmt` as a JSON array, one chunk per batch.
+
+    Rows are fetched `batch_size` at a time from an open cursor and dropped
+    from the session once written, so memory stays flat however many rows
+    there are. `prepare` can load what a whole batch reads in one go, such as
+    models.load_contents. The session is closed when the array is done.
+    """
+    try:
+        yield "["
+        first = True
+        for batch in db.scalars(stmt.execution_options(yield_per=batch_size)).partitions():
+            if prepare is not None:
+                prepare(db, batch)
+            parts = [schema.model_validate(row).model_dump_json() for row in batch]
+            for instance in list(db.identity_map.values()):
+                db.expunge(instance)  # expunge_all() would invalidate the open result
+            chunk = ",".join(parts)
+            yield chunk if first else "," + chunk
+            first = False
+        yield "]"
+    finally:
+        db.close()
+
+
+def stream_json_array(
+    db: Session, stmt: Select, schema: type[BaseModel], prepare: Prepare | None = None
+) -> StreamingResponse:
+    return StreamingResponse(iter_json_array(db, stmt, schema, prepare), media_type="application/json")
+
+
+async def aiter_json_array(
+    db: AsyncSession,
+    stmt: Select,
+    schema: type[BaseModel],
+    prepare: Prepare | None = None,
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> AsyncIterator[str]:
+    """iter_json_array for an AsyncSession, with `prepare` run in run_sync and each batch read through to_schemas."""
+    try:
+        yield "["
+        first = True
+        result = await db.stream_scalars(stmt.execution_options(yield_per=batch_size))
+        async for batch in result.partitions():
+            if prepare is not None:
+                await db.run_sync(prepare, batch)
+            parts = [item.model_dump_json() for item in await to_schemas(db, schema, batch)]
+            for instance in list(db.identity_map.values()):
+                db.expunge(instance)
+            chunk = ",".join(parts)
+            yield chunk if first else "," + chunk
+            first = False
+        yield "]"
+    finally:
+        await db.close()
+
+
+def astream_json_array(
+    db: AsyncSession, stmt: Select, schema: type[BaseModel], prepare: Prepare | None = None
+) -> StreamingResponse:
+    return StreamingResponse(aiter_json_array(db, stmt, schema, prepare), media_type="application/json")
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from typing import Iterable, Protocol
+
+
+class TextEdit(Protocol):
+    start: int
+    end: int
+    text: str
+
+
+def apply_edits(content: str, edits: Iterable[TextEdit]) -> str:
+    """
+    Replace each edit's [start, end) span of `content` with its text.
+
+    Offsets are in characters of the original `content`, so edits don't
+    shift each other; they must not overlap. Raises ValueError otherwise.
+    """
+    parts = []
+    position = 0
+    for edit in sorted(edits, key=lambda edit: (edit.start, edit.end)):
+        if edit.start > edit.end:
+            raise ValueError(f"Edit starts after it ends ({edit.start} > {edit.end})")
+        if edit.start < position:
+            raise ValueError(f"Edit at {edit.start} overlaps the previous edit, which ends at {position}")
+        if edit.end > len(content):
+            raise ValueError(f"Edit ends at {edit.end}, past the end of the content ({len(content)})")
+        parts.append(content[position:edit.start])
+        parts.append(edit.text)
+        position = edit.end
+    parts.append(content[position:])
+    return "".join(parts)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import difflib
+import json
+import os
+import re
+
+SNAPSHOT_INTERVAL = int(os.getenv("SNAPSHOT_INTERVAL") or 20)
+# A delta bigger than this fraction of the full text isn't worth storing
+MAX_DELTA_RATIO = 0.5
+
+# Editor HTML is often a single line, so diff on words and tags rather than lines
+TOKEN_RE = re.compile(r"[^>\s]*(?:>|\s+)|[^>\s]+")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(text)
+
+
+def encode_delta(base: str, target: str) -> str:
+    """
+    Encode `target` as edits against `base`.
+
+    The delta is a JSON list of operations over `base`'s tokens: a positive
+    int copies that many tokens, a negative int skips that many, and a string
+    is inserted as-is.
+    """
+    return encode_token_delta(tokenize(base), tokenize(target))
+
+
+def encode_token_delta(base_tokens: list[str], target_tokens: list[str]) -> str:
+    """encode_delta for already tokenized texts."""
+    # Edits are usually local: only diff what lies between the common prefix and suffix
+    limit = min(len(base_tokens), len(target_tokens))
+    prefix = 0
+    while prefix < limit and base_tokens[prefix] == target_tokens[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and base_tokens[-1 - suffix] == target_tokens[-1 - suffix]:
+        suffix += 1
+
+    ops: list[int | str] = [prefix] if prefix else []
+    matcher = difflib.SequenceMatcher(
+        None,
+        base_tokens[prefix:len(base_tokens) - suffix],
+        target_tokens[prefix:len(target_tokens) - suffix],
+        autojunk=False,
+    )
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append("".join(matcher.b[j1:j2]))
+    if suffix:
+        ops.append(suffix)
+    return json.dumps(ops, separators=(",", ":"))
+
+
+def apply_delta(base: str, delta: str) -> str:
+    """Rebuild the text `delta` was encoded from, given the same `base`."""
+    return "".join(apply_token_delta(tokenize(base), delta))
+
+
+def apply_token_delta(base_tokens: list[str], delta: str) -> list[str]:
+    """
+    apply_delta for an already tokenized base, giving the rebuilt text's tokens.
+    Inserts are whole tokens of the encoded text, so only they are tokenized.
+    """
+    position = 0
+    tokens = []
+    for op in json.loads(delta):
+        if isinstance(op, str):
+            tokens.extend(tokenize(op))
+        elif op > 0:
+            tokens.extend(base_tokens[position:position + op])
+            position += op
+        else:
+            position -= op
+    return tokens
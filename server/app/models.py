@@ -1,18 +1,93 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    DDL, Column, Integer, String, ForeignKey, DateTime, Index, bindparam, delete, event, exists, inspect, insert,
+    literal_column, null, select,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import InstanceState, Session, SessionTransaction, aliased, deferred, object_session, relationship
+from sqlalchemy.orm.attributes import flag_modified
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from typing import Iterable
 
+from app.internal.blobs import blob_store, content_hash
+from app.internal.compression import CompressedText
 from app.internal.db import Base
+from app.internal.search import CREATE_SEARCH_INDEX, DROP_SEARCH_INDEX, has_search_index, index_contents
+from app.internal.versioning import MAX_DELTA_RATIO, SNAPSHOT_INTERVAL, apply_delta, apply_token_delta, encode_token_delta, tokenize
+
+
+class Blob(Base):
+    """Document body keyed by its sha256. Kept in the file blob store when one is configured."""
+    __tablename__ = "blob"
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(Integer, nullable=False)
+    # None when the body lives in the file blob store. Deferred, so it's only read and decompressed when used
+    content = deferred(Column(CompressedText, nullable=True))
+
+    @property
+    def text(self) -> str:
+        if self.content is not None:
+            return self.content
+        return blob_store.read(self.sha256)
 
 
 class Document(Base):
     __tablename__ = "document"
+    __table_args__ = (
+        # Versions of a patent in order: first/latest lookups and version pages
+        Index("ix_document_patent_entity_id_id", "patent_entity_id", "id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
-    content = Column(String)
+    content_hash = Column(String(64), nullable=False)  # sha256 of the full content
+    # A version is either a full snapshot or a delta against the previous version (base)
+    snapshot_hash = Column(String(64), ForeignKey("blob.sha256"), nullable=True, index=True)  # Blob reference checks
+    base_id = Column(Integer, ForeignKey("document.id"), nullable=True, index=True)  # Successor lookups on save/delete
+    delta = Column(CompressedText, nullable=True)
+    chain_depth = Column(Integer, nullable=False, default=0)  # Deltas between this version and its snapshot
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    # Bumped by each save that changes the document. Every UPDATE is made conditional on it, so a
+    # save based on an older revision matches no row and is rejected instead of overwriting
+    revision = Column(Integer, nullable=False, default=1)
     patent_entity_id = Column(Integer, ForeignKey("patent_entity.id"), nullable=False)
     patent_entity = relationship("PatentEntity", back_populates="documents")
+    base = relationship("Document", remote_side=[id])
+    snapshot = relationship("Blob")
+
+    # Re-encoding a successor's delta isn't a save, so revisions are only bumped explicitly
+    __mapper_args__ = {"version_id_col": revision, "version_id_generator": False}
+
+    @property
+    def content(self) -> str:
+        pending = self.__dict__.get("_pending_content")
+        if pending is not None:
+            return pending
+        cached = self.__dict__.get("_content")
+        if cached is not None:
+            return cached
+        # Follow the links already in memory, then read the rest of the chain in one query
+        deltas = []
+        version = self
+        while version.snapshot_hash is None and ("base" in version.__dict__ or not _chain_readable(version)):
+            deltas.append(version.delta)
+            version = version.base
+        if version.snapshot_hash is None or ("snapshot" not in version.__dict__ and _chain_readable(version)):
+            content = _read_chain(object_session(version), version.id)
+        else:
+            content = version.snapshot.text
+        for delta in reversed(deltas):
+            content = apply_delta(content, delta)
+        self.__dict__["_content"] = content  # Until the row is expired or refreshed
+        return content
+
+    @content.setter
+    def content(self, value: str):
+        # Encoded into snapshot/delta at flush time, see _encode_document_content
+        self.__dict__.pop("_content", None)
+        self.__dict__["_pending_content"] = value
+        if inspect(self).persistent:
+            self.delta  # Load it so it can be flagged
+            flag_modified(self, "delta")
 
 
 class PatentEntity(Base):
@@ -20,4 +95,336 @@ class PatentEntity(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     documents = relationship("Document", back_populates="patent_entity")
-    
\ No newline at end of file
+
+
+def _chain_query():
+    """Every version from the one with id :document_id down to its snapshot, with the snapshot's body."""
+    chain = (
+        select(Document.id, Document.base_id, Document.delta, Document.snapshot_hash, literal_column("0").label("depth"))
+        .where(Document.id == bindparam("document_id"))
+        .cte("chain", recursive=True)
+    )
+    base = aliased(Document)
+    chain = chain.union_all(
+        select(base.id, base.base_id, base.delta, base.snapshot_hash, chain.c.depth + literal_column("1"))
+        .join(chain, base.id == chain.c.base_id)
+    )
+    return (
+        select(chain.c.depth, chain.c.delta, chain.c.snapshot_hash, Blob.content, chain.c.id)
+        .outerjoin(Blob, Blob.sha256 == chain.c.snapshot_hash)
+    )
+
+
+CHAIN = _chain_query()
+# CHAIN, then the versions built on :document_id at depth -1: everything a save of it reads
+NEIGHBOURS = CHAIN.union_all(
+    select(literal_column("-1"), Document.delta, Document.snapshot_hash, null(), Document.id)
+    .where(Document.base_id == bindparam("document_id"))
+)
+
+
+def _chains_query():
+    """The versions with ids in :document_ids and every version below them down to their snapshots."""
+    chain = (
+        select(Document.id, Document.base_id, Document.delta, Document.snapshot_hash)
+        .where(Document.id.in_(bindparam("document_ids", expanding=True)))
+        .cte("chain", recursive=True)
+    )
+    base = aliased(Document)
+    chain = chain.union(  # Not UNION ALL: versions of a patent share the links below them
+        select(base.id, base.base_id, base.delta, base.snapshot_hash)
+        .join(chain, base.id == chain.c.base_id)
+    )
+    return (
+        select(chain.c.id, chain.c.base_id, chain.c.delta, chain.c.snapshot_hash, Blob.content)
+        .outerjoin(Blob, Blob.sha256 == chain.c.snapshot_hash)
+    )
+
+
+CHAINS = _chains_query()
+
+
+@event.listens_for(Document, "expire", raw=True)
+@event.listens_for(Document, "refresh", raw=True)
+def _forget_content(state: InstanceState, *args):
+    """Drop the decoded content along with the columns it came from."""
+    state.dict.pop("_content", None)
+
+
+def _chain_readable(document: Document) -> bool:
+    """
+    Whether the DB holds `document`'s chain as the session sees it: not while
+    versions re-encoded by this session are waiting to be flushed.
+    """
+    session = object_session(document)
+    return session is not None and inspect(document).persistent and not session.info.get("reencoded")
+
+
+def _snapshot_text(row) -> str:
+    """The body of a chain row's snapshot, read from the file blob store when it isn't in the row."""
+    return row.content if row.content is not None else blob_store.read(row.snapshot_hash)
+
+
+def _read_chain(session: Session, document_id: int) -> str:
+    """A version's content, with its delta chain and snapshot read in one query rather than one per link."""
+    snapshot, *deltas = sorted(session.execute(CHAIN, {"document_id": document_id}), key=lambda row: -row.depth)
+    content = _snapshot_text(snapshot)
+    for row in deltas:
+        content = apply_delta(content, row.delta)
+    return content
+
+
+def load_contents(session: Session, documents: Iterable[Document]):
+    """
+    Decode the content of many versions at once, for lists. Their chains are
+    read in one query and each version is rebuilt from the one below it, as
+    bulk.Exporter does, rather than with a chain query per version.
+    """
+    documents = [
+        document for document in documents
+        if "_content" not in document.__dict__ and "_pending_content" not in document.__dict__
+        and _chain_readable(document)
+    ]
+    if not documents:
+        return
+    rows = {row.id: row for row in session.execute(CHAINS, {"document_ids": [document.id for document in documents]})}
+    tokens: dict[int, list[str]] = {}  # Each version's tokens, what the deltas above it apply to
+    for document in documents:
+        links, document_id = [], document.id
+        while document_id not in tokens:
+            row = rows[document_id]
+            if row.snapshot_hash is not None:
+                tokens[document_id] = tokenize(_snapshot_text(row))
+                break
+            links.append(row)
+            document_id = row.base_id
+        for row in reversed(links):
+            tokens[row.id] = apply_token_delta(tokens[row.base_id], row.delta)
+        document.__dict__["_content"] = "".join(tokens[document.id])
+
+
+@dataclass
+class _Version:
+    """A version to encode another against: its id, chain depth and tokens."""
+    id: int
+    chain_depth: int
+    tokens: list[str]
+
+
+def _store_blob(session: Session, content: str) -> str:
+    """
+    The sha256 of the blob holding `content`, inserted (and written to the file
+    store) only if it's new. On SQLite that's one INSERT ... ON CONFLICT DO NOTHING.
+    """
+    digest = content_hash(content)
+    row = {"sha256": digest, "size": len(content), "content": None if blob_store else content}
+    conn = session.connection()
+    if conn.dialect.name == "sqlite":
+        inserted = conn.execute(sqlite_insert(Blob).on_conflict_do_nothing(), row).rowcount
+    else:
+        inserted = session.get(Blob, digest) is None
+        if inserted:
+            conn.execute(insert(Blob), row)
+    if inserted and blob_store is not None:
+        blob_store.write(digest, content)
+        session.info.setdefault("written_blobs", set()).add(digest)  # Removed if this transaction doesn't commit
+    return digest
+
+
+def _release_blob(session: Session, digest: str | None):
+    """Note a snapshot a version stopped pointing at, to delete after the flush if no other version does."""
+    if digest is not None:
+        session.info.setdefault("released_blobs", set()).add(digest)
+
+
+def _link(session: Session, document: Document, **columns):
+    """
+    Set `document`'s storage columns by key, dropping the base and snapshot
+    objects loaded for the links it had, which would otherwise be written back.
+    """
+    persistent = inspect(document).persistent
+    loaded = [name for name in ("base", "snapshot") if name in document.__dict__]
+    if loaded and persistent:
+        session.expire(document, loaded)
+    if persistent and document.snapshot_hash != columns["snapshot_hash"]:
+        _release_blob(session, document.snapshot_hash)
+    for name, value in columns.items():
+        setattr(document, name, value)
+
+
+def _encode(session: Session, document: Document, content: str, base: Document | None):
+    """Store `content` as a delta against `base` when that's worthwhile, otherwise as a snapshot."""
+    if base is not None and base.chain_depth + 1 < SNAPSHOT_INTERVAL:
+        base = _Version(base.id, base.chain_depth, tokenize(base.content))
+    else:
+        base = None
+    _encode_tokens(session, document, content, None, base)
+
+
+def _encode_tokens(
+    session: Session, document: Document, content: str, tokens: list[str] | None, base: _Version | None
+):
+    """_encode against a tokenized base. Without its `tokens`, `content` is only tokenized if a delta is tried."""
+    session.info.setdefault("reencoded", set()).add(document)  # Until flushed, see _chain_readable
+    if base is not None and base.chain_depth + 1 < SNAPSHOT_INTERVAL:
+        delta = encode_token_delta(base.tokens, tokens if tokens is not None else tokenize(content))
+        if len(delta) <= len(content) * MAX_DELTA_RATIO:
+            _link(session, document, base_id=base.id, delta=delta, snapshot_hash=None, chain_depth=base.chain_depth + 1)
+            return
+    _link(session, document, base_id=None, delta=None, snapshot_hash=_store_blob(session, content), chain_depth=0)
+
+
+def _successors(session: Session, document: Document) -> list[Document]:
+    if document.id is None:
+        return []
+    return list(session.scalars(select(Document).where(Document.base_id == document.id)))
+
+
+def _store_content(session: Session, document: Document, content: str):
+    """
+    Store a version as a delta against the previous version of its patent,
+    with a full snapshot every SNAPSHOT_INTERVAL versions (or when the delta
+    would be too large), so reading any version applies a bounded number of
+    deltas. Rewriting a version re-encodes the version built on top of it.
+    """
+    if document.id is None:
+        latest = session.scalars(
+            select(Document)
+            .where(Document.patent_entity_id == document.patent_entity_id)
+            .order_by(Document.id.desc())
+            .limit(1)
+        ).first()
+        document.content_hash = content_hash(content)
+        _encode(session, document, content, latest)
+        document.__dict__["_content"] = content
+        session.info.setdefault("search_index", {})[document] = content
+        return
+    if content_hash(content) == document.content_hash:
+        return  # Unchanged; nothing to write
+    session.info.setdefault("search_index", {})[document] = content
+    document.content_hash = content_hash(content)
+    if _chain_readable(document):
+        _rewrite(session, document, content)
+    else:  # Versions re-encoded earlier in this flush aren't written yet, so go through the objects
+        successors = [(successor, successor.content) for successor in _successors(session, document)]
+        _encode(session, document, content, document.base)
+        document.__dict__["_pending_content"] = content  # Successors are encoded against the new content
+        for successor, successor_content in successors:
+            _encode(session, successor, successor_content, document)
+        del document.__dict__["_pending_content"]
+    document.__dict__["_content"] = content
+
+
+def _rewrite(session: Session, document: Document, content: str):
+    """
+    Re-encode a saved version and the versions built on it, from one NEIGHBOURS
+    query rather than a read of the successors, the base object and its chain.
+    """
+    rows = sorted(session.execute(NEIGHBOURS, {"document_id": document.id}), key=lambda row: -row.depth)
+    chain = [row for row in rows if row.depth >= 0]  # From the snapshot up to the document
+    successors = [row for row in rows if row.depth < 0]
+    tokens: dict[int, list[str]] = {}  # Depth -> that version's tokens
+    # The document's own (old) content is only rebuilt when its successors need it
+    for row in chain if successors else chain[:-1]:
+        if row.snapshot_hash is not None:
+            tokens[row.depth] = tokenize(_snapshot_text(row))
+        else:
+            tokens[row.depth] = apply_token_delta(tokens[row.depth + 1], row.delta)
+    base = _Version(document.base_id, document.chain_depth - 1, tokens[1]) if 1 in tokens else None
+    target = tokenize(content) if base is not None or successors else None
+    _encode_tokens(session, document, content, target, base)
+    if not successors:
+        return
+    objects = {
+        successor.id: successor
+        for successor in session.scalars(select(Document).where(Document.id.in_([row.id for row in successors])))
+    }
+    for row in successors:
+        successor_tokens = apply_token_delta(tokens[0], row.delta)
+        version = _Version(document.id, document.chain_depth, target)
+        _encode_tokens(session, objects[row.id], "".join(successor_tokens), successor_tokens, version)
+
+
+def _unlink(session: Session, document: Document):
+    """Re-encode the versions built on a deleted version against its base."""
+    for successor in _successors(session, document):
+        successor_content = successor.content
+        _encode(session, successor, successor_content, document.base)
+
+
+@event.listens_for(Session, "before_flush")
+def _encode_document_content(session: Session, flush_context, instances):
+    with session.no_autoflush:
+        for document in list(session.new) + list(session.dirty):
+            if isinstance(document, Document) and "_pending_content" in document.__dict__:
+                _store_content(session, document, document.__dict__.pop("_pending_content"))
+        for document in list(session.deleted):
+            if isinstance(document, Document):
+                _unlink(session, document)
+                _release_blob(session, document.snapshot_hash)
+                session.info.setdefault("search_index", {})[document] = None
+
+
+@event.listens_for(Session, "after_flush")
+def _index_document_content(session: Session, flush_context):
+    """Keep the full-text index in step with the content written by this flush, in the same transaction."""
+    session.info.pop("reencoded", None)  # Written now, see _chain_readable
+    changes = session.info.pop("search_index", None)
+    if changes and has_search_index(session.connection()):
+        index_contents(session.connection(), {document.id: content for document, content in changes.items()})
+
+
+@event.listens_for(Session, "after_flush")
+def _delete_released_blobs(session: Session, flush_context):
+    """
+    Delete the blobs that versions stopped pointing at in this flush, unless
+    another version still does. Their files are discarded now, and purged or
+    restored with the transaction.
+    """
+    released = session.info.pop("released_blobs", None)
+    if not released:
+        return
+    unreferenced = delete(Blob).where(
+        Blob.sha256.in_(released), ~exists().where(Document.snapshot_hash == Blob.sha256)
+    )
+    if blob_store is None:
+        session.connection().execute(unreferenced)
+        return
+    for digest in session.connection().execute(unreferenced.returning(Blob.sha256)).scalars():
+        blob_store.discard(digest)
+        session.info.setdefault("discarded_blobs", set()).add(digest)
+
+
+@event.listens_for(Session, "after_commit")
+def _purge_discarded_blobs(session: Session):
+    session.info.pop("written_blobs", None)
+    for digest in session.info.pop("discarded_blobs", ()):
+        blob_store.purge(digest)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _restore_discarded_blobs(session: Session, transaction: SessionTransaction):
+    """Undo the file changes of a transaction that ended without committing."""
+    if transaction.parent is not None:
+        return
+    session.info.pop("released_blobs", None)
+    for digest in session.info.pop("discarded_blobs", ()):
+        blob_store.restore(digest)
+    for digest in session.info.pop("written_blobs", ()):
+        blob_store.remove(digest)
+
+
+def build_search_index(session: Session):
+    """Create the full-text index on SQLite DBs that predate it, indexing every version."""
+    conn = session.connection()
+    if conn.dialect.name != "sqlite" or has_search_index(conn):
+        return
+    conn.exec_driver_sql(CREATE_SEARCH_INDEX)
+    for batch in session.scalars(select(Document).execution_options(yield_per=500)).partitions():
+        index_contents(conn, {document.id: document.content for document in batch})
+    session.commit()
+
+
+# Created and dropped along with the document table, on SQLite only
+event.listen(Document.__table__, "after_create", DDL(CREATE_SEARCH_INDEX).execute_if(dialect="sqlite"))
+event.listen(Document.__table__, "before_drop", DDL(DROP_SEARCH_INDEX).execute_if(dialect="sqlite"))
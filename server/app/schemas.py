@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict, Field
-from typing import Literal
+from typing import Annotated, Literal
 from datetime import datetime
 
 
@@ -12,10 +12,15 @@ class DocumentRead(DocumentBase):
     model_config = ConfigDict(from_attributes=True)
 
     id: int
+    revision: int
     created_at: datetime
     updated_at: datetime
 
 
+class DocumentSave(DocumentBase):
+    revision: int | None = None  # The revision the edit was based on; a stale one is rejected with 409
+
+
 class DocumentUpdate(BaseModel):
     documentId: int
     content: str
@@ -31,6 +36,7 @@ class DocumentRead(DocumentBase):
     model_config = ConfigDict(from_attributes=True)
 
     id: int
+    revision: int
     created_at: datetime
     updated_at: datetime
 
@@ -42,6 +48,106 @@ class DocumentUpdate(BaseModel):
     patent_entity_id: int
 
 
+class TextEdit(BaseModel):
+    # Offsets into the base revision's content, in characters (code points, not UTF-16 units)
+    start: int = Field(..., ge=0)
+    end: int = Field(..., ge=0)
+    text: str = ""  # Replaces content[start:end]; empty to delete
+
+
+class DocumentPatch(BaseModel):
+    revision: int  # The revision the edits were made against; a stale one is rejected with 409
+    edits: list[TextEdit]
+
+
+class DocumentRevision(BaseModel):
+    """What a patch changed, without echoing the body back"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    revision: int
+    content_hash: str  # sha256 of the new content, for the client to check its copy against
+    updated_at: datetime
+
+
+class DocumentSummary(BaseModel):
+    """A version without its body, for listing"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    patent_entity_id: int
+    created_at: datetime
+    updated_at: datetime
+
+
+class DocumentPage(BaseModel):
+    items: list[DocumentSummary]
+    total: int  # Versions of the patent, across all pages
+    next_cursor: int | None = None  # Pass as `cursor` to get the next (older) page
+
+
+class SearchHit(BaseModel):
+    """A version whose text matches a search"""
+    patent_entity_id: int
+    patent_name: str
+    document_id: int
+    revision: int
+    updated_at: datetime
+    snippet: str  # HTML-escaped plain text around the matches, which are wrapped in <mark>
+    rank: float  # bm25 score; lower is a better match
+
+
+class SearchPage(BaseModel):
+    items: list[SearchHit]  # Best matches first
+    total: int  # Matching versions, across all pages
+    next_offset: int | None = None  # Pass as `offset` to get the next page
+
+
+VersionEventKind = Literal["version_created", "version_saved", "patent_created"]
+
+
+class VersionEvent(BaseModel):
+    """A patent's documents changed; refetch if `revision` of `document_id` is newer than yours"""
+    kind: VersionEventKind
+    patent_id: int
+    document_id: int
+    revision: int
+
+
+class VersionEvents(BaseModel):
+    events: list[VersionEvent]  # At most one per patent, the latest
+
+
+class VersionSubscription(BaseModel):
+    patent_ids: list[int] | None = None  # Patents to follow; all of them when omitted
+
+
+class PatentRecord(BaseModel):
+    """A patent line of a bulk NDJSON import/export"""
+    type: Literal["patent"]
+    id: int  # Document lines refer to the patent by this id; imported patents get new ids
+    name: str = Field(..., min_length=1)
+
+
+class DocumentRecord(BaseModel):
+    """A version line of a bulk NDJSON import/export, in version order within its patent"""
+    type: Literal["document"]
+    id: int | None = None  # Informational; imported versions get new ids
+    patent_entity_id: int  # A patent line earlier in the file, otherwise an existing patent
+    content: str
+    revision: int = Field(1, ge=1)
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+
+
+BulkRecord = Annotated[PatentRecord | DocumentRecord, Field(discriminator="type")]
+
+
+class ImportResult(BaseModel):
+    patents: int  # Patents created
+    documents: int  # Versions created
+
+
 class PatentEntityBase(BaseModel):
     name: str = Field(..., min_length=1, description="Patent entity name cannot be empty")
 
@@ -71,8 +177,17 @@ class Suggestions(BaseModel):
 class SuggestionsRequest(BaseModel):
     content: str
     request_id: int
+    document_id: int | None = None  # Channel key; requests without one share a channel
 
 
 class SuggestionsResponse(BaseModel):
     suggestions: Suggestions
-    request_id: int
\ No newline at end of file
+    request_id: int
+    # "partial" frames carry only newly found issues; the "complete" frame carries all of them
+    status: Literal["partial", "complete"] = "complete"
+
+
+class QueueStatusResponse(BaseModel):
+    request_id: int
+    status: Literal["queued"] = "queued"
+    position: int  # 1-based place in the AI scheduler queue
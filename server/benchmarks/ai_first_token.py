@@ -0,0 +1,119 @@
+"""
+Time to first token of a review on a new /ws connection.
+
+Runs reviews against a local stand-in for the OpenAI streaming API and times
+each from the start of the connection (when the route's AI dependency is
+resolved) to the first content chunk:
+
+    python -m benchmarks.ai_first_token --connections 50 --concurrency 5 --handshake-ms 60
+
+"per connection" is the original setup: every websocket builds its own
+AI and AsyncOpenAI, so each review pays for a new client and a new HTTP
+connection. "shared" is the app-scoped, pooled client from ai_client. The
+stand-in speaks plain HTTP on localhost, so the TCP and TLS handshakes to the
+real API are simulated by delaying the first response on each new connection
+by --handshake-ms.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from benchmarks.ws_load import percentile
+
+
+def chunked(data: bytes) -> bytes:
+    return f"{len(data):x}\r\n".encode() + data + b"\r\n"
+
+
+def sse(content: str | None) -> bytes:
+    chunk = {
+        "id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": 0, "model": "bench",
+        "choices": [{"index": 0, "delta": {"content": content} if content else {}, "finish_reason": None if content else "stop"}],
+    }
+    return chunked(f"data: {json.dumps(chunk)}\n\n".encode())
+
+
+async def serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, handshake: float, first_token: float):
+    await asyncio.sleep(handshake)  # Once per connection, like TCP + TLS setup
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = next(
+                (int(line.split(b":")[1]) for line in head.split(b"\r\n") if line.lower().startswith(b"content-length")), 0
+            )
+            await reader.readexactly(length)
+            if head.startswith(b"HEAD"):
+                writer.write(b"HTTP/1.1 200 OK\r\ncontent-length: 0\r\n\r\n")
+                continue
+            writer.write(b"HTTP/1.1 200 OK\r\ncontent-type: text/event-stream\r\ntransfer-encoding: chunked\r\n\r\n")
+            await asyncio.sleep(first_token)
+            for part in ('{"issues": ', "[]", "}", None):
+                writer.write(sse(part))
+            writer.write(chunked(b"data: [DONE]\n\n") + b"0\r\n\r\n")
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def first_token(get_ai) -> float:
+    started = time.perf_counter()
+    ai = await asyncio.to_thread(get_ai)  # As the /ws route's sync dependency is resolved
+    latency = None
+    async for chunk in ai.review_document("1. A device."):  # Read to the end, which releases the connection
+        if chunk and latency is None:
+            latency = time.perf_counter() - started
+    return latency
+
+
+async def run(name: str, get_ai, connections: int, concurrency: int, close=None):
+    latencies = []
+    for _ in range(connections // concurrency):
+        latencies += await asyncio.gather(*(first_token(get_ai) for _ in range(concurrency)))
+    if close is not None:
+        await close()
+    print(f"{name:>14}: p50={percentile(latencies, 50) * 1000:6.1f}ms  p95={percentile(latencies, 95) * 1000:6.1f}ms  "
+          f"max={max(latencies) * 1000:6.1f}ms")
+
+
+async def main(args):
+    server = await asyncio.start_server(
+        lambda r, w: serve(r, w, args.handshake_ms / 1000, args.first_token_ms / 1000), "127.0.0.1", 0
+    )
+    port = server.sockets[0].getsockname()[1]
+    os.environ.update(OPENAI_API_KEY="bench", OPENAI_MODEL="bench", OPENAI_BASE_URL=f"http://127.0.0.1:{port}/v1")
+
+    from app.internal.ai import get_ai
+    from app.internal.ai_client import SharedAI
+
+    clients = []
+
+    def per_connection():
+        clients.append(get_ai())
+        return clients[-1]
+
+    async def close_all():
+        await asyncio.gather(*(ai._client.close() for ai in clients))
+
+    await run("per connection", per_connection, args.connections, args.concurrency, close_all)
+
+    shared = SharedAI()
+    if args.warmup:
+        await shared.warm(args.concurrency)
+    await run("shared", shared.get, args.connections, args.concurrency, shared.aclose)
+    server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=5, help="Connections opened at once")
+    parser.add_argument("--handshake-ms", type=float, default=60.0)
+    parser.add_argument("--first-token-ms", type=float, default=100.0, help="Model latency before the first chunk")
+    parser.add_argument("--warmup", action="store_true", help="Warm the shared client's connections first")
+    asyncio.run(main(parser.parse_args()))
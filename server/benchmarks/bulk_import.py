@@ -0,0 +1,93 @@
+"""
+Bulk NDJSON import and export of version histories.
+
+Builds an NDJSON file of patents, each with a history of small edits to a
+seed document, then times importing it through POST /patent_entity/import
+and exporting it back through GET /patent_entity/export, in process, on a
+file-backed DB:
+
+    python -m benchmarks.bulk_import --patents 100 --versions 1000
+
+"one by one" times the same versions created with one request each, as
+create_patent_entity and create_new_document_version are used without the
+bulk routes (on --one-by-one versions, and extrapolated).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.__main__ import app
+from app.internal.data import DOCUMENT_1
+from app.internal.db import Base, create_db_engine, get_db
+
+
+def history(patents: int, versions: int) -> bytes:
+    lines = []
+    for patent_id in range(1, patents + 1):
+        lines.append({"type": "patent", "id": patent_id, "name": f"Patent {patent_id}"})
+        for i in range(versions):
+            content = DOCUMENT_1.replace("</p>", f" (edit {i})</p>", 1)
+            lines.append({"type": "document", "patent_entity_id": patent_id, "content": content})
+    return "".join(json.dumps(line) + "\n" for line in lines).encode()
+
+
+def client_for(url: str) -> TestClient:
+    engine = create_db_engine(url)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return TestClient(app)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patents", type=int, default=100)
+    parser.add_argument("--versions", type=int, default=1000, help="Versions per patent")
+    parser.add_argument("--one-by-one", type=int, default=500, help="Versions to time creating one request each")
+    args = parser.parse_args()
+    total = args.patents * args.versions
+
+    body = history(args.patents, args.versions)
+    print(f"{total} versions, {len(body) / 1e6:.1f} MB of NDJSON")
+    with tempfile.TemporaryDirectory() as directory:
+        client = client_for(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+
+        started = time.perf_counter()
+        response = client.post("/patent_entity/import", content=body)
+        elapsed = time.perf_counter() - started
+        response.raise_for_status()
+        print(f"import:     {elapsed:6.1f}s  {total / elapsed:8.0f} versions/s  {response.json()}")
+
+        started = time.perf_counter()
+        exported = client.get("/patent_entity/export")
+        elapsed = time.perf_counter() - started
+        print(f"export:     {elapsed:6.1f}s  {total / elapsed:8.0f} versions/s  {len(exported.content) / 1e6:.1f} MB")
+
+        patent_id = client.post("/patent_entity/", json={"name": "One by one"}).json()["entity"]["id"]
+        started = time.perf_counter()
+        for i in range(args.one_by_one):
+            content = DOCUMENT_1.replace("</p>", f" (edit {i})</p>", 1)
+            client.post(f"/document/patent/{patent_id}/new-version", json={"content": content, "patent_entity_id": patent_id})
+        elapsed = time.perf_counter() - started
+        rate = args.one_by_one / elapsed
+        print(f"one by one: {elapsed:6.1f}s  {rate:8.0f} versions/s  (~{total / rate / 60:.0f} min for {total})")
+    app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Claims extraction benchmark on ~1 MB patent specifications.
+
+Compares the regex tag stripping the /ws handler used to run over the whole
+document with `extract_claims`, which returns only the Claims section (and
+its paragraph offsets).
+
+    python -m benchmarks.claims_extract --size-mb 1 --repeat 20
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import time
+
+from app.internal.claims import extract_claims
+from app.internal.data import DOCUMENT_1
+
+DESCRIPTION_PARAGRAPH = (
+    "<p>In some embodiments, the <em>light transducing materials</em> are disposed within a "
+    "biocompatible body &amp; emit visible light when irradiated with near-infrared radiation.</p>\n"
+)
+
+
+def build_specification(size_bytes: int) -> str:
+    """DOCUMENT_1 with a description section padded until the whole document is `size_bytes` long."""
+    head, body = DOCUMENT_1.split("<body>", 1)
+    filler = []
+    while len(DOCUMENT_1) + sum(map(len, filler)) < size_bytes:
+        filler.append(DESCRIPTION_PARAGRAPH)
+    description = "<h1>Detailed Description</h1>\n" + "".join(filler)
+    return f"{head}<body>\n{description}{body}"
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    spec = build_specification(int(args.size_mb * 1024 * 1024))
+    stripped = re.sub(r"<[^>]*>", "", spec)
+    claims = extract_claims(spec)
+
+    regex = timed(lambda: re.sub(r"<[^>]*>", "", spec), args.repeat)
+    extractor = timed(lambda: extract_claims(spec), args.repeat)
+    print(f"document: {len(spec) / 1024:.0f} KiB, {len(claims.paragraphs)} claim paragraphs")
+    print(f"regex strip:    {regex * 1000:8.2f} ms  -> {len(stripped) / 1024:.0f} KiB sent to the model")
+    print(f"extract_claims: {extractor * 1000:8.2f} ms  -> {len(claims.text) / 1024:.1f} KiB sent to the model")
+
+
+if __name__ == "__main__":
+    main()
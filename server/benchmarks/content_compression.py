@@ -0,0 +1,89 @@
+"""
+Read/write latency against on-disk size for compressed document bodies.
+
+Writes N edited versions of the seed documents into a file-backed SQLite
+table as plain text, as zlib, and as zlib with the trained dictionary, then
+reports the database size and the time to insert and to read every row back.
+
+    python -m benchmarks.content_compression --rows 2000
+
+The dictionary shipped in app/internal/content.zdict is trained on the seed
+documents; retrain it with --write-dictionary (existing rows stay readable
+only while the old dictionary is kept in compression.DICTIONARIES).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert, select
+
+from app.internal.compression import DICTIONARY_PATH, CompressedText, compress, train_dictionary
+from app.internal.data import DOCUMENT_1, DOCUMENT_2
+
+
+class ZlibText(CompressedText):
+    """CompressedText without the preset dictionary, for comparison"""
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return value if value is None else compress(value, dictionary=None)
+
+
+def versions(rows: int) -> list[str]:
+    """Autosave-like bodies: the seed documents with one claim edited per version"""
+    bodies = []
+    for i in range(rows):
+        document = DOCUMENT_1 if i % 2 == 0 else DOCUMENT_2
+        bodies.append(document.replace("</p>", f" (revision {i})</p>", 1 + i % 5))
+    return bodies
+
+
+def run(name: str, column_type, bodies: list[str], directory: str):
+    path = os.path.join(directory, f"{name}.db")
+    engine = create_engine(f"sqlite:///{path}")
+    table = Table("document", MetaData(), Column("id", Integer, primary_key=True), Column("content", column_type))
+    table.metadata.create_all(engine)
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(insert(table), [{"content": body} for body in bodies])
+    write = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        read_back = conn.scalars(select(table.c.content)).all()
+    read = time.perf_counter() - started
+    assert read_back == bodies
+    engine.dispose()
+
+    size = os.path.getsize(path)
+    print(f"{name:>14}: {size / 1024:8.0f} KiB on disk  "
+          f"write {write / len(bodies) * 1e6:7.1f} us/row  read {read / len(bodies) * 1e6:7.1f} us/row")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--write-dictionary", action="store_true", help=f"Retrain {DICTIONARY_PATH} on the seed documents")
+    args = parser.parse_args()
+
+    if args.write_dictionary:
+        dictionary = train_dictionary([DOCUMENT_1, DOCUMENT_2])
+        with open(DICTIONARY_PATH, "wb") as f:
+            f.write(dictionary)
+        print(f"wrote {len(dictionary)} byte dictionary to {DICTIONARY_PATH}; rerun to benchmark with it")
+        return
+
+    bodies = versions(args.rows)
+    print(f"{len(bodies)} rows, {sum(map(len, bodies)) / 1024:.0f} KiB of text")
+    with tempfile.TemporaryDirectory() as directory:
+        run("plain", String, bodies, directory)
+        run("zlib", ZlibText, bodies, directory)
+        run("zlib + dict", CompressedText, bodies, directory)
+
+
+if __name__ == "__main__":
+    main()
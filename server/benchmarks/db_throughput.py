@@ -0,0 +1,129 @@
+"""
+Concurrent read/write throughput of the database setups.
+
+Runs worker threads (like the request threadpool) against each setup for a
+fixed time. Each operation either reads the latest version of a patent or
+saves a new one, and the report shows operations per second and latency
+percentiles for both kinds:
+
+    python -m benchmarks.db_throughput --threads 16 --seconds 5 --write-ratio 0.2
+
+"memory" is the original setup: sqlite:///:memory: on one connection shared
+by every thread. "file (WAL)" is a file-backed DATABASE_URL with the WAL
+pragmas and a connection pool, as built by create_db_engine.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+import app.models as models
+from app.internal.data import DOCUMENT_1, DOCUMENT_2
+from app.internal.db import Base, create_db_engine
+from benchmarks.ws_load import percentile
+
+PATENTS = 8
+
+
+def setup(url: str) -> sessionmaker:
+    engine = create_db_engine(url)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        for patent_id in range(1, PATENTS + 1):
+            db.add(models.PatentEntity(id=patent_id, name=f"Patent {patent_id}"))
+            db.add(models.Document(patent_entity_id=patent_id, content=DOCUMENT_1 if patent_id % 2 else DOCUMENT_2))
+        db.commit()
+    return Session
+
+
+def read_latest(Session: sessionmaker, patent_id: int):
+    with Session() as db:
+        doc = db.scalars(
+            select(models.Document)
+            .where(models.Document.patent_entity_id == patent_id)
+            .order_by(models.Document.id.desc())
+            .limit(1)
+        ).first()
+        doc.content
+
+
+def save_version(Session: sessionmaker, patent_id: int, worker: int, i: int):
+    with Session() as db:
+        latest = db.scalars(
+            select(models.Document)
+            .where(models.Document.patent_entity_id == patent_id)
+            .order_by(models.Document.id.desc())
+            .limit(1)
+        ).first()
+        content = latest.content.replace("</p>", f" (w{worker} #{i})</p>", 1)
+        db.add(models.Document(patent_entity_id=patent_id, content=content))
+        db.commit()
+
+
+def run(name: str, url: str, threads: int, seconds: float, write_ratio: float):
+    Session = setup(url)
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: list[BaseException] = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(worker_id: int):
+        rng = random.Random(worker_id)
+        i = 0
+        while time.perf_counter() < deadline:
+            patent_id = rng.randint(1, PATENTS)
+            kind = "write" if rng.random() < write_ratio else "read"
+            started = time.perf_counter()
+            try:
+                if kind == "write":
+                    save_version(Session, patent_id, worker_id, i)
+                else:
+                    read_latest(Session, patent_id)
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+                continue
+            with lock:
+                latencies[kind].append(time.perf_counter() - started)
+            i += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(worker, range(threads)))
+    elapsed = time.perf_counter() - started
+
+    total = sum(map(len, latencies.values()))
+    print(f"{name}: {total / elapsed:.0f} ops/s, {len(errors)} errors")
+    for kind in ("read", "write"):
+        values = latencies[kind]
+        print(f"  {kind:>5}: {len(values) / elapsed:7.0f}/s  p50={percentile(values, 50) * 1000:.1f}ms "
+              f"p95={percentile(values, 95) * 1000:.1f}ms p99={percentile(values, 99) * 1000:.1f}ms")
+    for error in errors[:3]:
+        print(f"  {type(error).__name__}: {str(error).splitlines()[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    run("memory", "sqlite:///:memory:", args.threads, args.seconds, args.write_ratio)
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        run("file (WAL)", url, args.threads, args.seconds, args.write_ratio)
+
+
+if __name__ == "__main__":
+    main()
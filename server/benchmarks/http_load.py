@@ -0,0 +1,157 @@
+"""
+Requests/sec and tail latency of the sync and async document/patent routes.
+
+Builds the app in-process twice against a fresh file-backed SQLite DB, once
+with the threadpool controllers (DB_ASYNC unset) and once with the async
+ones (DB_ASYNC=1), and drives each with concurrent HTTP clients. Each request
+either reads the latest version of a patent or saves a new one:
+
+    python -m benchmarks.http_load --clients 64 --seconds 5 --write-ratio 0.2
+
+--busy-threads keeps that many threadpool slots occupied for the whole run,
+standing in for /ws workers, to show the sync routes queueing behind them.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+
+import anyio
+import httpx
+from fastapi import FastAPI
+from sqlalchemy.orm import sessionmaker
+
+import app.models as models
+from app.controllers import (
+    async_document_controller,
+    async_patent_entity_controller,
+    document_controller,
+    patent_entity_controller,
+)
+from app.internal.data import DOCUMENT_1, DOCUMENT_2
+from app.internal.db import Base, async_session_factory, create_async_db_engine, create_db_engine, get_async_db, get_db
+from benchmarks.ws_load import percentile
+
+PATENTS = 8
+
+
+def seed(url: str):
+    engine = create_db_engine(url)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine, autoflush=False)() as db:
+        for patent_id in range(1, PATENTS + 1):
+            db.add(models.PatentEntity(id=patent_id, name=f"Patent {patent_id}"))
+            db.add(models.Document(patent_entity_id=patent_id, content=DOCUMENT_1 if patent_id % 2 else DOCUMENT_2))
+        db.commit()
+    engine.dispose()
+
+
+def build_app(mode: str, url: str):
+    """The routes for `mode` on `url`, and the engine to dispose afterwards."""
+    app = FastAPI()
+    if mode == "sync":
+        engine = create_db_engine(url)
+        Session = sessionmaker(bind=engine, autoflush=False)
+
+        def override_get_db():
+            with Session() as db:
+                yield db
+
+        app.include_router(patent_entity_controller.router)
+        app.include_router(document_controller.router)
+        app.dependency_overrides[get_db] = override_get_db
+        return app, engine
+
+    engine = create_async_db_engine(url)
+    AsyncSession = async_session_factory(engine)
+
+    async def override_get_async_db():
+        async with AsyncSession() as db:
+            yield db
+
+    app.include_router(async_patent_entity_controller.router)
+    app.include_router(async_document_controller.router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    return app, engine
+
+
+async def client_loop(http: httpx.AsyncClient, client: int, deadline: float, write_ratio: float,
+                      latencies: dict[str, list[float]], errors: list[str]):
+    rng = random.Random(client)
+    i = 0
+    while time.perf_counter() < deadline:
+        patent_id = rng.randint(1, PATENTS)
+        kind = "write" if rng.random() < write_ratio else "read"
+        started = time.perf_counter()
+        if kind == "write":
+            content = (DOCUMENT_1 if patent_id % 2 else DOCUMENT_2).replace("</p>", f" (c{client} #{i})</p>", 1)
+            response = await http.post(
+                f"/document/patent/{patent_id}/new-version",
+                json={"content": content, "patent_entity_id": patent_id},
+            )
+        else:
+            response = await http.get(f"/patent_entity/{patent_id}/documents/latest")
+        if response.status_code != 200:
+            errors.append(f"{response.status_code} {response.text[:80]}")
+            continue
+        latencies[kind].append(time.perf_counter() - started)
+        i += 1
+
+
+async def occupy_threads(count: int, deadline: float):
+    """Hold `count` threadpool slots until the deadline, like long-running /ws work."""
+    async with anyio.create_task_group() as tg:
+        for _ in range(count):
+            tg.start_soon(anyio.to_thread.run_sync, time.sleep, max(0.0, deadline - time.perf_counter()))
+
+
+async def run(mode: str, clients: int, seconds: float, write_ratio: float, busy_threads: int):
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        seed(url)
+        app, engine = build_app(mode, url)
+        latencies: dict[str, list[float]] = defaultdict(list)
+        errors: list[str] = []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            deadline = time.perf_counter() + seconds
+            started = time.perf_counter()
+            await asyncio.gather(
+                occupy_threads(busy_threads, deadline),
+                *(client_loop(http, client, deadline, write_ratio, latencies, errors) for client in range(clients)),
+            )
+            elapsed = time.perf_counter() - started
+        if mode == "sync":
+            engine.dispose()
+        else:
+            await engine.dispose()
+
+    total = sum(map(len, latencies.values()))
+    print(f"{mode}: {total / elapsed:.0f} req/s, {len(errors)} errors")
+    for kind in ("read", "write"):
+        values = latencies[kind]
+        print(f"  {kind:>5}: {len(values) / elapsed:7.0f}/s  p50={percentile(values, 50) * 1000:.1f}ms "
+              f"p95={percentile(values, 95) * 1000:.1f}ms p99={percentile(values, 99) * 1000:.1f}ms")
+    for error in errors[:3]:
+        print(f"  {error}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--busy-threads", type=int, default=0, help="Threadpool slots held by simulated /ws work")
+    args = parser.parse_args()
+
+    for mode in ("sync", "async"):
+        await run(mode, args.clients, args.seconds, args.write_ratio, args.busy_threads)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
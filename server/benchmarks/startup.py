@@ -0,0 +1,82 @@
+"""
+Server startup time.
+
+Each run is a fresh interpreter, as a real (re)start is. "import" is the time
+to import app.__main__; "boot" is that plus running the lifespan (schema
+check, search index, seeding) until the app accepts requests. Boots are timed
+against a new DB file and again against the same, already seeded, file:
+
+    python -m benchmarks.startup --runs 5 --target 1.5
+
+"first /ws" is the one-off cost of importing the OpenAI client, which the
+first websocket connection pays instead of every startup. With --target,
+exits non-zero if the median restart boot is slower than that many seconds.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+CHILD = """
+import sys, time
+from starlette.testclient import TestClient  # The harness, not part of the app's startup
+started = time.perf_counter()
+from app.__main__ import app
+imported = time.perf_counter()
+if {boot}:
+    with TestClient(app) as client:
+        booted = time.perf_counter()
+else:
+    booted = imported
+loaded = "openai" in sys.modules
+started_ai = time.perf_counter()
+import app.internal.ai
+print(imported - started, booted - started, time.perf_counter() - started_ai, loaded)
+"""
+
+
+def measure(boot: bool, env: dict[str, str]) -> tuple[float, float, float, bool]:
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD.format(boot=boot)],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout.split()
+    imported, booted, ai, loaded = output[-4:]
+    return float(imported), float(booted), float(ai), loaded == "True"
+
+
+def report(name: str, values: list[float]):
+    print(f"{name:>14}: median {statistics.median(values) * 1000:6.0f}ms  min {min(values) * 1000:6.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target", type=float, help="Fail if the median restart boot takes longer (seconds)")
+    args = parser.parse_args()
+
+    imports, first_boots, restarts, ai = [], [], [], []
+    with tempfile.TemporaryDirectory() as directory:
+        for run in range(args.runs):
+            env = {**os.environ, "DATABASE_URL": f"sqlite:///{os.path.join(directory, f'{run}.db')}"}
+            imported, _, ai_seconds, loaded = measure(False, env)
+            imports.append(imported)
+            ai.append(ai_seconds)
+            first_boots.append(measure(True, env)[1])
+            restarts.append(measure(True, env)[1])
+
+    report("import", imports)
+    report("boot, new DB", first_boots)
+    report("boot, restart", restarts)
+    report("first /ws", ai)
+    print(f"OpenAI client imported at startup: {loaded}")
+    if args.target is not None and statistics.median(restarts) > args.target:
+        print(f"Slower than the {args.target}s target")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Load benchmark for the /ws suggestion path.
+
+Opens N concurrent websocket clients, each replaying a sequence of edits to
+DOCUMENT_1/DOCUMENT_2 (single-paragraph changes, with an occasional undo),
+and reports time-to-first-frame and time-to-complete percentiles plus
+throughput. Run it against a server started with the fake AI backend so it
+costs nothing and needs no network:
+
+    AI_BACKEND=fake uvicorn app.__main__:app
+    python -m benchmarks.ws_load --clients 50 --edits 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import re
+import time
+from dataclasses import dataclass, field
+
+import websockets
+
+from app.internal.data import DOCUMENT_1, DOCUMENT_2
+
+PARAGRAPH_RE = re.compile(r"(<p\b[^>]*>)(.*?)(</p\s*>)", re.IGNORECASE | re.DOTALL)
+
+
+@dataclass
+class Results:
+    first_frame: list[float] = field(default_factory=list)
+    complete: list[float] = field(default_factory=list)
+    timeouts: int = 0
+    errors: int = 0
+
+
+def edit_sequence(document: str, client: int, edits: int) -> list[str]:
+    """Successive versions of `document`, each changing one paragraph; every fifth is an undo."""
+    paragraphs = list(PARAGRAPH_RE.finditer(document))
+    versions = [document]
+    current = document
+    for i in range(1, edits):
+        if i % 5 == 0:
+            versions.append(versions[-2])
+            continue
+        match = paragraphs[(client * 7 + i * 3) % len(paragraphs)]
+        edited = f"{match.group(1)}{match.group(2).rstrip()} (edit {client}-{i}){match.group(3)}"
+        current = current.replace(match.group(0), edited, 1)
+        paragraphs = list(PARAGRAPH_RE.finditer(current))
+        versions.append(current)
+    return versions
+
+
+async def run_client(url: str, client: int, edits: int, think_time: float, results: Results):
+    document = DOCUMENT_1 if client % 2 == 0 else DOCUMENT_2
+    async with websockets.connect(url, max_size=None) as ws:
+        for request_id, content in enumerate(edit_sequence(document, client, edits), start=1):
+            started = time.perf_counter()
+            await ws.send(json.dumps({"content": content, "request_id": request_id}))
+            first = None
+            while True:
+                frame = json.loads(await ws.recv())
+                if frame["request_id"] != request_id:
+                    continue
+                if first is None:
+                    first = time.perf_counter() - started
+                if frame["status"] == "complete":
+                    break
+            results.first_frame.append(first)
+            results.complete.append(time.perf_counter() - started)
+            issues = frame["suggestions"]["issues"]
+            if any(issue["type"] == "Timeout" for issue in issues):
+                results.timeouts += 1
+            await asyncio.sleep(think_time)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="ws://localhost:8000/ws")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--edits", type=int, default=10)
+    parser.add_argument("--think-time", type=float, default=0.0, help="Seconds between a response and the next edit")
+    args = parser.parse_args()
+
+    results = Results()
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(
+        *(run_client(args.url, client, args.edits, args.think_time, results) for client in range(args.clients)),
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - started
+    failures = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+    results.errors = len(failures)
+
+    print(f"clients={args.clients} edits={args.edits} requests={len(results.complete)} "
+          f"elapsed={elapsed:.2f}s throughput={len(results.complete) / elapsed:.1f} req/s")
+    for name, values in (("first frame", results.first_frame), ("complete", results.complete)):
+        print(f"{name:>12}: p50={percentile(values, 50) * 1000:.0f}ms "
+              f"p95={percentile(values, 95) * 1000:.0f}ms p99={percentile(values, 99) * 1000:.0f}ms")
+    print(f"timeouts={results.timeouts} failed clients={results.errors}")
+    for failure in failures[:3]:
+        print(f"  {type(failure).__name__}: {failure}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -36,16 +36,12 @@
 
 
 # tests/conftest.py
-import os
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-# Disable optional routers (e.g., websocket) that may pull heavy deps like openai
-os.environ["DISABLE_WS"] = "1"
-
-from app.__main__ import app  # import after setting env var
+from app.__main__ import app  # The OpenAI client is only imported on the first /ws connection
 from app.internal.db import get_db, Base
 import app.models as models
 
@@ -75,6 +71,7 @@ def _clean_and_seed():
     with engine.begin() as conn:
         for tbl in reversed(Base.metadata.sorted_tables):
             conn.exec_driver_sql(f"DELETE FROM {tbl.name}")
+        conn.exec_driver_sql("DELETE FROM document_fts")
     db = TestingSessionLocal()
     try:
         pe = models.PatentEntity(name="Test Patent")
@@ -87,3 +84,11 @@ def _clean_and_seed():
 def client():
     app.dependency_overrides[get_db] = override_get_db
     return TestClient(app)
+
+@pytest.fixture()
+def db():
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
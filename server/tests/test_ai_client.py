@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+import app.internal.ai as ai_module
+from app.internal.ai import AI
+from app.internal.ai_client import SharedAI
+
+
+@pytest.fixture()
+def api(monkeypatch):
+    """A local server standing in for the OpenAI API; counts the connections made to it"""
+    connections = []
+
+    async def handle(reader, writer):
+        connections.append(writer)
+        while await reader.readuntil(b"\r\n\r\n"):
+            writer.write(b"HTTP/1.1 200 OK\r\ncontent-length: 0\r\n\r\n")
+
+    async def start():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        return server, server.sockets[0].getsockname()[1]
+
+    monkeypatch.setattr(ai_module, "get_ai", lambda: AI("test-key", "test-model"))
+    return start, connections
+
+
+class TestSharedAI:
+    """Tests for the app-scoped AI client"""
+
+    def test_connections_share_one_client(self, api):
+        async def run():
+            shared = SharedAI()
+            first, second = shared.get(), shared.get()
+            assert first is second
+            assert first._client._client is shared._http_client
+            await shared.aclose()
+            assert shared.get() is not first
+            await shared.aclose()
+
+        asyncio.run(run())
+
+    def test_close_releases_the_pool(self, api):
+        async def run():
+            shared = SharedAI()
+            shared.get()
+            http_client = shared._http_client
+            await shared.aclose()
+            assert http_client.is_closed
+            await shared.aclose()  # Closing again, or before first use, is a no-op
+
+        asyncio.run(run())
+
+    def test_warm_up_opens_kept_alive_connections(self, api, monkeypatch):
+        start, connections = api
+
+        async def run():
+            server, port = await start()
+            monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{port}/v1")
+            shared = SharedAI()
+            await shared.warm(3)
+            assert len(connections) == 3
+            await shared.warm(3)
+            assert len(connections) == 3  # Reused, not reopened
+            await shared.aclose()
+            server.close()
+
+        asyncio.run(run())
@@ -0,0 +1,117 @@
+import pytest
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+
+from app.controllers import async_document_controller, async_patent_entity_controller
+from app.internal.db import async_database_url, async_session_factory, create_async_db_engine, get_async_db
+
+TEST_DB_URL = "sqlite:///./test_app.db"  # The file conftest cleans and seeds
+
+
+@pytest.fixture()
+def async_client():
+    """A client for the async routes, on the same test DB as `client`"""
+    engine = create_async_db_engine(TEST_DB_URL)
+    AsyncTestingSessionLocal = async_session_factory(engine)
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(async_patent_entity_controller.router)
+    app.include_router(async_document_controller.router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    with TestClient(app) as client:  # One event loop for the engine's connections
+        yield client
+        client.portal.call(engine.dispose)
+
+
+class TestAsyncDatabaseUrl:
+    """Tests for picking the async driver"""
+
+    def test_sqlite_uses_aiosqlite(self):
+        assert async_database_url("sqlite:///./app.db").drivername == "sqlite+aiosqlite"
+
+    def test_explicit_driver_is_kept(self):
+        assert async_database_url("postgresql+psycopg://db/app").drivername == "postgresql+psycopg"
+
+
+class TestAsyncControllers:
+    """Tests that the async routes behave like the sync ones"""
+
+    def test_create_and_read_document(self, async_client, client):
+        created = async_client.post("/document/", json={"content": "<p>Body</p>", "patent_entity_id": 1})
+        assert created.status_code == status.HTTP_200_OK
+        document_id = created.json()["id"]
+        assert async_client.get(f"/document/{document_id}").json() == client.get(f"/document/{document_id}").json()
+        assert async_client.get(f"/document/{document_id}/content").text == "<p>Body</p>"
+
+    def test_versions_are_rebuilt_from_deltas(self, async_client, client):
+        base = "<p>" + "Long claim text. " * 50 + "</p>"
+        for i in range(3):
+            async_client.post("/document/patent/1/new-version", json={"content": f"{base}<p>{i}</p>", "patent_entity_id": 1})
+        latest = async_client.get("/patent_entity/1/documents/latest").json()
+        assert latest["content"] == f"{base}<p>2</p>"
+        assert async_client.get("/patent_entity/1/documents").json() == client.get("/patent_entity/1/documents").json()
+
+    def test_streamed_list_matches_buffered_response(self, async_client):
+        for i in range(5):
+            async_client.post("/document/", json={"content": f"Document {i}", "patent_entity_id": 1})
+        streamed = async_client.get("/document/", params={"stream": True})
+        assert streamed.headers["content-type"] == "application/json"
+        assert streamed.json() == async_client.get("/document/").json()
+
+    def test_save_and_delete(self, async_client):
+        created = async_client.post("/document/", json={"content": "Before", "patent_entity_id": 1}).json()
+        saved = async_client.post(f"/document/{created['id']}/save", json={"content": "After", "patent_entity_id": 1})
+        assert saved.json()["content"] == "After"
+        assert async_client.delete(f"/document/{created['id']}").status_code == status.HTTP_200_OK
+        assert async_client.get(f"/document/{created['id']}").status_code == status.HTTP_404_NOT_FOUND
+
+    def test_document_not_modified(self, async_client):
+        created = async_client.post("/document/", json={"content": "Body", "patent_entity_id": 1}).json()
+        etag = async_client.get(f"/document/{created['id']}").headers["ETag"]
+        response = async_client.get(f"/document/{created['id']}", headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_create_patent_entity_with_placeholder(self, async_client):
+        data = async_client.post("/patent_entity/", json={"name": "Async Patent"}).json()
+        assert data["entity"]["name"] == "Async Patent"
+        assert data["document"]["content"] == "Placeholder content"
+        page = async_client.get(f"/patent_entity/{data['entity']['id']}/documents/versions").json()
+        assert page["total"] == 1
+
+    def test_missing_patent(self, async_client):
+        assert async_client.get("/patent_entity/999").status_code == status.HTTP_404_NOT_FOUND
+        assert async_client.get("/patent_entity/999/documents/first").json() is None
+
+    def test_stale_revision_is_rejected(self, async_client):
+        created = async_client.post("/document/", json={"content": "Body", "patent_entity_id": 1}).json()
+        saved = async_client.post(f"/document/{created['id']}/save", json={"content": "Edited", "patent_entity_id": 1, "revision": 1})
+        assert saved.json()["revision"] == 2
+        response = async_client.post(f"/document/{created['id']}/save", json={"content": "Stale", "patent_entity_id": 1, "revision": 1})
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+    def test_patch_applies_edits(self, async_client):
+        created = async_client.post("/document/", json={"content": "<p>The quick fox</p>", "patent_entity_id": 1}).json()
+        patched = async_client.patch(f"/document/{created['id']}", json={"revision": 1, "edits": [{"start": 7, "end": 12, "text": "slow"}]})
+        assert patched.json()["revision"] == 2
+        assert async_client.get(f"/document/{created['id']}").json()["content"] == "<p>The slow fox</p>"
+
+    def test_export_and_import(self, async_client, client):
+        for i in range(3):
+            async_client.post("/document/patent/1/new-version", json={"content": f"<p>Claim {i}</p>", "patent_entity_id": 1})
+        exported = async_client.get("/patent_entity/export")
+        assert exported.text == client.get("/patent_entity/export").text
+
+        imported = async_client.post("/patent_entity/import", content=exported.content)
+        assert imported.json() == {"patents": 1, "documents": 3}
+        assert async_client.post("/patent_entity/import", content=b"{}").status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_search(self, async_client, client):
+        async_client.post("/document/", json={"content": "<p>A wireless optogenetic device</p>", "patent_entity_id": 1})
+        params = {"q": "optogenetic"}
+        page = async_client.get("/document/search", params=params).json()
+        assert page["items"][0]["snippet"] == "A wireless <mark>optogenetic</mark> device"
+        assert page == client.get("/document/search", params=params).json()
@@ -0,0 +1,138 @@
+import pytest
+from fastapi import status
+from sqlalchemy import Engine, event
+from sqlalchemy.orm import sessionmaker
+
+import app.models as models
+from app.controllers import document_controller
+from app.internal.autosave import AutosaveBuffer, StaleRevision
+
+
+@pytest.fixture()
+def buffer(monkeypatch):
+    buffer = AutosaveBuffer()
+    monkeypatch.setattr(document_controller, "autosave", buffer)
+    return buffer
+
+
+@pytest.fixture()
+def captured_updates():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE document"):
+            statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(Engine, "before_cursor_execute", capture)
+
+
+def save(client, document_id, content, revision=None):
+    body = {"content": content, "patent_entity_id": 1}
+    if revision is not None:
+        body["revision"] = revision
+    return client.post(f"/document/{document_id}/save", json=body)
+
+
+class TestAutosaveBuffer:
+    """Tests for write-behind buffering of document saves"""
+
+    def test_saves_are_buffered_and_read_back(self, client, db, buffer, captured_updates):
+        created = client.post("/document/", json={"content": "v1", "patent_entity_id": 1}).json()
+        for i in range(2, 6):
+            assert save(client, created["id"], f"v{i}", revision=i - 1).json()["revision"] == i
+
+        assert captured_updates == []
+        assert len(buffer) == 1
+        assert client.get(f"/document/{created['id']}").json()["content"] == "v5"
+        assert client.get("/patent_entity/1/documents/latest").json()["revision"] == 5
+        assert client.get(f"/document/{created['id']}/content").text == "v5"
+
+    def test_flush_writes_only_the_latest_save(self, client, db, buffer, captured_updates):
+        created = client.post("/document/", json={"content": "v1", "patent_entity_id": 1}).json()
+        for i in range(2, 6):
+            save(client, created["id"], f"v{i}")
+        buffered = client.get(f"/document/{created['id']}")
+
+        assert buffer.write(db) == 1
+        assert len(captured_updates) == 1
+        assert len(buffer) == 0
+        written = client.get(f"/document/{created['id']}")
+        assert written.json() == buffered.json()
+        assert written.headers["ETag"] == buffered.headers["ETag"]
+
+    def test_stale_revision_is_checked_against_the_buffer(self, client, buffer):
+        created = client.post("/document/", json={"content": "v1", "patent_entity_id": 1}).json()
+        save(client, created["id"], "v2", revision=1)
+        assert save(client, created["id"], "v2 from another tab", revision=1).status_code == status.HTTP_409_CONFLICT
+
+    def test_concurrent_saves_on_the_same_revision_conflict(self, db, buffer):
+        document = models.Document(patent_entity_id=1, content="v1")
+        db.add(document)
+        db.commit()
+        # Both requests loaded revision 1 and passed the controller's check before either was buffered
+        buffer.put(document, "first tab", 1, revision=1)
+        with pytest.raises(StaleRevision) as stale:
+            buffer.put(document, "second tab", 1, revision=1)
+        assert (stale.value.revision, stale.value.current) == (1, 2)
+        assert buffer.get(document.id).content == "first tab"
+
+    def test_save_read_before_a_flush_builds_on_it(self, client, db, buffer):
+        created = client.post("/document/", json={"content": "v1", "patent_entity_id": 1}).json()
+        loaded = db.get(models.Document, created["id"])  # Read at revision 1, then v2 is saved and flushed
+        save(client, created["id"], "v2", revision=1)
+        flush_session = sessionmaker(bind=db.get_bind())
+        with flush_session() as flushing:
+            buffer.write(flushing)
+
+        with pytest.raises(StaleRevision):
+            buffer.put(loaded, "v2 from another tab", 1, revision=1)
+        assert buffer.put(loaded, "v3", 1, revision=2).revision == 3
+        with flush_session() as flushing:
+            assert buffer.write(flushing) == 1
+        db.expire_all()
+        assert (loaded.content, loaded.revision) == ("v3", 3)
+
+    def test_patch_applies_to_the_buffered_content(self, client, buffer):
+        created = client.post("/document/", json={"content": "one", "patent_entity_id": 1}).json()
+        save(client, created["id"], "one two")
+        patched = client.patch(f"/document/{created['id']}", json={"revision": 2, "edits": [{"start": 7, "end": 7, "text": " three"}]})
+        assert patched.json()["revision"] == 3
+        assert client.get(f"/document/{created['id']}").json()["content"] == "one two three"
+
+    def test_save_made_during_a_failed_flush_is_kept(self, client, db, buffer, monkeypatch):
+        created = client.post("/document/", json={"content": "v1", "patent_entity_id": 1}).json()
+        save(client, created["id"], "v2")
+
+        def fail():
+            save(client, created["id"], "v3")  # Arrives while the flush is in progress
+            raise RuntimeError("disk full")
+
+        monkeypatch.setattr(db, "commit", fail)
+        with pytest.raises(RuntimeError):
+            buffer.write(db)
+        monkeypatch.undo()
+
+        assert buffer.write(db) == 1
+        db.expire_all()
+        document = db.get(models.Document, created["id"])
+        assert (document.content, document.revision) == ("v3", 3)
+
+    def test_save_written_elsewhere_is_dropped(self, client, db, buffer, caplog):
+        created = client.post("/document/", json={"content": "v1", "patent_entity_id": 1}).json()
+        save(client, created["id"], "buffered")
+        document = db.get(models.Document, created["id"])
+        document.content, document.revision = "direct", 2
+        db.commit()
+
+        assert buffer.write(db) == 0
+        db.expire_all()
+        assert db.get(models.Document, created["id"]).content == "direct"
+        assert f"Dropped autosave of document {created['id']}" in caplog.text
+
+    def test_delete_discards_the_buffered_save(self, client, db, buffer):
+        created = client.post("/document/", json={"content": "v1", "patent_entity_id": 1}).json()
+        save(client, created["id"], "v2")
+        client.delete(f"/document/{created['id']}")
+        assert len(buffer) == 0
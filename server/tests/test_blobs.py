@@ -0,0 +1,98 @@
+import pytest
+from sqlalchemy import func, select
+
+import app.controllers.document_controller as document_controller
+import app.models as models
+from app.internal.blobs import BLOB_MMAP_THRESHOLD, FileBlobStore, content_hash
+
+
+@pytest.fixture()
+def file_store(tmp_path, monkeypatch):
+    store = FileBlobStore(str(tmp_path / "blobs"))
+    monkeypatch.setattr(models, "blob_store", store)
+    monkeypatch.setattr(document_controller, "blob_store", store)
+    return store
+
+
+class TestFileBlobStore:
+    """Tests for the content-addressed file store"""
+
+    def test_round_trip(self, tmp_path):
+        store = FileBlobStore(str(tmp_path))
+        digest = content_hash("<p>1. A device.</p>")
+        store.write(digest, "<p>1. A device.</p>")
+        assert store.read(digest) == "<p>1. A device.</p>"
+
+    def test_large_blobs_are_streamed_in_chunks(self, tmp_path):
+        store = FileBlobStore(str(tmp_path))
+        body = "<p>claim</p>" * (BLOB_MMAP_THRESHOLD // 4)
+        digest = content_hash(body)
+        store.write(digest, body)
+        chunks = list(store.iter_bytes(digest, chunk_size=4096))
+        assert len(chunks) > 1
+        assert b"".join(chunks).decode() == body
+
+
+class TestDocumentBlobs:
+    """Tests for content-addressed document bodies"""
+
+    def test_identical_bodies_are_stored_once(self, client, db):
+        client.post("/document/", json={"content": "Same body", "patent_entity_id": 1})
+        client.post("/patent_entity/", json={"name": "Other"})
+        client.post("/document/patent/2/new-version", json={"content": "Same body", "patent_entity_id": 2})
+        assert db.scalar(select(func.count()).where(models.Blob.sha256 == content_hash("Same body"))) == 1
+
+    def test_unchanged_save_skips_the_write(self, client):
+        created = client.post("/document/", json={"content": "Body", "patent_entity_id": 1}).json()
+        saved = client.post(f"/document/{created['id']}/save", json={"content": "Body", "patent_entity_id": 1}).json()
+        assert saved["updated_at"] == created["updated_at"]
+
+    def test_rows_hold_only_the_hash_with_file_store(self, client, db, file_store):
+        created = client.post("/document/", json={"content": "Stored in a file", "patent_entity_id": 1}).json()
+        doc = db.get(models.Document, created["id"])
+
+        assert doc.snapshot.content is None
+        assert file_store.exists(doc.snapshot_hash)
+        assert client.get(f"/document/{created['id']}").json()["content"] == "Stored in a file"
+
+    def test_raw_content_endpoint(self, client, file_store):
+        body = "<p>1. A device.</p>" * 10_000
+        created = client.post("/document/", json={"content": body, "patent_entity_id": 1}).json()
+        response = client.get(f"/document/{created['id']}/content")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/html")
+        assert response.text == body
+
+    def test_deleting_a_version_deletes_its_blob(self, client, db, file_store):
+        created = client.post("/document/", json={"content": "Only here", "patent_entity_id": 1}).json()
+        digest = content_hash("Only here")
+        client.delete(f"/document/{created['id']}")
+        assert db.get(models.Blob, digest) is None
+        assert not file_store.exists(digest)
+
+    def test_superseded_snapshots_are_deleted_unless_shared(self, client, db, file_store):
+        client.post("/patent_entity/", json={"name": "Other"})
+        client.post("/document/patent/2/new-version", json={"content": "Shared", "patent_entity_id": 2})
+        created = client.post("/document/", json={"content": "Shared", "patent_entity_id": 1}).json()
+        for content in ("Edited", "Edited again"):
+            client.post(f"/document/{created['id']}/save", json={"content": content, "patent_entity_id": 1})
+
+        assert db.get(models.Blob, content_hash("Shared")) is not None
+        assert file_store.exists(content_hash("Shared"))
+        assert db.get(models.Blob, content_hash("Edited")) is None
+        assert not file_store.exists(content_hash("Edited"))
+        assert client.get(f"/document/{created['id']}").json()["content"] == "Edited again"
+
+    def test_files_follow_a_rolled_back_transaction(self, client, db, file_store):
+        created = client.post("/document/", json={"content": "Kept", "patent_entity_id": 1}).json()
+        db.delete(db.get(models.Document, created["id"]))
+        db.add(models.Document(content="Never committed", patent_entity_id=1))
+        db.flush()
+        assert not file_store.exists(content_hash("Kept"))
+        assert file_store.read(content_hash("Kept")) == "Kept"  # Still readable until the delete commits
+        assert file_store.exists(content_hash("Never committed"))
+
+        db.rollback()
+        assert file_store.exists(content_hash("Kept"))
+        assert not file_store.exists(content_hash("Never committed"))
+        assert client.get(f"/document/{created['id']}").json()["content"] == "Kept"
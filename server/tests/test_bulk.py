@@ -0,0 +1,179 @@
+import asyncio
+import json
+import sqlite3
+
+import pytest
+from sqlalchemy import Engine, event, func, select
+
+import app.models as models
+from app.internal import bulk
+from app.internal.bulk import Importer, aiter_line_chunks, iter_ndjson
+
+
+def ndjson(*records) -> bytes:
+    return "".join(json.dumps(record) + "\n" for record in records).encode()
+
+
+def read_ndjson(text: str) -> list[dict]:
+    return [json.loads(line) for line in text.splitlines()]
+
+
+class TestBulkImportExport:
+    """Tests for NDJSON import and export of patents and their versions"""
+
+    def test_export_round_trips_through_import(self, client, db):
+        for i in range(5):
+            client.post("/document/patent/1/new-version", json={"content": f"<p>Claim {i} of many</p>", "patent_entity_id": 1})
+        exported = client.get("/patent_entity/export")
+        assert exported.headers["content-type"] == "application/x-ndjson"
+
+        response = client.post("/patent_entity/import", content=exported.content)
+        assert response.status_code == 200
+        assert response.json() == {"patents": 1, "documents": 5}
+
+        lines = read_ndjson(client.get("/patent_entity/export").text)
+        patents = [line for line in lines if line["type"] == "patent"]
+        assert [p["name"] for p in patents] == ["Test Patent", "Test Patent"]
+        original, imported = ([line for line in lines if line["type"] == "document" and line["patent_entity_id"] == p["id"]] for p in patents)
+        strip = lambda line: {k: v for k, v in line.items() if k not in ("id", "patent_entity_id")}
+        assert [strip(line) for line in imported] == [strip(line) for line in original]
+
+    def test_versions_are_stored_as_deltas(self, client, db, monkeypatch):
+        monkeypatch.setattr(bulk, "SNAPSHOT_INTERVAL", 3)
+        body = ndjson(
+            {"type": "patent", "id": 7, "name": "Imported"},
+            *({"type": "document", "patent_entity_id": 7, "content": f"<p>A long claim about widgets, version {i}</p>"} for i in range(5)),
+        )
+        assert client.post("/patent_entity/import", content=body).status_code == 200
+
+        patent = db.scalar(select(models.PatentEntity).where(models.PatentEntity.name == "Imported"))
+        docs = db.scalars(select(models.Document).where(models.Document.patent_entity_id == patent.id).order_by(models.Document.id)).all()
+        assert [doc.chain_depth for doc in docs] == [0, 1, 2, 0, 1]
+        assert [doc.content for doc in docs] == [f"<p>A long claim about widgets, version {i}</p>" for i in range(5)]
+        # Saving through the ORM afterwards re-encodes the imported successor
+        client.post(f"/document/{docs[1].id}/save", json={"content": "<p>Rewritten</p>", "patent_entity_id": patent.id})
+        assert client.get(f"/document/{docs[2].id}").json()["content"] == docs[2].content
+
+    def test_versions_are_appended_to_existing_patents(self, client):
+        client.post("/document/", json={"content": "<p>First</p>", "patent_entity_id": 1})
+        body = ndjson({"type": "document", "patent_entity_id": 1, "content": "<p>Second</p>", "revision": 3})
+        assert client.post("/patent_entity/import", content=body).json() == {"patents": 0, "documents": 1}
+
+        latest = client.get("/patent_entity/1/documents/latest").json()
+        assert latest["content"] == "<p>Second</p>"
+        assert latest["revision"] == 3
+
+    def test_snapshots_share_blobs(self, client, db):
+        body = ndjson(*({"type": "document", "patent_entity_id": 1, "content": "Same"} for _ in range(2)))
+        client.post("/patent_entity/import", content=body)
+        client.post("/patent_entity/import", content=body)
+        assert db.scalar(select(func.count()).select_from(models.Blob)) == 1
+
+    def test_chunks_commit_separately(self, client, db, monkeypatch):
+        monkeypatch.setattr(bulk, "IMPORT_CHUNK_LINES", 2)
+        body = ndjson(
+            {"type": "document", "patent_entity_id": 1, "content": "One"},
+            {"type": "document", "patent_entity_id": 1, "content": "Two"},
+            {"type": "document", "patent_entity_id": 1, "content": "Three"},
+        ) + b'{"type": "document"}\n'
+
+        response = client.post("/patent_entity/import", content=body)
+        assert response.status_code == 422
+        assert response.json()["detail"].startswith("Line 4: document.patent_entity_id")
+        # The first chunk was committed before the bad line was read
+        assert db.scalar(select(func.count()).select_from(models.Document)) == 2
+
+    @pytest.mark.parametrize("line, error", [
+        (b"not json", "Line 1: Invalid JSON"),
+        (b'{"type": "claim"}', "Line 1: Input tag 'claim'"),
+        (b'{"type": "document", "patent_entity_id": 99, "content": "x"}', "Line 1: unknown patent 99"),
+    ])
+    def test_bad_lines_are_rejected(self, client, db, line, error):
+        response = client.post("/patent_entity/import", content=line)
+        assert response.status_code == 422
+        assert response.json()["detail"].startswith(error)
+        assert db.scalar(select(func.count()).select_from(models.Document)) == 0
+
+    def test_duplicate_patent_lines_are_rejected(self, client):
+        body = ndjson(*({"type": "patent", "id": 2, "name": "Twice"} for _ in range(2)))
+        response = client.post("/patent_entity/import", content=body)
+        assert response.status_code == 422
+        assert response.json()["detail"] == "Line 2: patent 2 appears twice"
+
+    def test_ids_are_picked_under_the_write_lock(self, db):
+        writes = []
+
+        def concurrent_write(conn, cursor, statement, parameters, context, executemany):
+            if "max(document.id)" in statement:
+                other = sqlite3.connect(db.get_bind().url.database, timeout=0)
+                try:
+                    other.execute("INSERT INTO patent_entity (name) VALUES ('Concurrent')")
+                    writes.append("written")
+                except sqlite3.OperationalError as e:
+                    writes.append(str(e))
+                finally:
+                    other.close()
+
+        event.listen(Engine, "before_cursor_execute", concurrent_write)
+        try:
+            Importer().import_lines(db, [b'{"type": "document", "patent_entity_id": 1, "content": "x"}'])
+        finally:
+            event.remove(Engine, "before_cursor_execute", concurrent_write)
+        assert writes == ["database is locked"]
+
+    def test_id_conflicts_are_409(self, client, db, monkeypatch):
+        latest = Importer._latest
+
+        def concurrent_save(db, patent_id):
+            # Between reading max(id) and inserting: what a concurrent save could do without the write lock
+            tail = latest(db, patent_id)
+            with db.get_bind().begin() as conn:
+                conn.exec_driver_sql(
+                    "INSERT INTO document (id, content_hash, chain_depth, revision, patent_entity_id) "
+                    "SELECT coalesce(max(id), 0) + 1, 'x', 0, 1, 1 FROM document"
+                )
+            return tail
+
+        monkeypatch.setattr(Importer, "_lock_for_writes", staticmethod(lambda db: None))
+        monkeypatch.setattr(Importer, "_latest", staticmethod(concurrent_save))
+        body = ndjson({"type": "document", "patent_entity_id": 1, "content": "x"})
+        response = client.post("/patent_entity/import", content=body)
+        assert response.status_code == 409
+
+    def test_export_releases_rows_after_each_batch(self, client, db):
+        for i in range(7):
+            client.post("/document/patent/1/new-version", json={"content": f"Document {i}", "patent_entity_id": 1})
+        held = []
+        lines = []
+        for chunk in iter_ndjson(db, batch_size=2):
+            lines.extend(read_ndjson(chunk))
+            held.append(len(db.identity_map))
+        assert max(held) == 0
+        assert [line["content"] for line in lines[1:]] == [f"Document {i}" for i in range(7)]
+
+    def test_importer_publishes_latest_versions(self, db):
+        importer = Importer()
+        importer.import_lines(db, ndjson(
+            {"type": "patent", "id": 5, "name": "New"},
+            {"type": "document", "patent_entity_id": 5, "content": "a"},
+            {"type": "document", "patent_entity_id": 5, "content": "b"},
+            {"type": "document", "patent_entity_id": 1, "content": "c"},
+        ).splitlines())
+        events = list(importer.events())
+        new_id = importer.patent_ids[5]
+        assert [(kind, patent) for kind, patent, _, _ in events] == [("patent_created", new_id), ("version_created", 1)]
+
+
+class TestLineChunks:
+    """Tests for splitting a streamed body into lines"""
+
+    def test_lines_split_across_reads(self):
+        async def stream():
+            for data in (b'{"a"', b':1}\n{"b":2}\n{', b'"c":3}'):
+                yield data
+
+        async def collect():
+            return [chunk async for chunk in aiter_line_chunks(stream(), size=2)]
+
+        chunks = asyncio.run(collect())
+        assert chunks == [[b'{"a":1}', b'{"b":2}'], [b'{"c":3}']]
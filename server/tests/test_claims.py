@@ -0,0 +1,44 @@
+from app.internal.claims import extract_claims
+from app.internal.data import DOCUMENT_1
+
+SPEC = """<html><head><title>1. Not a claim</title></head><body>
+<h1>Description</h1>
+<p>1. A description paragraph that looks like a claim.</p>
+<h1>Claims</h1>
+<p>1. A device,   comprising:</p>
+<p>a <strong>pencil</strong> &amp; a light.</p>
+<h2>Abstract</h2>
+<p>An abstract.</p>
+</body></html>"""
+
+
+class TestExtractClaims:
+    """Tests for the Claims section extractor"""
+
+    def test_only_claims_section_is_returned(self):
+        claims = extract_claims(SPEC)
+        assert claims.paragraphs == ["1. A device, comprising:", "a pencil & a light."]
+        assert claims.text == "1. A device, comprising:\n\na pencil & a light."
+
+    def test_offsets_point_at_paragraphs_in_source(self):
+        claims = extract_claims(SPEC)
+        assert SPEC[claims.offsets[1]:].startswith("<p>1. A device")
+        assert SPEC[claims.offsets[2]:].startswith("<p>a <strong>pencil")
+
+    def test_whitespace_only_edits_do_not_change_text(self):
+        edited = SPEC.replace("A device,   comprising:", "A device,\n    comprising:")
+        assert extract_claims(edited).text == extract_claims(SPEC).text
+
+    def test_document_without_claims_heading_uses_body(self):
+        claims = extract_claims("<p>1. A device.</p><p>a pencil.</p>")
+        assert claims.paragraphs == ["1. A device.", "a pencil."]
+
+    def test_plain_text_is_one_paragraph(self):
+        claims = extract_claims("1. A device.")
+        assert claims.paragraphs == ["1. A device."]
+        assert claims.offsets == {1: 0}
+
+    def test_seed_document(self):
+        claims = extract_claims(DOCUMENT_1)
+        assert claims.paragraphs[0].startswith("1. A wireless optogenetic device")
+        assert "<" not in claims.text
@@ -0,0 +1,55 @@
+from sqlalchemy import LargeBinary, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+import app.models as models
+from app.internal.compression import COMPRESSION_THRESHOLD, CompressedText, compress, decompress, train_dictionary
+from app.internal.data import DOCUMENT_1, DOCUMENT_2
+
+
+class TestCompression:
+    """Tests for dictionary compression of document text"""
+
+    def test_round_trip(self):
+        assert decompress(compress(DOCUMENT_1)) == DOCUMENT_1
+
+    def test_round_trip_without_dictionary(self):
+        assert decompress(compress(DOCUMENT_1, dictionary=None)) == DOCUMENT_1
+
+    def test_dictionary_beats_plain_zlib(self):
+        assert len(compress(DOCUMENT_2)) < len(compress(DOCUMENT_2, dictionary=None))
+
+    def test_trained_dictionary_fits_the_zlib_window(self):
+        dictionary = train_dictionary([DOCUMENT_1, DOCUMENT_2], size=1024)
+        assert 0 < len(dictionary) <= 1024
+        assert b"</p>" in dictionary
+
+
+class TestCompressedColumns:
+    """Tests for the compressed content columns"""
+
+    def test_large_bodies_are_stored_compressed(self, client, db):
+        client.post("/document/", json={"content": DOCUMENT_1, "patent_entity_id": 1})
+        stored = db.execute(text("SELECT content FROM blob")).scalar_one()
+        assert isinstance(stored, bytes)
+        assert len(stored) < len(DOCUMENT_1) / 2
+
+    def test_small_bodies_are_stored_as_text(self, client, db):
+        body = "x" * (COMPRESSION_THRESHOLD - 1)
+        client.post("/document/", json={"content": body, "patent_entity_id": 1})
+        assert db.execute(text("SELECT content FROM blob")).scalar_one() == body
+
+    def test_rows_written_before_compression_are_readable(self, client, db):
+        created = client.post("/document/", json={"content": DOCUMENT_1, "patent_entity_id": 1}).json()
+        db.execute(text("UPDATE blob SET content = :content"), {"content": DOCUMENT_1})
+        db.commit()
+        assert client.get(f"/document/{created['id']}").json()["content"] == DOCUMENT_1
+
+    def test_other_databases_store_every_value_compressed(self):
+        dialect = postgresql.dialect()
+        column = CompressedText()
+        assert isinstance(column.load_dialect_impl(dialect), LargeBinary)
+        assert "content BYTEA" in str(CreateTable(models.Blob.__table__).compile(dialect=dialect))
+        stored = column.process_bind_param("short", dialect)
+        assert isinstance(stored, bytes)
+        assert column.process_result_value(stored, dialect) == "short"
@@ -0,0 +1,40 @@
+from sqlalchemy import QueuePool, StaticPool, func, select, text
+from sqlalchemy.orm import sessionmaker
+
+import app.models as models
+from app.__main__ import seed
+from app.internal.data import DOCUMENT_1
+from app.internal.db import SQLITE_CACHE_SIZE, SQLITE_MMAP_SIZE, Base, create_db_engine
+
+
+def pragma(engine, name):
+    with engine.connect() as conn:
+        return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+
+class TestCreateDbEngine:
+    """Tests for the configurable database engine"""
+
+    def test_memory_database_shares_one_connection(self):
+        assert isinstance(create_db_engine("sqlite:///:memory:").pool, StaticPool)
+
+    def test_file_database_uses_wal_and_a_pool(self, tmp_path):
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'app.db'}")
+        assert isinstance(engine.pool, QueuePool)
+        assert pragma(engine, "journal_mode") == "wal"
+        assert pragma(engine, "synchronous") == 1  # NORMAL
+        assert pragma(engine, "cache_size") == SQLITE_CACHE_SIZE
+        assert pragma(engine, "mmap_size") == SQLITE_MMAP_SIZE
+
+    def test_file_database_persists_and_is_seeded_once(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'app.db'}"
+        for _ in range(2):  # Two "restarts" against the same file
+            engine = create_db_engine(url)
+            Base.metadata.create_all(engine)
+            with sessionmaker(bind=engine)() as db:
+                seed(db)
+            engine.dispose()
+
+        with sessionmaker(bind=create_db_engine(url))() as db:
+            assert db.scalar(select(func.count()).select_from(models.PatentEntity)) == 2
+            assert db.get(models.Document, 1).content == DOCUMENT_1
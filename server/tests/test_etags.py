@@ -0,0 +1,71 @@
+from fastapi import status
+
+import app.models as models
+from app.internal.etags import etag_matches
+
+
+class TestEtagMatching:
+    """Tests for If-None-Match comparison"""
+
+    def test_matches_one_of_several_tags(self):
+        assert etag_matches('"a", "b"', '"b"')
+
+    def test_weak_tags_match(self):
+        assert etag_matches('W/"a"', '"a"')
+
+    def test_wildcard(self):
+        assert etag_matches("*", '"a"')
+
+    def test_missing_header(self):
+        assert not etag_matches(None, '"a"')
+
+
+class TestConditionalGets:
+    """Tests for ETags and 304 responses on document and patent endpoints"""
+
+    def test_document_not_modified(self, client):
+        created = client.post("/document/", json={"content": "Body", "patent_entity_id": 1}).json()
+        first = client.get(f"/document/{created['id']}")
+        etag = first.headers["ETag"]
+
+        second = client.get(f"/document/{created['id']}", headers={"If-None-Match": etag})
+        assert second.status_code == status.HTTP_304_NOT_MODIFIED
+        assert second.headers["ETag"] == etag
+        assert second.content == b""
+
+    def test_save_changes_the_etag(self, client):
+        created = client.post("/document/", json={"content": "Body", "patent_entity_id": 1}).json()
+        etag = client.get(f"/document/{created['id']}").headers["ETag"]
+        client.post(f"/document/{created['id']}/save", json={"content": "Edited", "patent_entity_id": 1})
+
+        response = client.get(f"/document/{created['id']}", headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["content"] == "Edited"
+        assert response.headers["ETag"] != etag
+
+    def test_not_modified_skips_loading_content(self, client, monkeypatch):
+        created = client.post("/document/", json={"content": "Body", "patent_entity_id": 1}).json()
+        etag = client.get(f"/document/{created['id']}").headers["ETag"]
+
+        def fail(self):
+            raise AssertionError("content was loaded")
+        monkeypatch.setattr(models.Document, "content", property(fail))
+        response = client.get(f"/document/{created['id']}", headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_latest_document_not_modified_until_a_new_version(self, client):
+        client.post("/document/", json={"content": "First", "patent_entity_id": 1})
+        etag = client.get("/patent_entity/1/documents/latest").headers["ETag"]
+        assert client.get("/patent_entity/1/documents/latest", headers={"If-None-Match": etag}).status_code == 304
+
+        client.post("/document/patent/1/new-version", json={"content": "Second", "patent_entity_id": 1})
+        response = client.get("/patent_entity/1/documents/latest", headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["content"] == "Second"
+
+    def test_patent_list_not_modified_until_a_patent_is_added(self, client):
+        etag = client.get("/patent_entity/list").headers["ETag"]
+        assert client.get("/patent_entity/list", headers={"If-None-Match": etag}).status_code == 304
+
+        client.post("/patent_entity/", json={"name": "Another"})
+        assert client.get("/patent_entity/list", headers={"If-None-Match": etag}).status_code == 200
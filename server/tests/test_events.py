@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from fastapi import WebSocketDisconnect, status
+
+import app.schemas as schemas
+from app.internal.events import VersionEventHub, version_events
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestVersionEventHub:
+    """Tests for the in-process version event hub"""
+
+    def test_bursts_are_coalesced_per_patent(self):
+        async def scenario():
+            hub = VersionEventHub()
+            subscription = hub.subscribe()
+            for revision in range(1, 6):
+                hub.publish("version_saved", 1, 10, revision)
+            hub.publish("version_created", 2, 20, 1)
+            batches = subscription.batches(window=0.01)
+            return await anext(batches)
+
+        events = run(scenario())
+        assert [(e.patent_id, e.revision) for e in events] == [(1, 5), (2, 1)]
+
+    def test_only_followed_patents_are_delivered(self):
+        async def scenario():
+            hub = VersionEventHub()
+            subscription = hub.subscribe([2])
+            hub.publish("version_saved", 1, 10, 2)
+            hub.publish("version_saved", 2, 20, 2)
+            return await anext(subscription.batches(window=0.01))
+
+        assert [e.patent_id for e in run(scenario())] == [2]
+
+    def test_publish_from_another_thread(self):
+        async def scenario():
+            hub = VersionEventHub()
+            subscription = hub.subscribe()
+            await asyncio.to_thread(hub.publish, "patent_created", 3, 30, 1)
+            return await anext(subscription.batches(window=0.01))
+
+        assert run(scenario())[0].kind == "patent_created"
+
+    def test_closed_subscription_is_dropped(self):
+        async def scenario():
+            hub = VersionEventHub()
+            hub.subscribe().close()
+            return len(hub)
+
+        assert run(scenario()) == 0
+
+
+class TestVersionEventsSocket:
+    """Tests for the /ws/versions push channel"""
+
+    def test_save_is_pushed_to_subscribers(self, client):
+        created = client.post("/document/", json={"content": "Body", "patent_entity_id": 1}).json()
+        with client.websocket_connect("/ws/versions?patent_id=1") as ws:
+            client.post(f"/document/{created['id']}/save", json={"content": "Edited", "patent_entity_id": 1})
+            client.post(f"/document/{created['id']}/save", json={"content": "Edited again", "patent_entity_id": 1})
+            frame = schemas.VersionEvents.model_validate(ws.receive_json())
+        assert [(e.kind, e.document_id, e.revision) for e in frame.events] == [("version_saved", created["id"], 3)]
+
+    def test_new_patent_is_pushed_to_catch_all_subscribers(self, client):
+        with client.websocket_connect("/ws/versions") as ws:
+            created = client.post("/patent_entity/", json={"name": "New"}).json()
+            frame = ws.receive_json()
+        assert frame["events"] == [{
+            "kind": "patent_created",
+            "patent_id": created["entity"]["id"],
+            "document_id": created["document"]["id"],
+            "revision": 1,
+        }]
+
+    def test_bad_patent_ids_close_the_socket(self, client):
+        with client.websocket_connect("/ws/versions?patent_id=1&patent_id=abc") as ws:
+            with pytest.raises(WebSocketDisconnect) as closed:
+                ws.receive_json()
+        assert closed.value.code == status.WS_1008_POLICY_VIOLATION
+        assert len(version_events) == 0
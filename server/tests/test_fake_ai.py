@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from app.internal.fake_ai import FakeAI, FakeAIError
+from app.schemas import Suggestions
+
+
+async def collect(ai: FakeAI, document: str) -> list:
+    return [chunk async for chunk in ai.review_document(document)]
+
+
+class TestFakeAI:
+    """Tests for the local fake AI backend"""
+
+    def test_streams_schema_valid_review_in_chunks(self):
+        ai = FakeAI(first_token_seconds=0, chunk_seconds=0, chunk_chars=10)
+        chunks = asyncio.run(collect(ai, "1. A device.\n\na pencil."))
+
+        assert chunks[-1] is None
+        assert all(len(chunk) <= 10 for chunk in chunks[:-1])
+        review = Suggestions.model_validate_json("".join(chunks[:-1]))
+        assert review.issues
+        assert all(1 <= issue.paragraph <= 2 for issue in review.issues)
+
+    def test_response_length_is_configurable(self):
+        short = FakeAI(response_chars=300).build_review("1. A device.")
+        long = FakeAI(response_chars=3000).build_review("1. A device.")
+        assert len(short) <= 300
+        assert 2500 < len(long) <= 3000
+
+    def test_reviews_are_deterministic_per_document(self):
+        ai = FakeAI()
+        assert ai.build_review("1. A device.") == ai.build_review("1. A device.")
+
+    def test_error_probability(self):
+        ai = FakeAI(first_token_seconds=0, chunk_seconds=0, error_probability=1.0)
+        with pytest.raises(FakeAIError):
+            asyncio.run(collect(ai, "1. A device."))
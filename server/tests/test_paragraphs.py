@@ -0,0 +1,81 @@
+from app.internal.cache import ReviewCache
+from app.internal.paragraphs import plan_review, split_paragraphs
+from app.schemas import SuggestionIssue, Suggestions
+
+CLAIMS = """
+<h1>Claims</h1>
+<p>1. A device, comprising:</p>
+<p>a pencil; and</p>
+<p>a light attached to the pencil.</p>
+<p>2. The device of claim 1, wherein the light is red.</p>
+"""
+
+
+def issue(paragraph: int, description: str = "Vague term") -> SuggestionIssue:
+    return SuggestionIssue(
+        type="Ambiguity",
+        severity="medium",
+        paragraph=paragraph,
+        description=description,
+        suggestion="Be specific.",
+    )
+
+
+class TestSplitParagraphs:
+    """Tests for splitting editor HTML into paragraphs"""
+
+    def test_numbers_paragraphs_and_strips_markup(self):
+        paragraphs = split_paragraphs(CLAIMS.replace("pencil; and", "<strong>pencil</strong>; and"))
+        assert [p.number for p in paragraphs] == [1, 2, 3, 4]
+        assert paragraphs[1].text == "a pencil; and"
+
+    def test_body_paragraphs_carry_claim_preamble(self):
+        paragraphs = split_paragraphs(CLAIMS)
+        assert paragraphs[0].context == ""
+        assert paragraphs[2].context == "1. A device, comprising:"
+        assert paragraphs[2].context_number == 1
+        assert paragraphs[3].context == ""
+
+    def test_plain_text_is_one_paragraph(self):
+        paragraphs = split_paragraphs("1. A device.")
+        assert len(paragraphs) == 1
+        assert paragraphs[0].text == "1. A device."
+
+
+class TestPlanReview:
+    """Tests for incremental paragraph review"""
+
+    def test_first_review_sends_everything(self):
+        plan = plan_review(split_paragraphs(CLAIMS), "m", ReviewCache())
+        assert [p.number for p in plan.pending] == [1, 2, 3, 4]
+        assert plan.prompt.startswith("1. A device, comprising:")
+
+    def test_only_changed_paragraph_and_its_preamble_are_resent(self):
+        cache = ReviewCache()
+        plan = plan_review(split_paragraphs(CLAIMS), "m", cache)
+        plan.merge(Suggestions(issues=[issue(4, "Colour is vague")]), cache)
+
+        edited = CLAIMS.replace("attached to the pencil", "clipped to the pencil")
+        plan = plan_review(split_paragraphs(edited), "m", cache)
+
+        assert [p.number for p in plan.pending] == [3]
+        assert [p.number for p in plan.prompt_paragraphs] == [1, 3]
+        assert [i.paragraph for i in plan.cached_issues] == [4]
+
+    def test_merge_remaps_prompt_numbers_to_document_numbers(self):
+        cache = ReviewCache()
+        plan = plan_review(split_paragraphs(CLAIMS), "m", cache)
+        plan.merge(Suggestions(issues=[issue(4, "Colour is vague")]), cache)
+
+        edited = CLAIMS.replace("attached to the pencil", "near the pencil")
+        plan = plan_review(split_paragraphs(edited), "m", cache)
+        # Prompt paragraph 2 is document paragraph 3; prompt paragraph 1 is context only
+        merged = plan.merge(Suggestions(issues=[issue(2, "Near is vague"), issue(1, "Context")]), cache)
+
+        assert [(i.paragraph, i.description) for i in merged.issues] == [(3, "Near is vague"), (4, "Colour is vague")]
+
+    def test_unpinned_issues_go_to_first_changed_paragraph(self):
+        cache = ReviewCache()
+        plan = plan_review(split_paragraphs(CLAIMS), "m", cache)
+        merged = plan.merge(Suggestions(issues=[issue(0)]), cache)
+        assert merged.issues[0].paragraph == 1
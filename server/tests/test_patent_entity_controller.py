@@ -182,4 +182,48 @@ class TestPatentEntityController:
         assert len(entities) >= 4
         assert any(entity["name"] == "Patent 1" for entity in entities)
         assert any(entity["name"] == "Patent 2" for entity in entities)
-        assert any(entity["name"] == "Patent 3" for entity in entities) 
\ No newline at end of file
+        assert any(entity["name"] == "Patent 3" for entity in entities) 
+
+class TestDocumentVersionsPage:
+    """Tests for the paginated, bodiless version list"""
+
+    def create_versions(self, client, count):
+        return [
+            client.post("/document/", json={"content": f"Version {i}", "patent_entity_id": 1}).json()["id"]
+            for i in range(count)
+        ]
+
+    def test_versions_have_no_content(self, client):
+        self.create_versions(client, 2)
+        page = client.get("/patent_entity/1/documents/versions").json()
+        assert page["total"] == 2
+        assert page["next_cursor"] is None
+        assert all("content" not in item for item in page["items"])
+        assert set(page["items"][0]) == {"id", "patent_entity_id", "created_at", "updated_at"}
+
+    def test_pages_walk_newest_to_oldest(self, client):
+        ids = self.create_versions(client, 5)
+
+        first = client.get("/patent_entity/1/documents/versions", params={"limit": 2}).json()
+        assert [item["id"] for item in first["items"]] == ids[:-3:-1]
+        assert first["total"] == 5
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+            page = client.get("/patent_entity/1/documents/versions", params=params).json()
+            seen += [item["id"] for item in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == ids[::-1]
+
+    def test_versions_are_scoped_to_the_patent(self, client):
+        self.create_versions(client, 2)
+        other = client.post("/patent_entity/", json={"name": "Other"}).json()
+        page = client.get(f"/patent_entity/{other['entity']['id']}/documents/versions").json()
+        assert [item["id"] for item in page["items"]] == [other["document"]["id"]]
+
+    def test_limit_is_bounded(self, client):
+        response = client.get("/patent_entity/1/documents/versions", params={"limit": 0})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
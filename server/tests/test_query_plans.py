@@ -0,0 +1,127 @@
+import re
+
+import pytest
+from fastapi.routing import APIRoute
+from sqlalchemy import Engine, event
+
+from app.__main__ import app
+from app.controllers import document_controller, patent_entity_controller
+
+# One request per controller route. A new route without an entry here fails
+# test_every_route_is_covered, so its queries can't skip the plan checks.
+ROUTE_REQUESTS = {
+    ("GET", "/document/"): lambda client: client.get("/document/"),
+    ("GET", "/document/search"): lambda client: client.get("/document/search", params={"q": "claim", "patent_id": 1}),
+    ("GET", "/document/{document_id}"): lambda client: client.get("/document/3"),
+    ("GET", "/document/{document_id}/content"): lambda client: client.get("/document/3/content"),
+    ("POST", "/document/"): lambda client: client.post("/document/", json={"content": "New", "patent_entity_id": 1}),
+    ("POST", "/document/patent/{patent_id}/new-version"): lambda client: client.post(
+        "/document/patent/1/new-version", json={"content": "Next", "patent_entity_id": 1}
+    ),
+    ("POST", "/document/{document_id}/save"): lambda client: client.post(
+        "/document/2/save", json={"content": "Edited", "patent_entity_id": 1}
+    ),
+    ("PATCH", "/document/{document_id}"): lambda client: client.patch(
+        "/document/2", json={"revision": 1, "edits": [{"start": 0, "end": 7, "text": "Edited"}]}
+    ),
+    ("DELETE", "/document/{document_id}"): lambda client: client.delete("/document/2"),
+    ("GET", "/patent_entity/list"): lambda client: client.get("/patent_entity/list"),
+    ("GET", "/patent_entity/export"): lambda client: client.get("/patent_entity/export"),
+    ("POST", "/patent_entity/import"): lambda client: client.post(
+        "/patent_entity/import",
+        content=b'{"type":"patent","id":9,"name":"Imported"}\n'
+                b'{"type":"document","patent_entity_id":9,"content":"Imported"}\n'
+                b'{"type":"document","patent_entity_id":1,"content":"Appended"}\n',
+    ),
+    ("GET", "/patent_entity/{patent_id}"): lambda client: client.get("/patent_entity/1"),
+    ("GET", "/patent_entity/{patent_id}/documents/first"): lambda client: client.get("/patent_entity/1/documents/first"),
+    ("GET", "/patent_entity/{patent_id}/documents/latest"): lambda client: client.get("/patent_entity/1/documents/latest"),
+    ("GET", "/patent_entity/{patent_id}/documents"): lambda client: client.get("/patent_entity/1/documents"),
+    ("GET", "/patent_entity/{patent_id}/documents/versions"): lambda client: client.get(
+        "/patent_entity/1/documents/versions", params={"limit": 2, "cursor": 3}
+    ),
+    ("POST", "/patent_entity/"): lambda client: client.post("/patent_entity/", json={"name": "Another"}),
+}
+
+FULL_SCAN_RE = re.compile(r"^SCAN (\w+)$")
+WHERE_RE = re.compile(r"\bWHERE\b", re.IGNORECASE)
+CTE_RE = re.compile(r"^\s*WITH(?: RECURSIVE)? (\w+)", re.IGNORECASE)
+
+
+def controller_routes() -> set[tuple[str, str]]:
+    routers = (document_controller.router, patent_entity_controller.router)
+    return {
+        (method, route.path)
+        for route in app.routes
+        if isinstance(route, APIRoute) and any(route in router.routes for router in routers)
+        for method in route.methods
+    }
+
+
+def query_plan(engine: Engine, statement: str, parameters) -> list[str]:
+    with engine.connect() as conn:
+        return [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+
+def plan_problems(statement: str, plan: list[str]) -> list[str]:
+    """
+    Filtered lookups must use an index for both the filter and the ordering.
+    Only unfiltered listings (no WHERE) may scan a whole table; scanning the
+    rows of the statement's own CTE is fine.
+    """
+    if not WHERE_RE.search(statement):
+        return []
+    cte = CTE_RE.match(statement)
+    return [
+        step for step in plan
+        if (FULL_SCAN_RE.match(step) and not (cte and step == f"SCAN {cte.group(1)}"))
+        or step.startswith("USE TEMP B-TREE")
+    ]
+
+
+@pytest.fixture()
+def versions(client):
+    """Three versions of the seeded patent (ids 1-3)"""
+    for i in range(3):
+        client.post("/document/patent/1/new-version", json={"content": f"Version {i}", "patent_entity_id": 1})
+
+
+@pytest.fixture()
+def captured_selects():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((conn.engine, statement, parameters))
+
+    event.listen(Engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(Engine, "before_cursor_execute", capture)
+
+
+class TestQueryPlans:
+    """EXPLAIN QUERY PLAN checks for every query the controllers run"""
+
+    def test_every_route_is_covered(self):
+        assert controller_routes() == set(ROUTE_REQUESTS)
+
+    @pytest.mark.parametrize("route", sorted(ROUTE_REQUESTS), ids=" ".join)
+    def test_queries_use_indexes(self, client, versions, captured_selects, route):
+        response = ROUTE_REQUESTS[route](client)
+        assert response.status_code == 200
+        assert captured_selects
+
+        for engine, statement, parameters in captured_selects:
+            plan = query_plan(engine, statement, parameters)
+            assert not plan_problems(statement, plan), f"{statement}\n{plan}"
+
+    def test_latest_version_lookup_uses_the_composite_index(self, db, versions):
+        plan = query_plan(
+            db.get_bind(),
+            "SELECT id FROM document WHERE patent_entity_id = ? ORDER BY id DESC LIMIT 1", (1,)
+        )
+        assert any("ix_document_patent_entity_id_id" in step for step in plan)
+
+    def test_harness_flags_unindexed_filters(self, db):
+        statement = "SELECT id FROM document WHERE created_at > ? ORDER BY updated_at"
+        assert plan_problems(statement, query_plan(db.get_bind(), statement, ("2000-01-01",)))
@@ -0,0 +1,84 @@
+from app.internal.cache import ReviewCache, review_key
+from app.schemas import SuggestionIssue, Suggestions
+
+
+def make_suggestions(description: str = "Missing period") -> Suggestions:
+    return Suggestions(issues=[
+        SuggestionIssue(
+            type="Structure",
+            severity="low",
+            paragraph=1,
+            description=description,
+            suggestion="Add a period.",
+        )
+    ])
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestReviewKey:
+    """Tests for review cache keys"""
+
+    def test_whitespace_only_edits_share_a_key(self):
+        assert review_key("1. A device,\n  comprising: a pencil.", "m") == review_key("1. A device, comprising:   a pencil.", "m")
+
+    def test_key_depends_on_model(self):
+        assert review_key("1. A device.", "model-a") != review_key("1. A device.", "model-b")
+
+    def test_key_depends_on_content(self):
+        assert review_key("1. A device.", "m") != review_key("1. A pencil.", "m")
+
+
+class TestReviewCache:
+    """Tests for the LRU/TTL review cache"""
+
+    def test_hit_and_miss_counters(self):
+        cache = ReviewCache(max_bytes=10_000, ttl_seconds=60)
+        assert cache.get("a") is None
+        cache.put("a", make_suggestions())
+        assert cache.get("a") == make_suggestions()
+
+        stats = cache.stats()
+        assert stats.hits == 1
+        assert stats.misses == 1
+        assert stats.entries == 1
+        assert stats.bytes > 0
+
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        cache = ReviewCache(max_bytes=10_000, ttl_seconds=5, clock=clock)
+        cache.put("a", make_suggestions())
+        clock.now = 5.0
+
+        assert cache.get("a") is None
+        assert cache.stats().expirations == 1
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used_when_over_byte_ceiling(self):
+        probe = ReviewCache(max_bytes=10_000, ttl_seconds=60)
+        probe.put("a", make_suggestions())
+        entry_size = probe.stats().bytes
+
+        cache = ReviewCache(max_bytes=entry_size * 2, ttl_seconds=60)
+        cache.put("a", make_suggestions())
+        cache.put("b", make_suggestions())
+        cache.get("a")  # "b" is now least recently used
+        cache.put("c", make_suggestions())
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert cache.stats().evictions == 1
+        assert cache.stats().bytes <= entry_size * 2
+
+    def test_oversized_entries_are_not_stored(self):
+        cache = ReviewCache(max_bytes=10, ttl_seconds=60)
+        cache.put("a", make_suggestions())
+        assert len(cache) == 0
+        assert cache.stats().bytes == 0
@@ -0,0 +1,76 @@
+import pytest
+from fastapi import status
+from sqlalchemy import Engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm.exc import StaleDataError
+
+import app.models as models
+
+
+@pytest.fixture()
+def captured_statements():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(Engine, "before_cursor_execute", capture)
+
+
+class TestRevisions:
+    """Tests for optimistic concurrency on document saves"""
+
+    def test_new_document_starts_at_revision_1(self, client):
+        created = client.post("/document/", json={"content": "Body", "patent_entity_id": 1}).json()
+        assert created["revision"] == 1
+
+    def test_save_bumps_the_revision(self, client):
+        created = client.post("/document/", json={"content": "Body", "patent_entity_id": 1}).json()
+        saved = client.post(f"/document/{created['id']}/save", json={"content": "Edited", "patent_entity_id": 1, "revision": 1})
+        assert saved.status_code == status.HTTP_200_OK
+        assert saved.json()["revision"] == 2
+        assert client.get(f"/document/{created['id']}").json() == saved.json()
+
+    def test_unchanged_save_keeps_the_revision(self, client):
+        created = client.post("/document/", json={"content": "Body", "patent_entity_id": 1}).json()
+        saved = client.post(f"/document/{created['id']}/save", json={"content": "Body", "patent_entity_id": 1, "revision": 1})
+        assert saved.json()["revision"] == 1
+
+    def test_stale_revision_is_rejected(self, client):
+        created = client.post("/document/", json={"content": "Body", "patent_entity_id": 1}).json()
+        client.post(f"/document/{created['id']}/save", json={"content": "First tab", "patent_entity_id": 1, "revision": 1})
+
+        response = client.post(f"/document/{created['id']}/save", json={"content": "Second tab", "patent_entity_id": 1, "revision": 1})
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert "revision 2" in response.json()["detail"]
+        assert client.get(f"/document/{created['id']}").json()["content"] == "First tab"
+
+    def test_concurrent_save_loses_the_race(self, db):
+        document = models.Document(patent_entity_id=1, content="Body")
+        db.add(document)
+        db.commit()
+        other = sessionmaker(bind=db.get_bind(), autoflush=False)()
+        try:
+            theirs = other.get(models.Document, document.id)
+            document.content, document.revision = "Ours", 2
+            db.commit()
+
+            theirs.content, theirs.revision = "Theirs", 2
+            with pytest.raises(StaleDataError):
+                other.commit()
+        finally:
+            other.close()
+
+    def test_save_does_not_reread(self, client, captured_statements):
+        created = client.post("/document/", json={"content": "Body", "patent_entity_id": 1}).json()
+        captured_statements.clear()
+        client.post(f"/document/{created['id']}/save", json={"content": "Edited", "patent_entity_id": 1, "revision": 1})
+
+        updates = [s for s in captured_statements if s.startswith("UPDATE document")]
+        assert len(updates) == 1
+        assert "revision = ?" in updates[0].split("WHERE")[1]
+        assert not any("FROM patent_entity" in s for s in captured_statements)
+        # Nothing is selected again once the UPDATE is done
+        assert not any(s.startswith(("SELECT", "WITH")) for s in captured_statements[captured_statements.index(updates[0]):])
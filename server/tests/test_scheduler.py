@@ -0,0 +1,105 @@
+import asyncio
+
+from app.internal.scheduler import AIScheduler
+
+
+class TestAIScheduler:
+    """Tests for bounded, fair scheduling of AI calls"""
+
+    def test_concurrency_is_capped(self):
+        async def scenario():
+            scheduler = AIScheduler(max_concurrency=2)
+            running = peak = 0
+
+            async def job():
+                nonlocal running, peak
+                async with scheduler.slot("conn"):
+                    running += 1
+                    peak = max(peak, running)
+                    await asyncio.sleep(0.01)
+                    running -= 1
+
+            await asyncio.gather(*(job() for _ in range(6)))
+            return peak, scheduler.active, scheduler.queued
+
+        assert asyncio.run(scenario()) == (2, 0, 0)
+
+    def test_slots_are_shared_round_robin_across_owners(self):
+        async def scenario():
+            scheduler = AIScheduler(max_concurrency=1)
+            order = []
+            release = asyncio.Event()
+
+            async def job(owner, name):
+                async with scheduler.slot(owner):
+                    order.append(name)
+                    await release.wait()
+
+            blocker = asyncio.create_task(job("a", "a0"))
+            await asyncio.sleep(0)
+            tasks = [asyncio.create_task(job("a", f"a{i}")) for i in range(1, 4)]
+            await asyncio.sleep(0)
+            tasks.append(asyncio.create_task(job("b", "b1")))
+            await asyncio.sleep(0)
+            release.set()
+            await asyncio.gather(blocker, *tasks)
+            return order
+
+        # "b" doesn't wait behind all of "a"'s backlog
+        assert asyncio.run(scenario()) == ["a0", "a1", "b1", "a2", "a3"]
+
+    def test_queued_waiters_are_told_their_position(self):
+        async def scenario():
+            scheduler = AIScheduler(max_concurrency=1)
+            release = asyncio.Event()
+            positions = {"x": [], "y": []}
+
+            async def hold():
+                async with scheduler.slot("busy"):
+                    await release.wait()
+
+            async def job(owner):
+                async def on_position(position):
+                    positions[owner].append(position)
+
+                async with scheduler.slot(owner, on_position):
+                    await asyncio.sleep(0.01)
+
+            holder = asyncio.create_task(hold())
+            await asyncio.sleep(0)
+            waiters = [asyncio.create_task(job("x")), asyncio.create_task(job("y"))]
+            await asyncio.sleep(0.01)
+            release.set()
+            await asyncio.gather(holder, *waiters)
+            return positions
+
+        positions = asyncio.run(scenario())
+        assert positions["x"] == [1]
+        assert positions["y"] == [2, 1]
+
+    def test_cancelled_waiters_never_take_a_slot(self):
+        async def scenario():
+            scheduler = AIScheduler(max_concurrency=1)
+            release = asyncio.Event()
+            ran = []
+
+            async def job(name):
+                async with scheduler.slot(name):
+                    ran.append(name)
+                    await release.wait()
+
+            holder = asyncio.create_task(job("holder"))
+            await asyncio.sleep(0)
+            superseded = asyncio.create_task(job("superseded"))
+            latest = asyncio.create_task(job("latest"))
+            await asyncio.sleep(0)
+            superseded.cancel()
+            await asyncio.sleep(0)
+            queued = scheduler.queued
+            release.set()
+            await asyncio.gather(holder, latest)
+            return ran, queued
+
+        ran, queued = asyncio.run(scenario())
+        assert ran == ["holder", "latest"]
+        assert queued == 1
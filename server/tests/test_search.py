@@ -0,0 +1,114 @@
+import json
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+import app.models as models
+from app.internal.db import Base
+from app.internal.search import DROP_SEARCH_INDEX, has_search_index, match_query, plain_text
+
+
+def search(client, q, **params):
+    response = client.get("/document/search", params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+class TestPlainText:
+    """Tests for the text that gets indexed"""
+
+    def test_markup_is_stripped(self):
+        html = "<head><title>Draft</title><style>p{}</style></head><h1>Claims</h1><p>A <b>wire</b>less device &amp; a lens</p><p>2. The</p>"
+        assert plain_text(html) == "Claims A wireless device & a lens 2. The"
+
+    def test_terms_are_quoted(self):
+        assert match_query('light "OR emitter*') == '"light" """OR" "emitter*"'
+
+
+class TestSearch:
+    """Tests for full-text search over document versions"""
+
+    def test_finds_versions_by_their_text(self, client):
+        client.post("/document/", json={"content": "<p>A wireless optogenetic device</p>", "patent_entity_id": 1})
+        client.post("/document/", json={"content": "<p>A microfluidic oxygenator</p>", "patent_entity_id": 1})
+
+        page = search(client, "optogenetic")
+        assert page["total"] == 1
+        hit = page["items"][0]
+        assert hit["patent_name"] == "Test Patent"
+        assert hit["snippet"] == "A wireless <mark>optogenetic</mark> device"
+
+    def test_markup_is_not_searchable(self, client):
+        client.post("/document/", json={"content": '<p class="claim">Body</p>', "patent_entity_id": 1})
+        assert search(client, "claim")["total"] == 0
+        assert search(client, "body")["total"] == 1
+
+    def test_words_are_stemmed_and_all_required(self, client):
+        client.post("/document/", json={"content": "<p>The sensor detects light</p>", "patent_entity_id": 1})
+        assert search(client, "detecting sensors")["total"] == 1
+        assert search(client, "detecting heat")["total"] == 0
+
+    def test_index_follows_saves_and_deletes(self, client):
+        doc = client.post("/document/", json={"content": "<p>Original wording</p>", "patent_entity_id": 1}).json()
+        client.post(f"/document/{doc['id']}/save", json={"content": "<p>Revised wording</p>", "patent_entity_id": 1})
+        assert search(client, "original")["total"] == 0
+        assert search(client, "revised")["items"][0]["revision"] == 2
+
+        client.delete(f"/document/{doc['id']}")
+        assert search(client, "wording")["total"] == 0
+
+    def test_best_matches_first_and_pages(self, client):
+        for content in ("<p>lens</p>" + "<p>filler text</p>" * 20, "<p>lens lens lens</p>", "<p>lens and mirror</p>"):
+            client.post("/document/", json={"content": content, "patent_entity_id": 1})
+
+        first = search(client, "lens", limit=2)
+        assert first["total"] == 3
+        assert first["next_offset"] == 2
+        assert first["items"][0]["snippet"].count("<mark>") == 3
+        ranks = [hit["rank"] for hit in first["items"]]
+        assert ranks == sorted(ranks)
+
+        second = search(client, "lens", limit=2, offset=2)
+        assert len(second["items"]) == 1
+        assert second["next_offset"] is None
+
+    def test_filter_by_patent(self, client):
+        other = client.post("/patent_entity/", json={"name": "Other"}).json()["entity"]["id"]
+        client.post("/document/", json={"content": "<p>shared term</p>", "patent_entity_id": 1})
+        client.post("/document/", json={"content": "<p>shared term</p>", "patent_entity_id": other})
+        hits = search(client, "shared", patent_id=other)["items"]
+        assert [hit["patent_entity_id"] for hit in hits] == [other]
+
+    def test_snippets_are_escaped(self, client):
+        client.post("/document/", json={"content": "<p>x &lt;script&gt; marker</p>", "patent_entity_id": 1})
+        assert search(client, "marker")["items"][0]["snippet"] == "x &lt;script&gt; <mark>marker</mark>"
+
+    def test_query_syntax_is_not_interpreted(self, client):
+        client.post("/document/", json={"content": "<p>NEAR the edge</p>", "patent_entity_id": 1})
+        assert search(client, 'NEAR "edge')["total"] == 1
+        assert client.get("/document/search", params={"q": "  "}).status_code == 422
+
+    def test_bulk_imports_are_indexed(self, client):
+        body = json.dumps({"type": "document", "patent_entity_id": 1, "content": "<p>imported phrasing</p>"}) + "\n"
+        client.post("/patent_entity/import", content=body)
+        assert search(client, "phrasing")["total"] == 1
+
+
+class TestBuildSearchIndex:
+    """Tests for indexing a DB created before the index existed"""
+
+    def test_existing_versions_are_indexed(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        with Session(engine) as db:
+            db.connection().exec_driver_sql(DROP_SEARCH_INDEX)
+            db.connection().info.clear()
+            db.add(models.PatentEntity(id=1, name="Old"))
+            db.add(models.Document(patent_entity_id=1, content="<p>legacy text</p>"))
+            db.commit()
+            assert not has_search_index(db.connection())
+
+            models.build_search_index(db)
+            assert db.connection().exec_driver_sql(
+                "SELECT rowid FROM document_fts WHERE document_fts MATCH 'legacy'"
+            ).all() == [(db.scalar(select(models.Document.id)),)]
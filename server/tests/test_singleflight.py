@@ -0,0 +1,140 @@
+import asyncio
+
+from app.internal.scheduler import AIScheduler
+from app.internal.singleflight import SingleFlight
+
+
+class CountingSource:
+    """Chunk source that counts how often it is started and whether it was cancelled"""
+
+    def __init__(self, chunks, delay: float = 0.01):
+        self.chunks = chunks
+        self.delay = delay
+        self.starts = 0
+        self.cancelled = False
+
+    async def stream(self):
+        self.starts += 1
+        try:
+            for chunk in self.chunks:
+                await asyncio.sleep(self.delay)
+                yield chunk
+            yield None
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+async def collect(stream) -> str:
+    return "".join([chunk async for chunk in stream])
+
+
+class TestSingleFlight:
+    """Tests for coalescing identical AI requests"""
+
+    def test_concurrent_identical_requests_share_one_stream(self):
+        async def scenario():
+            flights = SingleFlight()
+            source = CountingSource(["a", "b", "c"])
+            results = await asyncio.gather(*(collect(flights.stream("k", lambda _: source.stream())) for _ in range(3)))
+            return source, results, len(flights)
+
+        source, results, remaining = asyncio.run(scenario())
+        assert source.starts == 1
+        assert results == ["abc"] * 3
+        assert remaining == 0
+
+    def test_late_waiter_sees_whole_stream(self):
+        async def scenario():
+            flights = SingleFlight()
+            source = CountingSource(["a", "b", "c"], delay=0.02)
+            first = asyncio.create_task(collect(flights.stream("k", lambda _: source.stream())))
+            await asyncio.sleep(0.05)
+            second = await collect(flights.stream("k", lambda _: source.stream()))
+            return source, await first, second
+
+        source, first, second = asyncio.run(scenario())
+        assert source.starts == 1
+        assert first == second == "abc"
+
+    def test_one_waiter_cancelling_does_not_cancel_others(self):
+        async def scenario():
+            flights = SingleFlight()
+            source = CountingSource(["a", "b", "c"], delay=0.02)
+            leaving = asyncio.create_task(collect(flights.stream("k", lambda _: source.stream())))
+            staying = asyncio.create_task(collect(flights.stream("k", lambda _: source.stream())))
+            await asyncio.sleep(0.03)
+            leaving.cancel()
+            return source, await staying
+
+        source, result = asyncio.run(scenario())
+        assert result == "abc"
+        assert not source.cancelled
+
+    def test_last_waiter_cancelling_cancels_stream(self):
+        async def scenario():
+            flights = SingleFlight()
+            source = CountingSource(["a", "b", "c"], delay=0.02)
+            waiter = asyncio.create_task(collect(flights.stream("k", lambda _: source.stream())))
+            await asyncio.sleep(0.03)
+            waiter.cancel()
+            await asyncio.sleep(0.01)
+            return source, len(flights)
+
+        source, remaining = asyncio.run(scenario())
+        assert source.cancelled
+        assert remaining == 0
+
+    def test_errors_reach_every_waiter(self):
+        async def failing():
+            yield "a"
+            raise RuntimeError("rate limited")
+
+        async def scenario():
+            flights = SingleFlight()
+            return await asyncio.gather(
+                *(collect(flights.stream("k", lambda _: failing())) for _ in range(2)),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(scenario())
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    def test_position_errors_end_only_their_waiter(self):
+        async def scenario():
+            flights = SingleFlight()
+            scheduler = AIScheduler(max_concurrency=1)
+            release = asyncio.Event()
+            source = CountingSource(["a", "b", "c"])
+            positions = []
+
+            async def hold():
+                async with scheduler.slot("busy"):
+                    await release.wait()
+
+            async def disconnected(position):
+                raise ConnectionError("client went away")
+
+            async def report(position):
+                positions.append(position)
+
+            async def review(owner, on_position):
+                return await collect(flights.stream(
+                    "k", lambda report: scheduler.stream(source.stream, owner, report), on_position
+                ))
+
+            holder = asyncio.create_task(hold())
+            await asyncio.sleep(0)
+            first = asyncio.create_task(review("first", disconnected))
+            second = asyncio.create_task(review("second", report))
+            await asyncio.sleep(0.01)
+            release.set()
+            results = await asyncio.gather(first, second, return_exceptions=True)
+            await holder
+            return source, positions, results
+
+        source, positions, (first, second) = asyncio.run(scenario())
+        assert isinstance(first, ConnectionError)
+        assert second == "abc"
+        assert positions == [1]
+        assert source.starts == 1
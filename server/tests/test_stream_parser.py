@@ -0,0 +1,38 @@
+import json
+
+from app.internal.stream_parser import IssueStreamParser
+
+REVIEW = json.dumps({
+    "issues": [
+        {"type": "Structure", "severity": "low", "paragraph": 1, "description": "Uses {braces} and \"quotes\"", "suggestion": "x"},
+        {"type": "Punctuation", "severity": "high", "paragraph": 2, "description": "Missing ]", "suggestion": "y"},
+    ]
+})
+
+
+def feed_in_chunks(parser: IssueStreamParser, text: str, size: int) -> list[list[str]]:
+    return [parser.feed(text[start:start + size]) for start in range(0, len(text), size)]
+
+
+class TestIssueStreamParser:
+    """Tests for incremental issue extraction"""
+
+    def test_emits_each_issue_once_it_is_closed(self):
+        batches = feed_in_chunks(IssueStreamParser(), REVIEW, 5)
+        issues = [json.loads(raw) for batch in batches for raw in batch]
+        assert issues == json.loads(REVIEW)["issues"]
+
+    def test_first_issue_arrives_before_stream_ends(self):
+        batches = feed_in_chunks(IssueStreamParser(), REVIEW, 5)
+        first = next(i for i, batch in enumerate(batches) if batch)
+        assert first < len(batches) - 1
+        assert len(batches[first]) == 1
+
+    def test_character_at_a_time(self):
+        batches = feed_in_chunks(IssueStreamParser(), REVIEW, 1)
+        assert sum(len(batch) for batch in batches) == 2
+
+    def test_ignores_objects_outside_issues_array(self):
+        text = json.dumps({"meta": [{"a": 1}], "issues": [{"b": {"c": 2}}]})
+        batches = feed_in_chunks(IssueStreamParser(), text, 3)
+        assert [json.loads(raw) for batch in batches for raw in batch] == [{"b": {"c": 2}}]
@@ -0,0 +1,57 @@
+import json
+
+from sqlalchemy import Engine, event, select
+
+import app.models as models
+import app.schemas as schemas
+from app.internal.streaming import iter_json_array
+
+
+class TestStreamingLists:
+    """Tests for streamed JSON list responses"""
+
+    def test_document_list_matches_buffered_response(self, client):
+        for i in range(5):
+            client.post("/document/", json={"content": f"Document {i}", "patent_entity_id": 1})
+        streamed = client.get("/document/", params={"stream": True})
+        assert streamed.headers["content-type"] == "application/json"
+        assert streamed.json() == client.get("/document/").json()
+
+    def test_patent_document_list_matches_buffered_response(self, client):
+        for i in range(3):
+            client.post("/document/", json={"content": f"Document {i}", "patent_entity_id": 1})
+        url = "/patent_entity/1/documents"
+        assert client.get(url, params={"stream": True}).json() == client.get(url).json()
+
+    def test_empty_list(self, client):
+        assert client.get("/document/", params={"stream": True}).json() == []
+
+    def test_rows_are_released_after_each_batch(self, client, db):
+        for i in range(7):
+            client.post("/document/patent/1/new-version", json={"content": f"Document {i}", "patent_entity_id": 1})
+        stmt = select(models.Document).order_by(models.Document.id.desc())
+
+        chunks, held = [], []
+        for chunk in iter_json_array(db, stmt, schemas.DocumentRead, models.load_contents, batch_size=2):
+            chunks.append(chunk)
+            held.append(len(db.identity_map))
+        assert len(chunks) == 6  # "[", four batches, "]"
+        assert max(held) == 0  # Versions and the chains they were built from are all released
+
+    def test_each_batch_is_rebuilt_with_one_query(self, client, db):
+        contents = [f"<p>Claim 1. A widget, revised {i} times.</p>" for i in range(7)]
+        for content in contents:
+            client.post("/document/patent/1/new-version", json={"content": content, "patent_entity_id": 1})
+        stmt = select(models.Document).order_by(models.Document.id.desc())
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(Engine, "before_cursor_execute", capture)
+        try:
+            body = "".join(iter_json_array(db, stmt, schemas.DocumentRead, models.load_contents, batch_size=2))
+        finally:
+            event.remove(Engine, "before_cursor_execute", capture)
+        assert [document["content"] for document in json.loads(body)] == contents[::-1]
+        assert len(statements) == 1 + 4  # The rows, then each batch's chains
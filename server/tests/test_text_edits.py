@@ -0,0 +1,78 @@
+import pytest
+from fastapi import status
+
+from app.internal.text_edits import apply_edits
+from app.schemas import TextEdit
+
+
+def edit(start, end, text=""):
+    return TextEdit(start=start, end=end, text=text)
+
+
+class TestApplyEdits:
+    """Tests for applying text edits to content"""
+
+    def test_offsets_refer_to_the_original_content(self):
+        assert apply_edits("one two three", [edit(8, 13, "3"), edit(0, 3, "1")]) == "1 two 3"
+
+    def test_insert_and_delete(self):
+        assert apply_edits("abc", [edit(1, 1, "X"), edit(2, 3)]) == "aXb"
+
+    def test_no_edits(self):
+        assert apply_edits("abc", []) == "abc"
+
+    def test_offsets_are_characters(self):
+        assert apply_edits("é🙂x", [edit(2, 3, "y")]) == "é🙂y"
+
+    @pytest.mark.parametrize("edits", [
+        [edit(0, 2), edit(1, 3)],  # Overlap
+        [edit(2, 1)],  # Backwards
+        [edit(0, 4)],  # Past the end
+    ])
+    def test_invalid_edits(self, edits):
+        with pytest.raises(ValueError):
+            apply_edits("abc", edits)
+
+
+class TestPatchDocument:
+    """Tests for PATCH /document/{id}"""
+
+    def create(self, client, content="<p>The quick fox</p>"):
+        return client.post("/document/", json={"content": content, "patent_entity_id": 1}).json()
+
+    def test_patch_applies_edits(self, client):
+        created = self.create(client)
+        response = client.patch(f"/document/{created['id']}", json={
+            "revision": 1,
+            "edits": [{"start": 7, "end": 12, "text": "slow"}],
+        })
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["revision"] == 2
+        assert "content" not in data
+        document = client.get(f"/document/{created['id']}").json()
+        assert document["content"] == "<p>The slow fox</p>"
+        assert document["revision"] == 2
+        assert document["updated_at"] == data["updated_at"]
+
+    def test_stale_base_is_rejected(self, client):
+        created = self.create(client)
+        client.patch(f"/document/{created['id']}", json={"revision": 1, "edits": [{"start": 3, "end": 3, "text": "A "}]})
+        response = client.patch(f"/document/{created['id']}", json={"revision": 1, "edits": [{"start": 3, "end": 3, "text": "B "}]})
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert client.get(f"/document/{created['id']}").json()["content"] == "<p>A The quick fox</p>"
+
+    def test_invalid_edits_are_rejected(self, client):
+        created = self.create(client)
+        response = client.patch(f"/document/{created['id']}", json={"revision": 1, "edits": [{"start": 0, "end": 999}]})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert client.get(f"/document/{created['id']}").json()["revision"] == 1
+
+    def test_no_op_patch_keeps_the_revision(self, client):
+        created = self.create(client)
+        response = client.patch(f"/document/{created['id']}", json={"revision": 1, "edits": [{"start": 3, "end": 6, "text": "The"}]})
+        assert response.json()["revision"] == 1
+
+    def test_patch_not_found(self, client):
+        response = client.patch("/document/999", json={"revision": 1, "edits": []})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,133 @@
+from sqlalchemy import Engine, event, func, select
+
+import app.models as models
+from app.internal.data import DOCUMENT_1
+from app.internal.versioning import SNAPSHOT_INTERVAL, apply_delta, encode_delta
+
+
+def edited_versions(count: int) -> list[str]:
+    """Successive autosaves of DOCUMENT_1, each appending a word to one claim"""
+    versions, current = [], DOCUMENT_1
+    for i in range(count):
+        current = current.replace("</p>", f" edit{i}</p>", 1)
+        versions.append(current)
+    return versions
+
+
+class TestDeltaCodec:
+    """Tests for delta encoding of document text"""
+
+    def test_round_trip(self):
+        base = "<h1>Claims</h1><p>1. A device.</p><p>a pencil.</p>"
+        target = "<h1>Claims</h1><p>1. A red device.</p><p>a pencil.</p><p>2. New claim.</p>"
+        assert apply_delta(base, encode_delta(base, target)) == target
+
+    def test_small_edit_gives_small_delta(self):
+        target = DOCUMENT_1.replace("biocompatible", "bio-compatible", 1)
+        assert len(encode_delta(DOCUMENT_1, target)) < len(DOCUMENT_1) / 20
+
+    def test_plain_text(self):
+        assert apply_delta("line one\nline two\n", encode_delta("line one\nline two\n", "line one\nline 2\n")) == "line one\nline 2\n"
+
+
+class TestVersionStorage:
+    """Tests for snapshot + delta storage of document versions"""
+
+    def create_versions(self, client, count: int) -> list[dict]:
+        return [
+            client.post("/document/patent/1/new-version", json={"content": content, "patent_entity_id": 1}).json()
+            for content in edited_versions(count)
+        ]
+
+    def test_versions_read_back_unchanged(self, client):
+        versions = self.create_versions(client, 25)
+        for version, expected in zip(versions, edited_versions(25)):
+            assert client.get(f"/document/{version['id']}").json()["content"] == expected
+
+    def test_snapshot_every_interval(self, client, db):
+        self.create_versions(client, SNAPSHOT_INTERVAL * 3)
+        snapshots = db.scalar(select(func.count(models.Document.id)).where(models.Document.snapshot_hash.is_not(None)))
+        assert snapshots == 3
+
+    def test_storage_is_a_fraction_of_full_copies(self, client, db):
+        contents = edited_versions(100)
+        self.create_versions(client, 100)
+        stored = sum(blob.size for blob in db.scalars(select(models.Blob)))
+        stored += sum(len(d.delta or "") for d in db.scalars(select(models.Document)))
+        assert stored < sum(map(len, contents)) * 0.1
+
+    def test_saving_an_earlier_version_leaves_later_ones_intact(self, client):
+        versions = self.create_versions(client, 3)
+        client.post(f"/document/{versions[1]['id']}/save", json={"content": "<p>Rewritten.</p>", "patent_entity_id": 1})
+
+        assert client.get(f"/document/{versions[1]['id']}").json()["content"] == "<p>Rewritten.</p>"
+        assert client.get(f"/document/{versions[2]['id']}").json()["content"] == edited_versions(3)[2]
+
+    def test_deleting_a_version_leaves_later_ones_intact(self, client):
+        versions = self.create_versions(client, 3)
+        client.delete(f"/document/{versions[1]['id']}")
+        assert client.get(f"/document/{versions[2]['id']}").json()["content"] == edited_versions(3)[2]
+
+    def test_reads_and_saves_cost_the_same_at_any_depth(self, client, db):
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if not statement.startswith("PRAGMA"):  # Checks made once per pooled connection
+                statements.append(statement)
+
+        def latest_version_costs() -> tuple[int, int]:
+            latest = client.get("/patent_entity/1/documents/latest").json()
+            event.listen(Engine, "before_cursor_execute", capture)
+            try:
+                statements.clear()
+                client.get(f"/document/{latest['id']}")
+                reads = len(statements)
+                statements.clear()
+                client.post(f"/document/{latest['id']}/save", json={"content": latest["content"] + "<p>More</p>", "patent_entity_id": 1})
+                return reads, len(statements)
+            finally:
+                event.remove(Engine, "before_cursor_execute", capture)
+
+        self.create_versions(client, 2)
+        shallow = latest_version_costs()
+        # A read is the ETag columns, the row and its chain. A save reads the row, then its chain and
+        # successors in one query, then writes the UPDATE and the search index entry
+        assert shallow == (3, 4)
+        self.create_versions(client, SNAPSHOT_INTERVAL - 2)
+        assert db.scalar(select(func.max(models.Document.chain_depth))) == SNAPSHOT_INTERVAL - 1
+        # The chain below a version is read in one query, however long it is
+        assert latest_version_costs() == shallow
+
+    def test_lists_rebuild_every_version_in_one_query(self, client):
+        count = SNAPSHOT_INTERVAL + 5
+        self.create_versions(client, count)
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if not statement.startswith("PRAGMA"):
+                statements.append(statement)
+
+        event.listen(Engine, "before_cursor_execute", capture)
+        try:
+            for url in ("/document/", "/patent_entity/1/documents"):
+                statements.clear()
+                listed = client.get(url).json()
+                assert [document["content"] for document in listed] == edited_versions(count)[::-1]
+                # The rows, then every chain below them at once
+                assert len(statements) == 2, url
+        finally:
+            event.remove(Engine, "before_cursor_execute", capture)
+
+    def test_reads_in_a_session_with_unflushed_versions(self, db):
+        versions = [models.Document(patent_entity_id=1, content=content) for content in edited_versions(3)]
+        for version in versions:
+            db.add(version)
+            db.flush()
+        db.commit()
+        middle, last = versions[1], versions[2]
+        middle.content = "<p>Rewritten.</p>"
+        db.flush()
+        db.expire(last)
+        # The flush re-encoded `last`, so the DB and the session agree again
+        assert last.content == edited_versions(3)[2]
+        assert middle.content == "<p>Rewritten.</p>"
@@ -1,5 +1,7 @@
 import pytest
 import json
+import subprocess
+import sys
 from fastapi.testclient import TestClient
 from fastapi import status
 
@@ -139,4 +141,193 @@ class TestWebSocketController:
         assert "TimeoutError" in source or "asyncio.TimeoutError" in source
         
         # Check for WebSocketDisconnect handling
-        assert "WebSocketDisconnect" in source 
\ No newline at end of file
+        assert "WebSocketDisconnect" in source 
+
+class TestLazyAI:
+    """Tests for importing the AI stack on first /ws use"""
+
+    def test_app_import_does_not_load_openai(self):
+        code = "import sys, app.__main__; print('openai' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        assert result.stdout.split()[-1] == "False"
+
+    def test_override_of_get_ai_is_used(self, client: TestClient):
+        from app.__main__ import app
+        from app.internal.ai import get_ai
+
+        ai = StubAI()
+        app.dependency_overrides[get_ai] = lambda: ai
+        try:
+            with client.websocket_connect("/ws") as ws:
+                ws.send_text(json.dumps({"content": "<p>Text</p>", "request_id": 1}))
+                receive_complete(ws)
+        finally:
+            del app.dependency_overrides[get_ai]
+        assert ai.prompts == ["Text"]
+
+    def test_connections_share_the_app_ai(self, client: TestClient, monkeypatch):
+        from app.internal.ai_client import shared_ai
+
+        ai = StubAI()
+        calls = []
+        monkeypatch.setattr(shared_ai, "get", lambda: calls.append(1) or ai)
+        for request_id, text in enumerate(("First", "Second"), start=1):
+            with client.websocket_connect("/ws") as ws:
+                ws.send_text(json.dumps({"content": f"<p>{text}</p>", "request_id": request_id}))
+                receive_complete(ws)
+        assert ai.prompts == ["First", "Second"]
+        assert len(calls) == 2
+
+
+class StubAI:
+    """Minimal stand-in for AI that records prompts and streams a canned review"""
+
+    model = "stub-model"
+
+    def __init__(self, response: str = '{"issues": []}'):
+        self.response = response
+        self.prompts = []
+
+    async def review_document(self, document: str):
+        self.prompts.append(document)
+        for start in range(0, len(self.response), 7):
+            yield self.response[start:start + 7]
+        yield None
+
+
+def receive_complete(ws):
+    """Read frames until the "complete" one; returns (partial frames, complete frame)"""
+    partials = []
+    while True:
+        data = ws.receive_json()
+        if data["status"] == "complete":
+            return partials, data
+        partials.append(data)
+
+
+@pytest.fixture()
+def stub_ai():
+    from app.__main__ import app
+    from app.internal.ai import get_ai
+    from app.internal.cache import review_cache
+
+    ai = StubAI(json.dumps({"issues": [{
+        "type": "Ambiguity",
+        "severity": "medium",
+        "paragraph": 2,
+        "description": "Vague term",
+        "suggestion": "Be specific.",
+    }]}))
+    review_cache.clear()
+    app.dependency_overrides[get_ai] = lambda: ai
+    yield ai
+    del app.dependency_overrides[get_ai]
+    review_cache.clear()
+
+
+class TestWebSocketReview:
+    """Round-trip tests for /ws against a stubbed AI"""
+
+    CONTENT = "<p>1. A device, comprising:</p><p>a long pencil.</p><p>2. The device of claim 1.</p>"
+
+    def test_review_round_trip(self, client: TestClient, stub_ai: StubAI):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_text(json.dumps({"content": self.CONTENT, "request_id": 1}))
+            data = receive_complete(ws)[1]
+
+        assert data["request_id"] == 1
+        assert data["suggestions"]["issues"][0]["paragraph"] == 2
+        assert "<p>" not in stub_ai.prompts[0]
+
+    def test_issues_are_streamed_before_complete_frame(self, client: TestClient, stub_ai: StubAI):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_text(json.dumps({"content": self.CONTENT, "request_id": 1}))
+            partials, complete = receive_complete(ws)
+
+        assert len(partials) == 1
+        assert partials[0]["request_id"] == 1
+        assert partials[0]["suggestions"]["issues"] == complete["suggestions"]["issues"]
+
+    def test_repeated_content_is_served_from_cache(self, client: TestClient, stub_ai: StubAI):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_text(json.dumps({"content": self.CONTENT, "request_id": 1}))
+            first = receive_complete(ws)[1]
+            ws.send_text(json.dumps({"content": self.CONTENT, "request_id": 2}))
+            second = receive_complete(ws)[1]
+
+        assert len(stub_ai.prompts) == 1
+        assert second["suggestions"] == first["suggestions"]
+
+    def test_only_edited_paragraph_is_re_reviewed(self, client: TestClient, stub_ai: StubAI):
+        edited = self.CONTENT.replace("claim 1.", "claim 1, wherein the pencil is red.")
+        with client.websocket_connect("/ws") as ws:
+            ws.send_text(json.dumps({"content": self.CONTENT, "request_id": 1}))
+            receive_complete(ws)[1]
+            ws.send_text(json.dumps({"content": edited, "request_id": 2}))
+            data = receive_complete(ws)[1]
+
+        assert stub_ai.prompts[1] == "2. The device of claim 1, wherein the pencil is red."
+        # Cached issue for paragraph 2 survives; the stub's "paragraph 2" is out of range for the one-paragraph prompt
+        assert [i["paragraph"] for i in data["suggestions"]["issues"]] == [2, 3]
+
+
+class SlowStubAI(StubAI):
+    """StubAI that stalls on documents containing "slow" until cancelled or released"""
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+        self.cancelled = []
+
+    async def review_document(self, document: str):
+        import asyncio
+
+        if "slow" in document:
+            try:
+                await asyncio.sleep(self.delay)
+            except asyncio.CancelledError:
+                self.cancelled.append(document)
+                raise
+        async for chunk in super().review_document(document):
+            yield chunk
+
+
+@pytest.fixture()
+def slow_ai(request):
+    from app.__main__ import app
+    from app.internal.ai import get_ai
+    from app.internal.cache import review_cache
+
+    ai = SlowStubAI(delay=request.param)
+    review_cache.clear()
+    app.dependency_overrides[get_ai] = lambda: ai
+    yield ai
+    del app.dependency_overrides[get_ai]
+    review_cache.clear()
+
+
+class TestWebSocketChannels:
+    """Tests for concurrent, per-document request handling on /ws"""
+
+    @pytest.mark.parametrize("slow_ai", [5.0], indirect=True)
+    def test_newer_request_cancels_in_flight_review(self, client: TestClient, slow_ai: SlowStubAI):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_text(json.dumps({"content": "<p>1. A slow device.</p>", "request_id": 1, "document_id": 7}))
+            ws.send_text(json.dumps({"content": "<p>1. A fast device.</p>", "request_id": 2, "document_id": 7}))
+            data = receive_complete(ws)[1]
+
+        assert data["request_id"] == 2
+        # The stale review never reaches the model's output
+        assert slow_ai.prompts == ["1. A fast device."]
+
+    @pytest.mark.parametrize("slow_ai", [0.2], indirect=True)
+    def test_different_documents_run_in_parallel(self, client: TestClient, slow_ai: SlowStubAI):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_text(json.dumps({"content": "<p>1. A slow device.</p>", "request_id": 1, "document_id": 1}))
+            ws.send_text(json.dumps({"content": "<p>1. A fast device.</p>", "request_id": 1, "document_id": 2}))
+            first = receive_complete(ws)[1]
+            second = receive_complete(ws)[1]
+
+        assert [first["request_id"], second["request_id"]] == [1, 1]
+        assert slow_ai.prompts == ["1. A fast device.", "1. A slow device."]
+        assert slow_ai.cancelled == []